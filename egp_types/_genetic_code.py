@@ -125,6 +125,16 @@ class _genetic_code:
     def __init__(self, _: dict[str, Any] = {}, **__) -> None:  # pylint: disable=dangerous-default-value
         self.idx: int
 
+    def __eq__(self, other: object) -> bool:
+        """Genetic codes are equal if they are the same object. In handle mode (see genetic_code_cache) a
+        genetic code may have many short lived proxies so proxies for the same index in the same store are
+        equal. NOTE: In handle mode a proxy for a deleted genetic code is equal to a proxy for the genetic
+        code that reuses its index.
+        """
+        if self is other:
+            return True
+        return type(self) is type(other) and self._proxied() and self.idx >= 0 and self.idx == getattr(other, "idx", -1)
+
     def __getitem__(self, member: str) -> Any:
         """Return the specified member."""
         # Touch
@@ -143,6 +153,10 @@ class _genetic_code:
             assert member in STORE_DYNAMIC_MEMBERS, f"Member '{member}' is not a dynamic member of genetic code."
         return gcc._common_ds_members[member][self.idx]
 
+    def __hash__(self) -> int:
+        """Hash of the genetic code index in handle mode else the object identity."""
+        return hash(self.idx) if self._proxied() else object.__hash__(self)
+
     def __repr__(self) -> str:
         """Return the string representation of the genetic code."""
         str_list: list[str] = [f"Genetic Code {self.idx}"]
@@ -173,10 +187,16 @@ class _genetic_code:
         # Setting a static member.
         if member in STORE_STATIC_MEMBERS:
             getattr(gpc, member)[self.idx] = value
+            if member == "graph":
+                gpc.index_interface(self.idx, value)  # type: ignore [arg-type]
         else:
             # Dynamic members can only be set if they are all set using self.fake_feaf()
             raise KeyError(f"Member '{member}' is not a static member of genetic code.")
 
+    def _proxied(self) -> bool:
+        """Return True if the genetic code is a proxy i.e. its store is in handle mode."""
+        return getattr(getattr(type(self), "genetic_code_cache", None), "handles", False)
+
     def as_dict(self) -> dict[str, Any]:
         """Return the genetic code as a dictionary."""
         retval: dict[str, Any] = {}
@@ -266,14 +286,16 @@ class _genetic_code:
         gpc: genetic_code_cache = type(self).genetic_code_cache
         if _LOG_DEEP_DEBUG:
             _logger.debug(f"Making genetic code {self.idx} a leaf node.")
-        for member in STORE_GC_OBJ_MEMBERS:
-            self[member + "_signature"] = self[member]["signature"]
-        for member in STORE_DERIVED_MEMBERS:
+        # All values must be derived before any are stored: Once the first dynamic member is stored
+        # the genetic code has a dynamic store entry and the remaining members would read as defaults.
+        values: dict[str, Any] = {member + "_signature": self[member]["signature"] for member in STORE_GC_OBJ_MEMBERS}
+        values.update({member: self[member] for member in STORE_DERIVED_MEMBERS})
+        for member, value in values.items():
             # Setting a dynamic member.
             if _LOG_DEEP_DEBUG:
                 _logger.debug(f"Setting dynamic member '{member}' dynamic index {gpc.common_ds_idx[self.idx]}.")
                 assert member in STORE_DYNAMIC_MEMBERS, f"Member '{member}' is not a dynamic member of genetic code."
-            gpc._common_ds_members[member][self.idx] = self[member]  # pylint: disable=protected-access
+            gpc._common_ds_members[member][self.idx] = value  # pylint: disable=protected-access
 
     def mermaid(self) -> list[str]:
         """Return the Mermaid Chart representation of the genetic code."""
@@ -307,9 +329,14 @@ class _genetic_code:
         NOTE: Orphans do not HAVE to be purged/deleted. They were not purged for a reason in
         the first place. They may be needed in the future and so are returned to the caller.
         """
+        # Special genetic codes have no dependencies to purge.
+        if not self.valid():
+            return []
+
         # Determine if anything has been purged: This is a search so a "no touch" activity.
         cls = type(self)
-        purged: dict[str, bool] = {m: getattr(getattr(cls.genetic_code_cache, m), "idx", -1) in purged_gcs for m in STORE_GC_OBJ_MEMBERS}
+        gcc: genetic_code_cache = cls.genetic_code_cache
+        purged: dict[str, bool] = {m: getattr(gcc, m)[self.idx].idx in purged_gcs for m in STORE_GC_OBJ_MEMBERS}
 
         # Return if nothing has been purged there is nothing to do an no orphans
         if not any(purged.values()):
@@ -319,7 +346,7 @@ class _genetic_code:
         self.make_leaf()
         for member, _ in filter(lambda x: x[1], purged.items()):
             self[member] = PURGED_GENETIC_CODE
-        return [self[m].idx for m in STORE_GC_OBJ_MEMBERS if not purged[m]]
+        return [idx for idx in (getattr(gcc, m)[self.idx].idx for m in STORE_GC_OBJ_MEMBERS if not purged[m]) if idx >= 0]
 
     def signature(self) -> NDArray:
         """Return a globally unique reference for the genetic code."""
@@ -0,0 +1,620 @@
+"""The array_internal_graph class.
+
+# Structure of Arrays Internal Graph
+
+An internal_graph is a dict of end_point objects each with a list of reference objects. Manipulating
+a graph with a few hundred endpoints allocates thousands of small objects. The array_internal_graph
+has the same public API as the internal_graph but the endpoints are stored in parallel numpy arrays
+(row, class, index, type & constant value) and the references in parallel adjacency arrays
+(owning endpoint, referenced row & index). Filters are masks over the arrays and copy() is a few
+array copies.
+
+Endpoint slots and reference slots are only ever appended (deleted ones are marked dead) so slot
+order is the insertion order of the equivalent dict. Dead slots are dropped (preserving the order) by
+copy() and compacted away in place after reindexing or when the arrays are full & at least half of
+the slots are dead so storage is bounded by the size of the graph rather than its history.
+
+NOTE: The end_point objects returned (by filters, [], values() etc.) are created on demand and are
+snapshots. Changes to them are not reflected in the graph unless the end point is set again
+e.g. graph[ep.key()] = ep. Modify the graph through its methods.
+"""
+
+from __future__ import annotations
+
+from itertools import count
+from logging import DEBUG, Logger, NullHandler, getLogger
+from typing import Any, Generator, Iterable, Iterator, Literal, cast
+
+from numpy import bincount, bool_, empty, flatnonzero, int16, int32, intp, ndarray, uint8, uint16, zeros
+from numpy.typing import NDArray
+
+from .egp_typing import (
+    DST_EP,
+    ROWS,
+    SRC_EP,
+    DestinationRow,
+    DstEndPointHash,
+    EndPointClass,
+    EndPointHash,
+    EndPointIndex,
+    JSONGraph,
+    Row,
+    SourceRow,
+    SrcEndPointHash,
+)
+from .end_point import dst_end_point, dst_end_point_ref, end_point_key, src_end_point, src_end_point_ref, x_end_point
+from .internal_graph import DstEndPointDict, EndPointDict, SrcEndPointDict, internal_graph
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Initial number of endpoint & reference slots
+_INITIAL_CAPACITY: int = 32
+# Position of each row in ROWS: The value stored in the row arrays
+_ROW_POS: dict[Row, int] = {row: pos for pos, row in enumerate(ROWS)}
+_U_POS: int = _ROW_POS["U"]
+
+
+def _grown(arr: NDArray, size: int) -> NDArray:
+    """Return a copy of arr with size elements. New elements are zero (or None)."""
+    retval: NDArray = zeros(size, dtype=arr.dtype) if arr.dtype != object else empty(size, dtype=object)
+    retval[: len(arr)] = arr
+    return retval
+
+
+class array_internal_graph:
+    """Structure of arrays implementation of internal_graph."""
+
+    def __init__(self, eps: EndPointDict | Iterable[tuple[EndPointHash, x_end_point]] | None = None) -> None:
+        """Create the graph from a dict (e.g. an internal_graph) or iterable of (key, end point) pairs."""
+        # Endpoints
+        self._row: NDArray[uint8] = zeros(_INITIAL_CAPACITY, dtype=uint8)
+        self._cls: NDArray[bool_] = zeros(_INITIAL_CAPACITY, dtype=bool_)
+        self._idx: NDArray[uint16] = zeros(_INITIAL_CAPACITY, dtype=uint16)
+        self._typ: NDArray[int16] = zeros(_INITIAL_CAPACITY, dtype=int16)
+        self._val: NDArray[Any] = empty(_INITIAL_CAPACITY, dtype=object)
+        self._live: NDArray[bool_] = zeros(_INITIAL_CAPACITY, dtype=bool_)
+        self._num: int = 0
+        # Key to endpoint slot in insertion order
+        self._slots: dict[EndPointHash, int] = {}
+
+        # References: The endpoint slot that owns the reference & the row & index referenced.
+        # The class of the referenced endpoint is the opposite of the owner.
+        self._ref_owner: NDArray[int32] = zeros(_INITIAL_CAPACITY, dtype=int32)
+        self._ref_row: NDArray[uint8] = zeros(_INITIAL_CAPACITY, dtype=uint8)
+        self._ref_idx: NDArray[uint16] = zeros(_INITIAL_CAPACITY, dtype=uint16)
+        self._ref_live: NDArray[bool_] = zeros(_INITIAL_CAPACITY, dtype=bool_)
+        self._num_refs: int = 0
+        if eps is not None:
+            self.update(eps)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def __delitem__(self, key: EndPointHash) -> None:
+        slot: int = self._slots.pop(key)
+        self._live[slot] = False
+        self._del_refs(slot)
+
+    def __eq__(self, other: object) -> bool:
+        """Equal if the keys & end points are equal. Comparable with internal_graph & dicts."""
+        if isinstance(other, (array_internal_graph, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __getitem__(self, key: EndPointHash) -> x_end_point:
+        return self._eps([self._slots[key]])[0]
+
+    def __ior__(self, other: Any) -> array_internal_graph:
+        self.update(other)
+        return self
+
+    def __iter__(self) -> Iterator[EndPointHash]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __repr__(self) -> str:
+        """Return a mermaid chart flowchart representation of the internal graph."""
+        return repr(self.igraph())
+
+    def __setitem__(self, key: EndPointHash, ep: x_end_point) -> None:
+        slot: int | None = self._slots.get(key)
+        if slot is None:
+            if self._num == len(self._live):
+                self._compact_if_sparse()
+                if self._num == len(self._live):
+                    self._grow_eps(2 * self._num)
+            slot = self._num
+            self._num += 1
+            self._slots[key] = slot
+        else:
+            self._del_refs(slot)
+        self._row[slot] = _ROW_POS[ep.row]
+        self._cls[slot] = ep.cls
+        self._idx[slot] = ep.idx
+        self._typ[slot] = ep.typ
+        self._val[slot] = ep.val
+        self._live[slot] = True
+        for ref in ep.refs:
+            self._add_ref(slot, ref.row, ref.idx)
+
+    def _add_ref(self, owner: int, row: Row, idx: EndPointIndex) -> None:
+        """Add a reference to row & idx to the endpoint in slot owner."""
+        if self._num_refs == len(self._ref_live):
+            if 2 * int(self._ref_live.sum()) <= self._num_refs:
+                self._compact_refs()
+            else:
+                self._grow_refs(2 * self._num_refs)
+        self._ref_owner[self._num_refs] = owner
+        self._ref_row[self._num_refs] = _ROW_POS[row]
+        self._ref_idx[self._num_refs] = idx
+        self._ref_live[self._num_refs] = True
+        self._num_refs += 1
+
+    def _compact(self) -> None:
+        """Drop the dead endpoint & reference slots in place. Endpoint slot numbers change."""
+        self._compact_refs()
+        live: NDArray[intp] = flatnonzero(self._live[: self._num])
+        new_slot: NDArray[intp] = zeros(max(self._num, 1), dtype=intp)
+        new_slot[live] = range(len(live))
+        for member in ("_row", "_cls", "_idx", "_typ", "_val", "_live"):
+            arr: NDArray = getattr(self, member)
+            arr[: len(live)] = arr[live]
+        self._live[len(live) : self._num] = False
+        self._val[len(live) : self._num] = None
+        self._ref_owner[: self._num_refs] = new_slot[self._ref_owner[: self._num_refs]]
+        self._slots = {key: int(new_slot[slot]) for key, slot in self._slots.items()}
+        self._num = len(live)
+
+    def _compact_refs(self) -> None:
+        """Drop the dead reference slots in place. Endpoint slot numbers do not change."""
+        refs: NDArray[intp] = flatnonzero(self._ref_live[: self._num_refs])
+        for member in ("_ref_owner", "_ref_row", "_ref_idx", "_ref_live"):
+            arr: NDArray = getattr(self, member)
+            arr[: len(refs)] = arr[refs]
+        self._ref_live[len(refs) : self._num_refs] = False
+        self._num_refs = len(refs)
+
+    def _compact_if_sparse(self) -> None:
+        """Compact if at least half the endpoint slots are dead."""
+        if 2 * len(self._slots) <= self._num:
+            self._compact()
+
+    def _del_refs(self, owner: int) -> None:
+        """Delete the references of the endpoint in slot owner."""
+        self._ref_live[: self._num_refs] &= self._ref_owner[: self._num_refs] != owner
+
+    def _eps(self, slots: Iterable[int] | NDArray[intp]) -> list[x_end_point]:
+        """Return the end points in slots (in order)."""
+        _slots: list[int] = slots.tolist() if isinstance(slots, ndarray) else list(slots)
+        refs: dict[int, list[tuple[int, int]]] = self._refs(_slots)
+        retval: list[x_end_point] = []
+        for slot, row, cls, idx, typ in zip(
+            _slots,
+            self._row[_slots].tolist(),
+            self._cls[_slots].tolist(),
+            self._idx[_slots].tolist(),
+            self._typ[_slots].tolist(),
+        ):
+            ep_refs: list[tuple[int, int]] = refs.get(slot, [])
+            if cls:
+                retval.append(
+                    src_end_point(ROWS[row], idx, typ, refs=[dst_end_point_ref(ROWS[r], i) for r, i in ep_refs], val=self._val[slot])
+                )
+            else:
+                retval.append(
+                    dst_end_point(ROWS[row], idx, typ, refs=[src_end_point_ref(ROWS[r], i) for r, i in ep_refs], val=self._val[slot])
+                )
+        return retval
+
+    def _grow_eps(self, size: int) -> None:
+        """Grow the endpoint arrays to size slots."""
+        for member in ("_row", "_cls", "_idx", "_typ", "_val", "_live"):
+            setattr(self, member, _grown(getattr(self, member), size))
+
+    def _grow_refs(self, size: int) -> None:
+        """Grow the reference arrays to size slots."""
+        for member in ("_ref_owner", "_ref_row", "_ref_idx", "_ref_live"):
+            setattr(self, member, _grown(getattr(self, member), size))
+
+    def _mask(self, row: Row | None = None, cls: EndPointClass | None = None) -> NDArray[bool_]:
+        """Return the mask of live endpoint slots in row and/or of class cls."""
+        mask: NDArray[bool_] = self._live[: self._num].copy()
+        if row is not None:
+            mask &= self._row[: self._num] == _ROW_POS[row]
+        if cls is not None:
+            mask &= self._cls[: self._num] == cls
+        return mask
+
+    def _move(self, key: EndPointHash, idx: EndPointIndex) -> EndPointHash:
+        """Move the endpoint with key to a new slot at the end with index idx keeping its references.
+        Returns the new key. Equivalent to deleting and adding the end point with the new index to a dict.
+        """
+        slot: int = self._slots.pop(key)
+        new_key: EndPointHash = end_point_key(ROWS[self._row[slot]], idx, bool(self._cls[slot]))
+        if new_key in self._slots:
+            del self[new_key]
+        if self._num == len(self._live):
+            self._grow_eps(2 * self._num)
+        new_slot: int = self._num
+        self._num += 1
+        for member in ("_row", "_cls", "_typ", "_val"):
+            arr: NDArray = getattr(self, member)
+            arr[new_slot] = arr[slot]
+        self._idx[new_slot] = idx
+        self._live[new_slot] = True
+        self._live[slot] = False
+        refs: NDArray[bool_] = self._ref_live[: self._num_refs] & (self._ref_owner[: self._num_refs] == slot)
+        self._ref_owner[: self._num_refs][refs] = new_slot
+        self._slots[new_key] = new_slot
+        return new_key
+
+    def _num_refs_per_slot(self) -> NDArray[intp]:
+        """Return the number of references of each endpoint slot."""
+        return bincount(self._ref_owner[: self._num_refs][self._ref_live[: self._num_refs]], minlength=self._num)
+
+    def _ref_slots(self, owner: int) -> NDArray[intp]:
+        """Return the reference slots of the endpoint in slot owner in order."""
+        return flatnonzero(self._ref_live[: self._num_refs] & (self._ref_owner[: self._num_refs] == owner))
+
+    def _refs(self, slots: list[int]) -> dict[int, list[tuple[int, int]]]:
+        """Return the (row position, index) of the references of each endpoint slot in slots that has references."""
+        retval: dict[int, list[tuple[int, int]]] = {}
+        if not self._num_refs:
+            return retval
+        wanted: NDArray[bool_] = zeros(self._num, dtype=bool_)
+        wanted[slots] = True
+        live: NDArray[intp] = flatnonzero(self._ref_live[: self._num_refs])
+        live = live[wanted[self._ref_owner[live]]]
+        for owner, row, idx in zip(self._ref_owner[live].tolist(), self._ref_row[live].tolist(), self._ref_idx[live].tolist()):
+            retval.setdefault(owner, []).append((row, idx))
+        return retval
+
+    def _rows_slots(self, rows: Iterable[Row], cls: EndPointClass | None = None) -> list[int]:
+        """Return the live slots of the endpoints in rows of class cls (any if None) row by row."""
+        return [slot for row in dict.fromkeys(rows) for slot in flatnonzero(self._mask(row, cls)).tolist()]
+
+    def _slot_key(self, slot: int) -> EndPointHash:
+        """Return the key of the endpoint in slot."""
+        return end_point_key(ROWS[self._row[slot]], int(self._idx[slot]), bool(self._cls[slot]))
+
+    def add(self, ep: x_end_point) -> None:
+        """Add an end point to the internal graph."""
+        self[ep.key()] = ep
+
+    def append_connect(self, src_row: SourceRow, dst_row: DestinationRow) -> DstEndPointDict:
+        """Create endpoints as they would append to a destination row with the exact endpoints needed by src_row."""
+        idx = count(self.next_idx(dst_row, DST_EP))
+        return {n.key(): n for n in (dst_end_point(dst_row, next(idx), ep.typ) for ep in self.src_row_filter(src_row))}
+
+    def as_row(self, row: Literal["A", "B"]) -> EndPointDict:
+        """Create a row with the input & output interface of self."""
+        io_if: Generator[x_end_point, None, None] = self.rows_filter(("I", "O"))
+        return {n.key(): n for n in ((dst_end_point, src_end_point)[not ep.cls](row, ep.idx, ep.typ) for ep in io_if)}
+
+    def clear(self) -> None:
+        """Remove all the end points."""
+        self._live[:] = False
+        self._ref_live[:] = False
+        self._num = 0
+        self._num_refs = 0
+        self._slots.clear()
+
+    def clone(self) -> array_internal_graph:
+        """Return a copy of the graph. Equivalent to copy()."""
+        return self.copy()
+
+    def cls_filter(self, cls: EndPointClass) -> Generator[x_end_point, None, None]:
+        """Return all the end points in with cls cls."""
+        return (ep for ep in self._eps(flatnonzero(self._mask(cls=cls))))
+
+    def complete_dst_references(self, row: DestinationRow) -> None:
+        """An incomplete reference is when only one end of the connection references the other."""
+        for dst_slot in flatnonzero(self._mask(row, DST_EP)).tolist():
+            ref_slots: NDArray[intp] = self._ref_slots(dst_slot)
+            if len(ref_slots):
+                src_key: SrcEndPointHash = end_point_key(ROWS[self._ref_row[ref_slots[0]]], int(self._ref_idx[ref_slots[0]]), SRC_EP)
+                self._add_ref(self._slots[src_key], row, int(self._idx[dst_slot]))
+
+    def complete_src_references(self, row: SourceRow) -> None:
+        """An incomplete reference is when only one end of the connection references the other."""
+        for src_slot in flatnonzero(self._mask(row, SRC_EP)).tolist():
+            for ref_slot in self._ref_slots(src_slot).tolist():
+                dst_key: DstEndPointHash = end_point_key(ROWS[self._ref_row[ref_slot]], int(self._ref_idx[ref_slot]), DST_EP)
+                self._add_ref(self._slots[dst_key], row, int(self._idx[src_slot]))
+
+    def copy(self) -> array_internal_graph:
+        """Return a copy of the graph without any dead slots."""
+        retval: array_internal_graph = array_internal_graph()
+        live: NDArray[intp] = flatnonzero(self._live[: self._num])
+        new_slot: NDArray[intp] = zeros(max(self._num, 1), dtype=intp)
+        new_slot[live] = range(len(live))
+        for member in ("_row", "_cls", "_idx", "_typ", "_val", "_live"):
+            setattr(retval, member, _grown(getattr(self, member)[live], max(len(live), _INITIAL_CAPACITY)))
+        retval._num = len(live)
+        retval._slots = {key: int(new_slot[slot]) for key, slot in self._slots.items()}
+        refs: NDArray[intp] = flatnonzero(self._ref_live[: self._num_refs])
+        for member in ("_ref_row", "_ref_idx", "_ref_live"):
+            setattr(retval, member, _grown(getattr(self, member)[refs], max(len(refs), _INITIAL_CAPACITY)))
+        retval._ref_owner = _grown(new_slot[self._ref_owner[refs]].astype(int32), max(len(refs), _INITIAL_CAPACITY))
+        retval._num_refs = len(refs)
+        return retval
+
+    def copy_row(self, row: Row, clean: bool = False) -> EndPointDict:
+        """Return a copy of the specified row endpoints. Remove references if clean is True."""
+        return {ep.key(): ep.copy(clean) for ep in self.row_filter(row)}
+
+    def copy_rows(self, rows: Iterable[Row], clean: bool = False) -> EndPointDict:
+        """Return a copy of the specified rows endpoints. Remove references if clean is True."""
+        return {ep.key(): ep.copy(clean) for ep in self.rows_filter(rows)}
+
+    def copy_rows_dst_eps(self, rows: Iterable[Row], clean: bool = False) -> DstEndPointDict:
+        """Return a copy of the specified rows destination endpoints. Remove references if clean is True."""
+        return {ep.key(): ep.copy(clean) for ep in self.dst_rows_filter(rows)}  # type: ignore [arg-type]
+
+    def copy_rows_src_eps(self, rows: Iterable[Row], clean: bool = False) -> SrcEndPointDict:
+        """Return a copy of the specified rows source endpoints. Remove references if clean is True."""
+        return {ep.key(): ep.copy(clean) for ep in self.src_rows_filter(rows)}  # type: ignore [arg-type]
+
+    def direct_connect(self, src_row: SourceRow, dst_row: DestinationRow) -> DstEndPointDict:
+        """Create a destination row with the exact endpoints needed by src_row."""
+        return {n.key(): n for n in (dst_end_point(dst_row, ep.idx, ep.typ, refs=[ep.as_ref()]) for ep in self.src_row_filter(src_row))}
+
+    def dst_filter(self) -> Generator[dst_end_point, None, None]:
+        """Return all the destination end points."""
+        return (cast(dst_end_point, ep) for ep in self._eps(flatnonzero(self._mask(cls=DST_EP))))
+
+    def dst_ref_filter(self) -> Generator[dst_end_point, None, None]:
+        """Return all the destination end points that are referenced."""
+        mask: NDArray[bool_] = self._mask(cls=DST_EP) & (self._row[: self._num] != _U_POS) & (self._num_refs_per_slot() > 0)
+        return (cast(dst_end_point, ep) for ep in self._eps(flatnonzero(mask)))
+
+    def dst_row_filter(self, row: Row) -> Generator[dst_end_point, None, None]:
+        """Return all the destination end points in a row."""
+        return (cast(dst_end_point, ep) for ep in self._eps(flatnonzero(self._mask(row, DST_EP))))
+
+    def dst_rows_filter(self, rows: Iterable[DestinationRow]) -> Generator[dst_end_point, None, None]:
+        """Return all the destination end points in the specified rows."""
+        return (cast(dst_end_point, ep) for ep in self._eps(self._rows_slots(rows, DST_EP)))
+
+    def dst_unref_filter(self) -> Generator[dst_end_point, None, None]:
+        """Return all the destination end points that are unreferenced."""
+        mask: NDArray[bool_] = self._mask(cls=DST_EP) & (self._row[: self._num] != _U_POS) & (self._num_refs_per_slot() == 0)
+        return (cast(dst_end_point, ep) for ep in self._eps(flatnonzero(mask)))
+
+    def extend_src(self, src_row: SourceRow, iig: internal_graph | array_internal_graph) -> None:
+        """Extend the source endpoints in src_row by igc row O"""
+        idx = count(self.next_idx(src_row, SRC_EP))
+        for ep in iig.dst_row_filter("O"):
+            self.add(src_end_point(src_row, next(idx), ep.typ))
+
+    def extend_type_interface(self, row: Row) -> None:
+        """Extend the internal graph with the types of row."""
+        for ep_type in self.row_types(row, DST_EP) - self.row_types("I", SRC_EP):
+            self.add(src_end_point("I", self.next_idx("I", SRC_EP), ep_type))
+        for ep_type in self.row_types(row, SRC_EP) - self.row_types("O", DST_EP):
+            self.add(dst_end_point("O", self.next_idx("O", DST_EP), ep_type))
+
+    def get(self, key: EndPointHash, default: Any = None) -> Any:
+        """Return the end point with key or default if it is not in the graph."""
+        return self[key] if key in self._slots else default
+
+    def has_row(self, row: Row) -> bool:
+        """Return True if the internal graph has the row."""
+        return bool(self._mask(row).any())
+
+    def igraph(self) -> internal_graph:
+        """Return the graph as an internal_graph."""
+        return internal_graph(self.items())
+
+    def items(self) -> Iterator[tuple[EndPointHash, x_end_point]]:
+        """Return the (key, end point) pairs in insertion order."""
+        return zip(self._slots.keys(), self._eps(self._slots.values()))
+
+    def json_graph(self) -> JSONGraph:
+        """Convert internal graph to JSON graph."""
+        return self.igraph().json_graph()
+
+    def json_obj(self) -> dict[str, list[str | int | bool | list[list[str | int]] | None]]:
+        """Return a json serializable object."""
+        return self.igraph().json_obj()
+
+    def keys(self) -> Iterable[EndPointHash]:
+        """Return the end point keys in insertion order."""
+        return self._slots.keys()
+
+    def mermaid_class_str(self, uid: int = 0) -> list[str]:
+        """Return the mermaid class style lists."""
+        return self.igraph().mermaid_class_str(uid)
+
+    def mermaid_embedded_str(self, uid: int = 0) -> tuple[list[str], list[str]]:
+        """Return the mermaid chart representation of the internal graph."""
+        return self.igraph().mermaid_embedded_str(uid)
+
+    def mermaid_link_str(self, uid: int = 0) -> list[str]:
+        """Return the mermaid chart link representation of the internal graph."""
+        return self.igraph().mermaid_link_str(uid)
+
+    def mermaid_style_str(self, link_list_str: list[str]) -> list[str]:
+        """Return the mermaid link style lists."""
+        return self.igraph().mermaid_style_str(link_list_str)
+
+    def mermaid_subgraph_str(self, uid: int = 0) -> list[str]:
+        """Return the mermaid chart subgraph representation of the internal graph."""
+        return self.igraph().mermaid_subgraph_str(uid)
+
+    def move_row(self, f_row: Row, t_row: Row, clean: bool = False, has_f: bool = False) -> EndPointDict:
+        """Return a copy of the specified f_row endpoints mapped to t_row. Remove references if clean is True."""
+        return {n.key(): n for n in (ep.move_copy(t_row, clean, has_f) for ep in self.row_filter(f_row))}
+
+    def next_idx(self, row: Row, cls: EndPointClass) -> int:
+        """Return the next endpoint index for the class in the row."""
+        return int(self._mask(row, cls).sum())
+
+    def num_eps(self, row: Row, cls: EndPointClass) -> int:
+        """Count the endpoint of class cls in a specific row."""
+        return int(self._mask(row, cls).sum())
+
+    def pass_thru(self, dst_row_a: DestinationRow, dst_row_b: DestinationRow, mapping: list[EndPointIndex]) -> SrcEndPointDict:
+        """Pass through the endpoints from dst_row_a in RGC to dst_row_b in FGC using mapping."""
+        i_eps: Generator[src_end_point, None, None] = (
+            src_end_point("I", ep.idx, ep.typ, refs=[dst_end_point_ref(dst_row_b, mapping.pop(0))])
+            for ep in self.dst_row_filter(dst_row_a)
+            if ep.refs
+        )
+        return {ep.key(): ep for ep in i_eps}
+
+    def pop(self, key: EndPointHash, *default: Any) -> Any:
+        """Remove the end point with key & return it (or default if given & key is not present)."""
+        if key not in self and default:
+            return default[0]
+        ep: x_end_point = self[key]
+        del self[key]
+        return ep
+
+    def popitem(self) -> tuple[EndPointHash, x_end_point]:
+        """Remove & return the last (key, end point) pair added."""
+        key: EndPointHash = next(reversed(self._slots))
+        return key, self.pop(key)
+
+    def redirect_refs(self, row: Row, cls: EndPointClass, old_ref_row: Row, new_ref_row: Row) -> None:
+        """Redirects cls end point references on row from old_ref_row to new_ref_row.
+        Does not modifiy old_ref or new_ref endpoints. These endpoints must be change separately to maintain consistency.
+        """
+        owners: NDArray[bool_] = self._mask(row, cls)
+        refs: NDArray[bool_] = self._ref_live[: self._num_refs] & owners[self._ref_owner[: self._num_refs]]
+        refs &= self._ref_row[: self._num_refs] == _ROW_POS[old_ref_row]
+        self._ref_row[: self._num_refs][refs] = _ROW_POS[new_ref_row]
+
+    def reindex(self, clean: bool = True) -> None:
+        """Reindex all endpoints deleting all references by default."""
+        if clean:
+            self.remove_all_refs()
+        counts: dict[tuple[int, bool], int] = {}
+        for key in sorted(self._slots):
+            slot: int = self._slots[key]
+            group: tuple[int, bool] = (int(self._row[slot]), bool(self._cls[slot]))
+            idx: int = counts.setdefault(group, 0)
+            counts[group] += 1
+            self._move(key, idx)
+        self._compact_if_sparse()
+
+    def reindex_dst_row(self, row: DestinationRow, clean: bool = False) -> list[EndPointIndex]:
+        """Reindex the destination endpoints & correct any uncleaned references retuning the old indices."""
+        slots: NDArray[intp] = flatnonzero(self._mask(row, DST_EP))
+        slots = slots[self._idx[slots].argsort(kind="stable")]
+        retval: list[EndPointIndex] = self._idx[slots].tolist()
+        for new_idx, (slot, old_idx) in enumerate(zip(slots.tolist(), retval)):
+            ref_slots: NDArray[intp] = self._ref_slots(slot)
+            if len(ref_slots):
+                if clean:
+                    self._del_refs(slot)
+                else:
+                    src_key: SrcEndPointHash = end_point_key(ROWS[self._ref_row[ref_slots[0]]], int(self._ref_idx[ref_slots[0]]), SRC_EP)
+                    # Source endpoints can have multiple references
+                    src_refs: NDArray[intp] = self._ref_slots(self._slots[src_key])
+                    match: NDArray[intp] = src_refs[(self._ref_row[src_refs] == _ROW_POS[row]) & (self._ref_idx[src_refs] == old_idx)]
+                    if not len(match):
+                        raise ValueError(f"{dst_end_point_ref(row, old_idx)} is not in list")
+                    self._ref_idx[match[0]] = new_idx
+            self._move(self._slot_key(slot), new_idx)
+        self._compact_if_sparse()
+        return retval
+
+    def reindex_src_row(self, row: SourceRow, clean: bool = False) -> list[EndPointIndex]:
+        """Reindex the source endpoints & correct any uncleaned references retuning the old indices."""
+        slots: NDArray[intp] = flatnonzero(self._mask(row, SRC_EP))
+        slots = slots[self._idx[slots].argsort(kind="stable")]
+        retval: list[EndPointIndex] = self._idx[slots].tolist()
+        for new_idx, slot in enumerate(slots.tolist()):
+            ref_slots: NDArray[intp] = self._ref_slots(slot)
+            if len(ref_slots):
+                if clean:
+                    self._del_refs(slot)
+                else:
+                    for ref_slot in ref_slots.tolist():
+                        dst_key: DstEndPointHash = end_point_key(ROWS[self._ref_row[ref_slot]], int(self._ref_idx[ref_slot]), DST_EP)
+                        # Destination endpoints can only have 1 reference
+                        self._ref_idx[self._ref_slots(self._slots[dst_key])[0]] = new_idx
+            self._move(self._slot_key(slot), new_idx)
+        self._compact_if_sparse()
+        return retval
+
+    def remove_all_refs(self) -> None:
+        """Remove all references from all endpoints."""
+        self._ref_live[:] = False
+        self._num_refs = 0
+
+    def remove_row(self, row: Row) -> None:
+        """Remove all endpoints in row."""
+        for slot in flatnonzero(self._mask(row)).tolist():
+            del self[self._slot_key(slot)]
+
+    def row_cls_filter(self, row: Row, cls: EndPointClass) -> Generator[x_end_point, None, None]:
+        """Return all the end points in row."""
+        return (ep for ep in self._eps(flatnonzero(self._mask(row, cls))))
+
+    def row_filter(self, row: Row) -> Generator[x_end_point, None, None]:
+        """Return all the end points in row."""
+        return (ep for ep in self._eps(flatnonzero(self._mask(row))))
+
+    def row_types(self, row: Row, cls: EndPointClass) -> set[int]:
+        """Return the set of types in row."""
+        return set(self._typ[: self._num][self._mask(row, cls)].tolist())
+
+    def rows_filter(self, rows: Iterable[Row]) -> Generator[x_end_point, None, None]:
+        """Return all the end points in row."""
+        return (ep for ep in self._eps(self._rows_slots(rows)))
+
+    def setdefault(self, key: EndPointHash, default: x_end_point) -> x_end_point:
+        """Return the end point with key adding default if it is not present."""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def src_filter(self) -> Generator[src_end_point, None, None]:
+        """Return all the source end points."""
+        return (cast(src_end_point, ep) for ep in self._eps(flatnonzero(self._mask(cls=SRC_EP))))
+
+    def src_ref_filter(self) -> Generator[src_end_point, None, None]:
+        """Return all the source end points that are referenced."""
+        mask: NDArray[bool_] = self._mask(cls=SRC_EP) & (self._num_refs_per_slot() > 0)
+        return (cast(src_end_point, ep) for ep in self._eps(flatnonzero(mask)))
+
+    def src_row_filter(self, row: Row) -> Generator[src_end_point, None, None]:
+        """Return all the source end points in a row."""
+        return (cast(src_end_point, ep) for ep in self._eps(flatnonzero(self._mask(row, SRC_EP))))
+
+    def src_rows_filter(self, rows: Iterable[SourceRow]) -> Generator[src_end_point, None, None]:
+        """Return all the source end points in the specified rows."""
+        return (cast(src_end_point, ep) for ep in self._eps(self._rows_slots(rows, SRC_EP)))
+
+    def src_unref_filter(self) -> Generator[src_end_point, None, None]:
+        """Return all the source end points that are unreferenced."""
+        mask: NDArray[bool_] = self._mask(cls=SRC_EP) & (self._num_refs_per_slot() == 0)
+        return (cast(src_end_point, ep) for ep in self._eps(flatnonzero(mask)))
+
+    def strip_unconnected_dst_eps(self, dst_row: DestinationRow) -> list[EndPointIndex]:
+        """Remove all unconnected destination endpoints in dst_row & reindex returning the old indices."""
+        for slot in flatnonzero(self._mask(dst_row, DST_EP) & (self._num_refs_per_slot() == 0)).tolist():
+            del self[self._slot_key(slot)]
+        return self.reindex_dst_row(dst_row)
+
+    def update(self, *args, **kwargs) -> None:
+        """Add or replace end points."""
+        for key, ep in dict(*args, **kwargs).items():
+            self[key] = ep
+
+    def validate(self) -> bool:
+        """Validate the internal graph. This function is not built for speed."""
+        return self.igraph().validate()
+
+    def values(self) -> list[x_end_point]:
+        """Return the end points in insertion order."""
+        return self._eps(self._slots.values())
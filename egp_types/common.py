@@ -1,20 +1,26 @@
 """Common functions for EGP types."""
-from random import choice, randint, uniform
+from random import Random, choice
 from string import ascii_letters
+from typing import cast
 
 from .egp_typing import EndPointType
 
 from .ep_type import asint, ep_type_lookup, inst
 
 
-def random_constant_str(typ: EndPointType) -> str:
+# The random module functions are methods of a hidden global Random instance. Random generation functions
+# default to it so they are seeded by random.seed() but can be given an independent Random instance.
+GLOBAL_RANDOM: Random = cast(Random, choice.__self__)  # type: ignore [reportFunctionMemberAccess]
+
+
+def random_constant_str(typ: EndPointType, rng: Random = GLOBAL_RANDOM) -> str:
     """Return a random constant string."""
     if typ == asint("bool"):
-        return choice(("True", "False"))
+        return rng.choice(("True", "False"))
     if typ == asint("int"):
-        return str(randint(-100, 100))
+        return str(rng.randint(-100, 100))
     if typ == asint("float"):
-        return str(uniform(-100, 100))
+        return str(rng.uniform(-100, 100))
     if typ == asint("str"):
-        return '"' + "".join(choice(ascii_letters) for _ in range(randint(1, 10))) + '"'
+        return '"' + "".join(rng.choice(ascii_letters) for _ in range(rng.randint(1, 10))) + '"'
     return ep_type_lookup["instanciation"][typ][inst.DEFAULT.value]
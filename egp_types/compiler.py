@@ -0,0 +1,236 @@
+"""The compiler module.
+
+# Genetic Code Compiler
+
+A genetic code is a DAG of genetic codes terminating in codons. Interpreting the graph of every sub-GC
+each time a genetic code is executed is slow. The gc_compiler walks the DAG depth first (so every
+sub-GC is defined before the destinations it feeds) and generates flat Python source for a single
+function. Constants in row C are inlined and row F becomes an if/else choosing between the A (O)
+and B (P) paths. The source is compiled & the function is cached by genetic code signature in an
+LRU bounded cache.
+
+## Codon Library
+
+Codons are not defined by a graph. The inline Python expression for each codon is looked up by codon
+signature in the codon library. Inputs to the codon are referenced in the expression by str.format()
+style placeholders {i0}, {i1}, ... e.g. "{i0} + {i1}". An expression for a codon with more than one
+output must evaluate to a sequence of that length. Literal braces must be doubled.
+
+## Compiled Functions
+
+A compiled genetic code is a function taking a tuple of the row I values and returning a tuple of
+the row O values.
+
+## Batched Execution
+
+Fitness evaluation executes the same genetic code over many input samples. A batch compiled genetic
+code takes a tuple of row I columns (numpy arrays of N samples) and the number of samples N and
+returns a tuple of row O columns. Codons whose signatures are in the compiler's vectorized set have
+expressions that work element-wise on whole columns (e.g. "{i0} + {i1}") and are evaluated once per
+batch. All other codons fall back to being evaluated per sample. Row F selects between the
+O & P columns with numpy.where() so both the A and B paths are evaluated for every sample.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from itertools import count
+from logging import DEBUG, Logger, NullHandler, getLogger
+from typing import Any, Callable, Iterator, Sequence
+
+from numpy import array, broadcast_to, empty, where
+from numpy.typing import ArrayLike, NDArray
+
+from .connections import ConnIdx
+from .egp_typing import DstRowIndex, SrcRowIndex
+from .graph import graph
+from ._genetic_code import _genetic_code, EMPTY_GENETIC_CODE, PURGED_GENETIC_CODE
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Codon signature: inline Python expression
+CodonLibrary = dict[bytes, str]
+# A compiled genetic code (or batch compiled genetic code with the number of samples)
+CompiledGC = Callable[..., tuple]
+
+
+# Default maximum number of compiled genetic codes to cache
+COMPILER_CACHE_SIZE: int = 1024
+# Indentation of the generated source
+_INDENT: str = "    "
+
+
+def dst_sources(grph: graph, dri: DstRowIndex, srcs: dict[SrcRowIndex, list[str]]) -> list[str]:
+    """Return the source expressions of the destination row dri in endpoint index order."""
+    cons = grph.connections.get_dst_connections(dri)
+    cons = cons[:, cons[ConnIdx.DST_IDX].argsort(kind="stable")]
+    return [srcs[SrcRowIndex(sri)][sei] for sri, sei in zip(cons[ConnIdx.SRC_ROW].tolist(), cons[ConnIdx.SRC_IDX].tolist())]
+
+
+def column(value: Any, num: int) -> NDArray:
+    """Return value as a column of num samples. Scalars (e.g. constants) are broadcast."""
+    return broadcast_to(value, (num,))
+
+
+def per_sample(func: Callable[..., Any], num_outputs: int, num: int, *args: Any) -> Any:
+    """Execute func for each of the num samples of the args columns.
+    Returns a column for a single output else a tuple of num_outputs columns.
+    """
+    results: list[Any] = [func(*sample) for sample in zip(*(column(arg, num) for arg in args))]
+    if num_outputs == 1:
+        return array(results)
+    if not results:
+        return tuple(empty(num) for _ in range(num_outputs))
+    return tuple(array(col) for col in zip(*results))
+
+
+# Globals of batch compiled genetic codes
+_BATCH_NAMESPACE: dict[str, Any] = {"_column": column, "_per_sample": per_sample, "_where": where}
+
+
+class gc_compiler:
+    """Compile genetic codes to Python functions. Compiled functions are cached by signature."""
+
+    def __init__(
+        self,
+        library: CodonLibrary,
+        size: int = COMPILER_CACHE_SIZE,
+        namespace: dict[str, Any] | None = None,
+        vectorized: set[bytes] | None = None,
+    ) -> None:
+        """Create a compiler with a codon library, a cache of up to size functions and
+        a namespace of globals the codon expressions may use (e.g. imported modules).
+        vectorized is the set of codon signatures that can be executed on whole columns.
+        """
+        assert size > 0, "The compiler cache must have at least one entry."
+        self.library: CodonLibrary = library
+        self.size: int = size
+        self.namespace: dict[str, Any] = {} if namespace is None else namespace
+        self.vectorized: set[bytes] = set() if vectorized is None else vectorized
+        # Key: (signature, batch)
+        self._cache: OrderedDict[tuple[bytes, bool], CompiledGC] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __call__(self, gc: _genetic_code, inputs: tuple) -> tuple:
+        """Execute the genetic code with the row I inputs."""
+        return self.function(gc)(inputs)
+
+    def __len__(self) -> int:
+        """Return the number of compiled functions cached."""
+        return len(self._cache)
+
+    def _inline(
+        self, gc: _genetic_code, inputs: list[str], lines: list[str], indent: str, names: Iterator[int], batch: bool = False
+    ) -> list[str]:
+        """Append the source lines of gc to lines & return the expressions of its outputs.
+        inputs are the expressions of the row I values (columns if batch is True).
+        """
+        signature: bytes = bytes(gc["signature"])
+        grph: graph = gc["graph"]
+        if signature in self.library:
+            outputs: list[str] = [f"t{next(names)}" for _ in grph.rows[DstRowIndex.O]]
+            if not batch or signature in self.vectorized:
+                expression: str = self.library[signature].format(**{f"i{idx}": expr for idx, expr in enumerate(inputs)})
+            else:
+                params: list[str] = [f"i{idx}" for idx in range(len(inputs))]
+                func: str = f"lambda {', '.join(params)}: " + self.library[signature].format(**{param: param for param in params})
+                expression = f"_per_sample({func}, {len(outputs)}, n, {', '.join(inputs)})"
+            lines.append(indent + (", ".join(outputs) + " = " if outputs else "") + expression)
+            return outputs
+
+        gca: _genetic_code = gc["gca"]
+        gcb: _genetic_code = gc["gcb"]
+        if gca is PURGED_GENETIC_CODE or gcb is PURGED_GENETIC_CODE:
+            raise ValueError(f"Genetic code {signature.hex()} has purged dependencies and cannot be compiled.")
+        if gca is EMPTY_GENETIC_CODE and grph.rows.valid(DstRowIndex.A):
+            raise ValueError(f"Codon {signature.hex()} is not in the codon library.")
+        srcs: dict[SrcRowIndex, list[str]] = {
+            SrcRowIndex.I: inputs,
+            SrcRowIndex.C: [f"({value})" for value in grph.rows[SrcRowIndex.C].values],
+        }
+
+        if not grph.rows.valid(DstRowIndex.F):
+            if gca is not EMPTY_GENETIC_CODE:
+                srcs[SrcRowIndex.A] = self._inline(gca, dst_sources(grph, DstRowIndex.A, srcs), lines, indent, names, batch)
+            if gcb is not EMPTY_GENETIC_CODE:
+                srcs[SrcRowIndex.B] = self._inline(gcb, dst_sources(grph, DstRowIndex.B, srcs), lines, indent, names, batch)
+            return dst_sources(grph, DstRowIndex.O, srcs)
+
+        # Row F chooses the path: GCA to row O if True else GCB to row P.
+        results: list[str] = [f"t{next(names)}" for _ in grph.rows[DstRowIndex.O]]
+        if batch:
+            # Both paths are evaluated for all samples & the results selected.
+            srcs[SrcRowIndex.A] = self._inline(gca, dst_sources(grph, DstRowIndex.A, srcs), lines, indent, names, batch)
+            srcs[SrcRowIndex.B] = self._inline(gcb, dst_sources(grph, DstRowIndex.B, srcs), lines, indent, names, batch)
+            cond: str = dst_sources(grph, DstRowIndex.F, srcs)[0]
+            zipped = zip(results, dst_sources(grph, DstRowIndex.O, srcs), dst_sources(grph, DstRowIndex.P, srcs))
+            lines.extend(f"{indent}{result} = _where({cond}, {o_expr}, {p_expr})" for result, o_expr, p_expr in zipped)
+            return results
+        lines.append(f"{indent}if {dst_sources(grph, DstRowIndex.F, srcs)[0]}:")
+        for gcx, sri, dri, out in ((gca, SrcRowIndex.A, DstRowIndex.A, DstRowIndex.O), (gcb, SrcRowIndex.B, DstRowIndex.B, DstRowIndex.P)):
+            if out == DstRowIndex.P:
+                lines.append(f"{indent}else:")
+            body: list[str] = []
+            srcs[sri] = self._inline(gcx, dst_sources(grph, dri, srcs), body, indent + _INDENT, names)
+            body.extend(f"{indent}{_INDENT}{result} = {expr}" for result, expr in zip(results, dst_sources(grph, out, srcs)))
+            lines.extend(body if body else [f"{indent}{_INDENT}pass"])
+        return results
+
+    def clear(self) -> None:
+        """Empty the cache of compiled functions."""
+        self._cache.clear()
+
+    def batch(self, gc: _genetic_code, columns: Sequence[ArrayLike]) -> tuple[NDArray, ...]:
+        """Execute the genetic code for every sample in the row I columns. Returns the row O columns."""
+        num: int = len(columns[0]) if columns else 0
+        return self.function(gc, batch=True)(tuple(columns), num)
+
+    def function(self, gc: _genetic_code, batch: bool = False) -> CompiledGC:
+        """Return the (batch) compiled function of the genetic code. Compiled if it is not cached."""
+        signature: bytes = bytes(gc["signature"])
+        key: tuple[bytes, bool] = (signature, batch)
+        func: CompiledGC | None = self._cache.get(key)
+        if func is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return func
+        self.misses += 1
+        namespace: dict[str, Any] = self.namespace | _BATCH_NAMESPACE if batch else self.namespace.copy()
+        exec(compile(self.source(gc, batch), f"<genetic code {signature.hex()}>", "exec"), namespace)  # pylint: disable=exec-used
+        func = namespace["execute"]
+        self._cache[key] = func
+        if len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+        return func
+
+    def source(self, gc: _genetic_code, batch: bool = False) -> str:
+        """Return the Python source of the function that executes the genetic code.
+        If batch is True the function executes the genetic code on columns of n samples.
+        """
+        names: Iterator[int] = count()
+        lines: list[str] = []
+        inputs: list[str] = [f"i[{idx}]" for idx in range(len(gc["graph"].rows[SrcRowIndex.I]))]
+        outputs: list[str] = self._inline(gc, inputs, lines, _INDENT, names, batch)
+        if batch:
+            # Outputs connected directly to constants are broadcast to columns.
+            outputs = [f"_column({output}, n)" for output in outputs]
+        source: list[str] = [
+            "def execute(i: tuple, n: int) -> tuple:" if batch else "def execute(i: tuple) -> tuple:",
+            f'{_INDENT}"""Genetic code {bytes(gc["signature"]).hex()}."""',
+        ]
+        source.extend(lines)
+        source.append(f"{_INDENT}return ({''.join(output + ', ' for output in outputs)})")
+        retval: str = "\n".join(source) + "\n"
+        if _LOG_DEBUG:
+            _logger.debug(f"Compiled genetic code source:\n{retval}")
+        return retval
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache statistics."""
+        return {"size": len(self._cache), "max_size": self.size, "hits": self.hits, "misses": self.misses}
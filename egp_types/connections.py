@@ -8,23 +8,47 @@ The first row is the source row designation index, the second row is the destina
 the third row is the source row endpoint index and the fourth row is the destination row endpoint index.
 
 This format is efficient in memory usage at the cost of some runtime.
+
+Connections are always sorted by destination row index. The connections of a destination row are found
+from a small table of row offsets and returned as a slice (a view) rather than a masked copy. Connections
+of a source row are found the same way through a stable source row ordering permutation. The offsets
+and the permutation are cached if the connections are frozen.
 """
 
 from __future__ import annotations
 
 from enum import IntEnum
 from logging import DEBUG, Logger, NullHandler, getLogger
-from random import choice
-from typing import TYPE_CHECKING, cast, Any
-
-from numpy import array, array_equal, ndarray, uint8, unique, where
+from random import Random
+from typing import TYPE_CHECKING
+
+from numpy import (
+    arange,
+    argsort,
+    array,
+    array_equal,
+    bincount,
+    bool_,
+    concatenate,
+    cumsum,
+    flatnonzero,
+    full,
+    intp,
+    isin,
+    maximum,
+    ndarray,
+    repeat,
+    searchsorted,
+    uint8,
+    unique,
+    where,
+    zeros,
+)
+from numpy.random import Generator, default_rng
 from numpy.typing import NDArray
 
 from .egp_typing import (
-    CPI,
     DESTINATION_ROW_INDEXES,
-    DESTINATION_ROW_LETTERS,
-    DESTINATION_ROWS,
     ROWS_INDEXED,
     SOURCE_ROW_INDEXES,
     VALID_DESTINATIONS,
@@ -33,9 +57,12 @@ from .egp_typing import (
     EndPointClassStr,
     JSONGraph,
     Row,
-    SourceRow,
     SrcRowIndex,
 )
+from .common import GLOBAL_RANDOM
+from .graph_parser import parse_json_graph
+from .immutable import immutable_ndarray
+from .interface import EMPTY_INTERFACE
 
 
 if TYPE_CHECKING:
@@ -48,6 +75,17 @@ _logger.addHandler(NullHandler())
 _LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
 
 
+# A connection plan is a list of (destination endpoint, source) pairs. The destination endpoint is a row letter
+# & index e.g. "O2". The source is a row letter e.g. "A" for any endpoint of the right type in row A or a row
+# letter & index e.g. "I0" for a specific source endpoint.
+ConnectionPlan = list[tuple[str, str]]
+
+
+# Valid row index lookup tables for the vectorized assertions
+_VALID_SRC_ROW: NDArray[bool_] = isin(arange(256), list(SOURCE_ROW_INDEXES.values()))
+_VALID_DST_ROW: NDArray[bool_] = isin(arange(256), list(DESTINATION_ROW_INDEXES.values()))
+
+
 class ConnIdx(IntEnum):
     """Indices for connection definitions."""
 
@@ -57,8 +95,10 @@ class ConnIdx(IntEnum):
     DST_IDX = 3
 
 
-class connections(ndarray):
-    """Connections between source and destination rows in a graph."""
+class connections(immutable_ndarray):
+    """Connections between source and destination rows in a graph.
+    Frozen connections cannot be modified and cache their hash & digest.
+    """
 
     # NOTE: There is a 112 byte overhead for a numpy array. For 8 bit integers this is about the
     # same as a list with 1 ints (80 + 28 = 108). Therefore it is efficient in almost all scenarios.
@@ -72,22 +112,15 @@ class connections(ndarray):
 
     def __init__(self, json_graph: JSONGraph, **kwargs) -> None:
         super().__init__()
-        if kwargs.get("rndm", False):
-            # Randomly generated connections
+        if kwargs.get("rndm", False) or "plan" in kwargs:
+            # Randomly generated or planned connections
             # It is not possible to know how many connections will be needed without generating them.
             # kwargs['data']['cons'] is defined in __new__()
             self[ConnIdx.SRC_ROW] = kwargs["data"]["cons"][ConnIdx.SRC_ROW]
             self[ConnIdx.DST_ROW] = kwargs["data"]["cons"][ConnIdx.DST_ROW]
             self[ConnIdx.SRC_IDX] = kwargs["data"]["cons"][ConnIdx.SRC_IDX]
             self[ConnIdx.DST_IDX] = kwargs["data"]["cons"][ConnIdx.DST_IDX]
-        else:
-            dst_rows: list[DstRowIndex] = sorted(DESTINATION_ROW_INDEXES[row] for row in json_graph if row != "C")
-            self[ConnIdx.SRC_ROW] = [
-                SOURCE_ROW_INDEXES[cast(SourceRow, ep[CPI.ROW])] for sri in dst_rows for ep in json_graph[DESTINATION_ROW_LETTERS[sri]]
-            ]
-            self[ConnIdx.DST_ROW] = [dri for dri in dst_rows for _ in json_graph[DESTINATION_ROW_LETTERS[dri]]]
-            self[ConnIdx.SRC_IDX] = [cast(int, ep[CPI.IDX]) for sri in dst_rows for ep in json_graph[DESTINATION_ROW_LETTERS[sri]]]
-            self[ConnIdx.DST_IDX] = [idx for dri in dst_rows for idx, _ in enumerate(json_graph[DESTINATION_ROW_LETTERS[dri]])]
+        # Connections from a JSON graph are copied from the parsed JSON graph in __new__()
         if _LOG_DEBUG:
             self.assertions()
 
@@ -96,14 +129,18 @@ class connections(ndarray):
         # A valid graph has 1 connection per destination endpoint.
         if kwargs.get("rndm", False):
             # In a random graph there is no row U until the connections are defined.
-            kwargs["data"]["cons"] = cls._random(kwargs["rows"])
+            kwargs["data"]["cons"] = cls._random(kwargs["rows"], kwargs.get("rng", GLOBAL_RANDOM))
             shape: tuple[int, int] = (4, len(kwargs["data"]["cons"][ConnIdx.SRC_ROW]))
         elif "plan" in kwargs:
-            kwargs["data"]["cons"] = cls._plan(kwargs["plan"], kwargs["rows"])
+            kwargs["data"]["cons"] = cls._plan(kwargs["plan"], kwargs["rows"], kwargs.get("rng", GLOBAL_RANDOM))
             shape: tuple[int, int] = (4, len(kwargs["data"]["cons"][ConnIdx.SRC_ROW]))
         else:
-            # The connection graph is defined by the number of destination endpoints including row U
-            shape: tuple[int, int] = (4, sum(len(val) for row, val in json_graph.items() if row in DESTINATION_ROWS))
+            # The connection graph is defined by the number of destination endpoints including row U.
+            # The JSON graph may have already been parsed (see graph_parser) in which case it is passed as 'parsed'.
+            cons: NDArray[uint8] = (kwargs["parsed"] if "parsed" in kwargs else parse_json_graph(json_graph)).connections
+            obj: connections = super().__new__(cls, cons.shape, dtype=uint8)  # pylint: disable=unexpected-keyword-arg
+            obj[:] = cons
+            return obj
 
         return super().__new__(cls, shape, dtype=uint8)  # pylint: disable=unexpected-keyword-arg
 
@@ -130,102 +167,173 @@ class connections(ndarray):
         return array_equal(self, other)
 
     def __hash__(self) -> int:  # type: ignore [reportIncompatibleMethodOverride]
-        """Generate a hash for the connections object."""
-        return hash(self.tobytes())
+        """Generate a hash for the connections object. Cached if the connections are frozen."""
+        return super().__hash__()
+
+    def dst_offsets(self) -> NDArray[intp]:
+        """Return the offsets of the destination rows. The connections of destination row dri are
+        self[:, offsets[dri - DstRowIndex.F]:offsets[dri - DstRowIndex.F + 1]]. Cached if the connections are frozen.
+        """
+        if self.flags.writeable:
+            return searchsorted(self[ConnIdx.DST_ROW], arange(DstRowIndex.F, DstRowIndex.U + 2))
+        offsets: NDArray[intp] | None = getattr(self, "_dst_offsets", None)
+        if offsets is None:
+            offsets = self._dst_offsets = searchsorted(self[ConnIdx.DST_ROW], arange(DstRowIndex.F, DstRowIndex.U + 2))
+        return offsets
 
     def get_connections(self, row: Row, cls: EndPointClassStr) -> ndarray:
         """Return the connections where one end matches row and key[1] class (s or d)."""
-        sord: ConnIdx = ConnIdx.SRC_ROW if cls == "s" else ConnIdx.DST_ROW
-        row_index: SrcRowIndex | DstRowIndex = SOURCE_ROW_INDEXES[row] if cls == "s" else DESTINATION_ROW_INDEXES[row]  # type: ignore
-        return self[:, self[sord] == row_index]
+        if cls == "s":
+            return self.get_src_connections(SOURCE_ROW_INDEXES[row])  # type: ignore
+        return self.get_dst_connections(DESTINATION_ROW_INDEXES[row])  # type: ignore
 
     def get_src_connections(self, sri: SrcRowIndex) -> ndarray:
-        """Return the connections where the source row matches row."""
-        return self[:, self[ConnIdx.SRC_ROW] == sri]
+        """Return the connections where the source row matches row (in destination row order)."""
+        order, offsets = self.src_order()
+        return self[:, order[offsets[sri] : offsets[sri + 1]]]
 
     def get_dst_connections(self, dri: DstRowIndex) -> ndarray:
-        """Return the connections where the destination row matches row."""
-        return self[:, self[ConnIdx.DST_ROW] == dri]
+        """Return the connections where the destination row matches row. NOTE: The connections are a view."""
+        offsets: NDArray[intp] = self.dst_offsets()
+        return self[:, offsets[dri - DstRowIndex.F] : offsets[dri - DstRowIndex.F + 1]]
 
     def mermaid(self) -> list[str]:
         """Return the mermaid charts string for the connections."""
         return [f"uid{ROWS_INDEXED[sr]}{si:03}s --> uid{ROWS_INDEXED[dr]}{di:03}d" for sr, dr, si, di in self.T]
 
-    @classmethod
-    def _plan(cls, _plan: list[tuple[str, Any]], _rows: rows) -> list[list[int]]:
-        """Use a plan to create connections and randomly fill any gaps."""
-        # Start by populating the destination endpoints: row index & index into row
-        # Source endpoints are unknonw at this time so populated with -1 which is invalid
-        cons: list[list[int]] = [[], [], [], []]
-        for dri in DstRowIndex:
-            length: int = len(_rows[dri])
-            if length:
-                cons[ConnIdx.DST_ROW].extend([dri] * length)
-                cons[ConnIdx.DST_IDX].extend(list(range(length)))
-        cons[ConnIdx.SRC_ROW].extend([-1] * len(cons[ConnIdx.DST_IDX]))
-        cons[ConnIdx.SRC_IDX].extend([-1] * len(cons[ConnIdx.DST_IDX]))
-
-        # Execute the plan
-        return cons
+    def src_order(self) -> tuple[NDArray[intp], NDArray[intp]]:
+        """Return the stable source row ordering permutation of the connections and the offsets of the source rows
+        in it. The connections of source row sri are self[:, order[offsets[sri]:offsets[sri + 1]]].
+        Cached if the connections are frozen.
+        """
+        if not self.flags.writeable:
+            cached: tuple[NDArray[intp], NDArray[intp]] | None = getattr(self, "_src_order", None)
+            if cached is not None:
+                return cached
+        src_rows: NDArray = self[ConnIdx.SRC_ROW]
+        order: NDArray[intp] = argsort(src_rows, kind="stable")
+        retval: tuple[NDArray[intp], NDArray[intp]] = (order, searchsorted(src_rows[order], arange(SrcRowIndex.I, SrcRowIndex.B + 2)))
+        if not self.flags.writeable:
+            self._src_order = retval
+        return retval
 
     @classmethod
-    def _random(cls, _rows: rows) -> list[list[int]]:
-        """Create a random set of connections."""
-        cons: list[list[int]] = [[], [], [], []]
+    def _build(cls, _rows: rows, constraints: dict[DstRowIndex, NDArray[intp]], rng: Random = GLOBAL_RANDOM) -> NDArray[intp]:
+        """Create connections for the destination endpoints of _rows satisfying the constraints & randomly
+        filling the rest. constraints are 3xM arrays of (destination index, source row, source index or -1 for
+        any index) by destination row. Unconstrained destination endpoints source from an endpoint chosen by
+        first choosing one of the valid source rows with an endpoint of the right type and then one of the
+        endpoints of that type in the row. Constrained destination endpoints choose the same way from the
+        sources that satisfy the constraint. All the choices for a destination row are drawn in one call to a
+        numpy Generator seeded from rng. Row U is defined as the unconnected source endpoints.
+        """
+        generator: Generator = default_rng(rng.getrandbits(64))
         has_f: bool = _rows.valid(DstRowIndex.F)
+        # The candidate table: Every source endpoint row, index & type in source row then index order.
+        src_lengths: list[int] = [len(_rows[sri]) for sri in SrcRowIndex]
+        cand_row: NDArray[intp] = repeat(arange(len(SrcRowIndex)), src_lengths)
+        cand_idx: NDArray[intp] = concatenate([arange(length) for length in src_lengths])
+        cand_type: NDArray = concatenate([_rows[sri].view(ndarray) for sri in SrcRowIndex])
+        # One hot source row of each candidate
+        cand_onehot: NDArray[bool_] = cand_row[:, None] == arange(len(SrcRowIndex))
+
+        all_cons: list[NDArray[intp]] = []
         for row in VALID_DESTINATIONS[has_f]:
             dri: DstRowIndex = DESTINATION_ROW_INDEXES[row]
-            # Empty rows will be skipped
-            for idx, ept in enumerate(_rows[dri]):
-                # Find valid source rows with the ept in it
-                _logger.debug(f"Valid sources for {ept} in {row}: {VALID_ROW_SOURCES[has_f][row]}")
-                for r in VALID_ROW_SOURCES[has_f][row]:
-                    _logger.debug(f"Row {r} has {ept} at {where(_rows[SOURCE_ROW_INDEXES[r]] == ept)}")
-                sri: SrcRowIndex = choice(
-                    [SOURCE_ROW_INDEXES[r] for r in VALID_ROW_SOURCES[has_f][row] if ept in _rows[SOURCE_ROW_INDEXES[r]]]
+            dst_types: NDArray = _rows[dri].view(ndarray)
+            # Empty rows will be skipped. Row U is defined by what is left unconnected.
+            if not len(dst_types) or dri == DstRowIndex.U:
+                continue
+            # valid[j, k] is True if candidate k can be the source of destination endpoint j
+            valid_rows: NDArray[bool_] = isin(cand_row, [SOURCE_ROW_INDEXES[r] for r in VALID_ROW_SOURCES[has_f][row]])
+            valid: NDArray[bool_] = (dst_types[:, None] == cand_type[None, :]) & valid_rows[None, :]
+            if dri in constraints:
+                dst_idxs, src_rows, src_idxs = constraints[dri]
+                valid[dst_idxs] &= (cand_row[None, :] == src_rows[:, None]) & (
+                    (src_idxs[:, None] < 0) | (cand_idx[None, :] == src_idxs[:, None])
                 )
-                # The source row is randomly chosen from the valid sources for the destination row
-                cons[ConnIdx.SRC_ROW].append(sri)
-                # The destination row is known
-                cons[ConnIdx.DST_ROW].append(dri)
-                # Randomly choose an endpoint of the selected type in the source row
-                cons[ConnIdx.SRC_IDX].append(choice(where(_rows[sri] == ept)[0]))
-                # Destination endpoint index is known
-                cons[ConnIdx.DST_IDX].append(idx)
-        # Can now figure out row U interface & connections
-        # This is most convenient to do with an temporary NDArray
-        tcons: NDArray = array(cons)
-        row_u_types: list[int] = []
-        for sri in SrcRowIndex:
-            # Find the unconnected set of source row endpoint indices (as a list to preserve order)
-            usri: list[int] = sorted(set(range(len(_rows[sri]))) - set(tcons[ConnIdx.SRC_IDX][where(tcons[ConnIdx.SRC_ROW] == sri)]))
-            cons[ConnIdx.SRC_ROW].extend([sri] * len(usri))
-            cons[ConnIdx.SRC_IDX].extend(usri)
-            cons[ConnIdx.DST_ROW].extend([DstRowIndex.U] * len(usri))
-            cons[ConnIdx.DST_IDX].extend(range(len(row_u_types), len(row_u_types) + len(usri)))
-            row_u_types.extend(_rows[sri][usri])
-        # Define row U interface
-        if row_u_types:
-            _rows.setu(row_u_types)
+            # Number of valid candidates in each source row for each destination endpoint
+            per_row: NDArray[intp] = valid.astype(intp) @ cand_onehot
+            num_rows: NDArray[intp] = (per_row > 0).sum(axis=1)
+            if not num_rows.all():
+                raise ValueError(f"Destination endpoint {row}{num_rows.argmin()} has no valid source endpoint.")
+            # Each valid source row is equally likely then each valid endpoint in the row
+            weights: NDArray = where(valid, 1.0 / maximum(per_row[:, cand_row] * num_rows[:, None], 1), 0.0)
+            cumulative: NDArray = weights.cumsum(axis=1)
+            draws: NDArray = generator.random(len(dst_types)) * cumulative[:, -1]
+            chosen: NDArray[intp] = (cumulative <= draws[:, None]).sum(axis=1)
+            num: int = len(dst_types)
+            all_cons.append(array((cand_row[chosen], full(num, dri), cand_idx[chosen], arange(num)), dtype=intp))
+
+        # Row U is the set of unconnected source endpoints in source row then index order.
+        cons: NDArray[intp] = concatenate(all_cons, axis=1) if all_cons else zeros((4, 0), dtype=intp)
+        connected: NDArray[bool_] = zeros(len(cand_row), dtype=bool_)
+        src_offsets: NDArray[intp] = concatenate(([0], cumsum(src_lengths)[:-1]))
+        connected[src_offsets[cons[ConnIdx.SRC_ROW]] + cons[ConnIdx.SRC_IDX]] = True
+        unconnected: NDArray[intp] = flatnonzero(~connected)
+        num_u: int = len(unconnected)
+        _rows[DstRowIndex.U] = EMPTY_INTERFACE
+        if num_u:
+            row_u: NDArray[intp] = array((cand_row[unconnected], full(num_u, DstRowIndex.U), cand_idx[unconnected], arange(num_u)))
+            cons = concatenate((cons, row_u), axis=1)
+            # Define row U interface
+            _rows.setu(cand_type[unconnected].tolist())
         return cons
 
+    @classmethod
+    def _plan(cls, plan: ConnectionPlan, _rows: rows, rng: Random = GLOBAL_RANDOM) -> NDArray[intp]:
+        """Use a plan to create connections and randomly fill any gaps with type compatible sources.
+        A later plan entry for the same destination endpoint replaces an earlier one.
+        """
+        entries: dict[DstRowIndex, list[tuple[int, int, int]]] = {}
+        for dst_ep, src in plan:
+            dri: DstRowIndex | None = DESTINATION_ROW_INDEXES.get(dst_ep[:1])  # type: ignore
+            sri: SrcRowIndex | None = SOURCE_ROW_INDEXES.get(src[:1])  # type: ignore
+            if dri is None or sri is None or not dst_ep[1:].isdigit() or not (src[1:].isdigit() or len(src) == 1):
+                raise ValueError(f"Invalid connection plan entry {(dst_ep, src)}.")
+            if int(dst_ep[1:]) >= len(_rows[dri]):
+                raise ValueError(f"Connection plan destination endpoint {dst_ep} does not exist.")
+            entries.setdefault(dri, []).append((int(dst_ep[1:]), sri, int(src[1:]) if len(src) > 1 else -1))
+        constraints: dict[DstRowIndex, NDArray[intp]] = {dri: array(entry, dtype=intp).T for dri, entry in entries.items()}
+        return cls._build(_rows, constraints, rng)
+
+    @classmethod
+    def _random(cls, _rows: rows, rng: Random = GLOBAL_RANDOM) -> NDArray[intp]:
+        """Create a random set of connections using rng for the random choices."""
+        return cls._build(_rows, {}, rng)
+
     def assertions(self) -> None:
         """Validate assertions for the connections."""
+        # The checks are whole array operations on a plain ndarray view.
+        cons: NDArray[uint8] = self.view(ndarray)
+        src_rows: NDArray[uint8] = cons[ConnIdx.SRC_ROW]
+        dst_rows: NDArray[uint8] = cons[ConnIdx.DST_ROW]
+        assert (dst_rows[1:] >= dst_rows[:-1]).all(), "Connections are not sorted by destination row"
         # Validate source row
-        for src_row_index in unique(self[ConnIdx.SRC_ROW]):
-            assert src_row_index in SOURCE_ROW_INDEXES.values(), "Source row index {src_row_index} is not valid"
-            src_row_indices: NDArray = unique(self[ConnIdx.SRC_IDX][self[ConnIdx.SRC_ROW] == src_row_index])
-            assert len(src_row_indices) <= 256, f"Source row {ROWS_INDEXED[src_row_index]} has too many source endpoints"
+        bad: NDArray[bool_] = ~_VALID_SRC_ROW[src_rows]
+        assert not bad.any(), f"Source row index {src_rows[bad.argmax()]} is not valid"
+        # There cannot be more than 256 endpoints in a row if there are not more than 256 connections
+        if cons.shape[1] > 256:
+            counts: NDArray[intp] = bincount(
+                unique(src_rows.astype(intp) * 256 + cons[ConnIdx.SRC_IDX]) // 256, minlength=len(ROWS_INDEXED)
+            )
+            bad = counts > 256
+            assert not bad.any(), f"Source row {ROWS_INDEXED[bad.argmax()]} has too many source endpoints"
 
         # Validate destination row
-        for dst_row_index in unique(self[ConnIdx.DST_ROW]):
-            assert dst_row_index in DESTINATION_ROW_INDEXES.values(), f"Destination row index {dst_row_index} is not valid"
-            dst_row_indices: NDArray = self[ConnIdx.DST_IDX][self[ConnIdx.DST_ROW] == dst_row_index]
-            assert len(dst_row_indices) <= 256, f"Destination row {ROWS_INDEXED[dst_row_index]} has too many destination endpoints"
-            for idx, dst_idx in enumerate(dst_row_indices):
-                assert (
-                    idx == dst_idx
-                ), f"Destination row {ROWS_INDEXED[dst_row_index]} has non-sequential destination endpoint indices:\n{dst_row_indices}"
+        bad = ~_VALID_DST_ROW[dst_rows]
+        assert not bad.any(), f"Destination row index {dst_rows[bad.argmax()]} is not valid"
+        if cons.shape[1] > 256:
+            bad = bincount(dst_rows, minlength=len(ROWS_INDEXED)) > 256
+            assert not bad.any(), f"Destination row {ROWS_INDEXED[bad.argmax()]} has too many destination endpoints"
+        # Destination endpoint indices must be 0, 1, 2... from the start of each (sorted) destination row
+        bad = cons[ConnIdx.DST_IDX] != arange(len(dst_rows)) - searchsorted(dst_rows, dst_rows)
+        if bad.any():
+            dst_row_index: intp = dst_rows[bad.argmax()]
+            assert False, (
+                f"Destination row {ROWS_INDEXED[dst_row_index]} has non-sequential destination endpoint indices:\n"
+                f"{cons[ConnIdx.DST_IDX][dst_rows == dst_row_index]}"
+            )
 
 
-EMPTY_CONNECTIONS = connections({})
+EMPTY_CONNECTIONS = connections({}).freeze()
@@ -12,6 +12,7 @@ from numpy import uint8, frombuffer
 from numpy.typing import NDArray
 
 from egp_types.gc_type_tools import PROPERTIES
+from egp_types.graph import graph
 
 
 def json_obj_to_str(obj: dict | list | None) -> str | None:
@@ -113,6 +114,41 @@ def decompress_json(obj: bytes | None) -> dict | list | None:
     return None if obj is None else loads(decompress(obj).decode())
 
 
+def compress_graph(obj: graph | bytes | memoryview | bytearray | None) -> bytes | memoryview | bytearray | None:
+    """Compress a graph in the packed binary format (see graph.to_bytes()).
+
+    Args
+    ----
+    obj (graph): The graph to compress. Byte types are assumed to already be compressed.
+
+    Returns
+    -------
+    (bytes): zlib compressed packed graph.
+    """
+    if isinstance(obj, graph):
+        return compress(obj.to_bytes())
+    if isinstance(obj, (memoryview, bytearray, bytes)):
+        return obj
+    if obj is None:
+        return None
+    raise TypeError(f"Un-encodeable type '{type(obj)}': Expected 'graph' or byte type.")
+
+
+def decompress_graph(obj: bytes | memoryview | bytearray | None) -> graph | None:
+    """Decompress a compressed packed graph. The graph interfaces & connections are views of the
+    decompressed buffer (see graph.from_buffer()) so there is no intermediate JSON graph.
+
+    Args
+    ----
+    obj (bytes): zlib compressed packed graph.
+
+    Returns
+    -------
+    (graph): The frozen graph.
+    """
+    return None if obj is None else graph.from_buffer(decompress(obj))
+
+
 def memoryview_to_bytes(obj: memoryview | None) -> bytes | None:
     """Convert a memory view to a bytes object.
 
@@ -5,9 +5,9 @@ xGCs come in two flavours:
     Gene Pool Cache Layer GC's - linked to genetic_code type objects in the cache but is not in the cache itself (gpc_gcs.py)
 """
 from __future__ import annotations
-from typing import Any, Self
+from typing import Any, Self, Sequence
 from copy import deepcopy
-from .gc_type_tools import NULL_SIGNATURE_BYTES, signature
+from .gc_type_tools import NULL_SIGNATURE_BYTES, signature, signatures
 from .egp_typing import JSONGraph
 from .graph import graph
 from .interface import interface
@@ -69,3 +69,14 @@ class eGC:
 
 class lGC(eGC):
     """Library genetic code class (Application Layer)."""
+
+
+def batch_signatures(egcs: Sequence[eGC]) -> list[bytes]:
+    """Return the signatures of the embryonic genetic codes."""
+    args: list[tuple[Any, ...]] = []
+    for egc in egcs:
+        io_data: tuple[interface, interface] = egc._io_data()  # pylint: disable=protected-access
+        args.append(
+            (memoryview(egc.gca), memoryview(egc.gcb), io_data[0].data, io_data[1].data, connections(egc.graph).data, egc.meta_data)
+        )
+    return [sig.tobytes() for sig in signatures(args)]
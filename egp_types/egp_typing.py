@@ -8,11 +8,12 @@ SourceRow = Literal["I", "C", "A", "B"]
 Row = Literal["A", "B", "F", "O", "P", "I", "C", "U"]
 EndPointClass = bool
 EndPointClassStr = Literal["s", "d"]
-SrcEndPointHash = str
-DstEndPointHash = str
+# End point hashes are integers packing the row, index & class (see end_point.end_point_key())
+SrcEndPointHash = int
+DstEndPointHash = int
 EndPointIndex = int
 EndPointType = int
-EndPointHash = SrcEndPointHash | DstEndPointHash | str
+EndPointHash = SrcEndPointHash | DstEndPointHash
 
 
 # TODO: Can GCGraphRows be constrained further to tuple[dict[DestinationRow, int], dict[SourceRow, int]]
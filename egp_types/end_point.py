@@ -1,9 +1,14 @@
-"""End point and end point reference classes."""
+"""End point and end point reference classes.
+
+End point keys (hashes) are integers packing the row, index & class of the end point:
+bits 11+ are the position of the row in ROWS, bits 1:10 the index & bit 0 the class (1 = source).
+Integer keys sort in the same order as the string form e.g. "A003s" which is only used at the
+JSON & human readable boundaries (see key_to_str() & str_to_key()).
+"""
 
 from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, TypeGuard, Self, cast
-from copy import deepcopy
 from logging import DEBUG, Logger, NullHandler, getLogger
 
 from .egp_typing import (
@@ -15,6 +20,7 @@ from .egp_typing import (
     EndPointHash,
     EndPointIndex,
     EndPointType,
+    ROWS,
     Row,
     SourceRow,
     SrcEndPointHash,
@@ -31,6 +37,39 @@ _logger.addHandler(NullHandler())
 _LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
 
 
+# End point key encoding
+_IDX_SHIFT: int = 1
+_ROW_SHIFT: int = 11
+MAX_END_POINT_INDEX: int = (1 << (_ROW_SHIFT - _IDX_SHIFT)) - 1
+_ROW_KEY: dict[Row, int] = {row: pos << _ROW_SHIFT for pos, row in enumerate(ROWS)}
+_CLS_STR: str = "ds"
+
+
+def end_point_key(row: Row, idx: EndPointIndex, cls: EndPointClass) -> EndPointHash:
+    """Return the end point key of the row, index & class."""
+    return _ROW_KEY[row] | idx << _IDX_SHIFT | cls
+
+
+def key_row(key: EndPointHash) -> Row:
+    """Return the row of an end point key."""
+    return ROWS[key >> _ROW_SHIFT]
+
+
+def key_cls(key: EndPointHash) -> EndPointClass:
+    """Return the class of an end point key."""
+    return bool(key & 1)
+
+
+def key_to_str(key: EndPointHash) -> str:
+    """Return the string form of an end point key e.g. "A003s"."""
+    return f"{ROWS[key >> _ROW_SHIFT]}{(key >> _IDX_SHIFT) & MAX_END_POINT_INDEX:03d}{_CLS_STR[key & 1]}"
+
+
+def str_to_key(key_str: str) -> EndPointHash:
+    """Return the end point key of the string form e.g. "A003s"."""
+    return end_point_key(cast(Row, key_str[0]), int(key_str[1:-1]), key_str[-1] == "s")
+
+
 @dataclass(slots=True)
 class generic_end_point:
     """Lowest common denominator end point class"""
@@ -42,9 +81,9 @@ class generic_end_point:
         """Return a json serializable object."""
         return [self.row, self.idx]
 
-    def key_base(self) -> str:
-        """Base end point hash."""
-        return f"{self.row}{self.idx:03d}"
+    def key_base(self) -> int:
+        """Base end point hash. The class bit is not set."""
+        return _ROW_KEY[self.row] | self.idx << _IDX_SHIFT
 
 
 @dataclass(slots=True)
@@ -53,7 +92,7 @@ class end_point_ref(generic_end_point):
 
     def force_key(self, cls: EndPointClass) -> EndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "ds"[cls]
+        return self.key_base() | cls
 
     def __eq__(self, other: object) -> bool:
         """Equivilence for end point references."""
@@ -72,11 +111,11 @@ class dst_end_point_ref(end_point_ref):
 
     def key(self) -> DstEndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "d"
+        return self.key_base()
 
     def invert_key(self) -> SrcEndPointHash:
         """Invert hash. Return a hash for the source endpoint equivilent."""
-        return self.key_base() + "s"
+        return self.key_base() | SRC_EP
 
 
 @dataclass(slots=True)
@@ -91,11 +130,11 @@ class src_end_point_ref(end_point_ref):
 
     def key(self) -> SrcEndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "s"
+        return self.key_base() | SRC_EP
 
     def invert_key(self) -> DstEndPointHash:
         """Invert hash. Return a hash for the destination endpoint equivilent."""
-        return self.key_base() + "d"
+        return self.key_base()
 
 
 @dataclass(slots=True)
@@ -126,20 +165,23 @@ class end_point(generic_end_point):
 
     def key(self) -> EndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "ds"[self.cls]
+        return self.key_base() | self.cls
 
     def force_key(self, force_class: EndPointClass | None = None) -> EndPointHash:
         """Create a unique key to use in the internal graph forcing the class type."""
-        cls: str = "ds"[self.cls] if force_class is None else "ds"[force_class]
-        return self.key_base() + cls
+        return self.key_base() | (self.cls if force_class is None else force_class)
 
     def as_ref(self) -> end_point_ref:
         """Return a reference to this end point."""
         return end_point_ref(self.row, self.idx)
 
+    def clone(self) -> Self:
+        """Return a copy of the end point with copies of its references."""
+        return self.__class__(self.row, self.idx, self.typ, self.cls, [ref.__class__(ref.row, ref.idx) for ref in self.refs], self.val)
+
     def copy(self, clean: bool = False) -> Self:
-        """Return a copy of the end point with no references."""
-        return self.__class__(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else deepcopy(self)
+        """Return a copy of the end point. If clean is True the copy has no references."""
+        return self.__class__(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else self.clone()
 
     def move_copy(self, row: Row, clean: bool = False, has_f: bool = False) -> Self:
         """Return a copy of the end point with the row changed.
@@ -177,19 +219,23 @@ class dst_end_point(end_point):
 
     def key(self) -> DstEndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "d"
+        return self.key_base()
 
     def invert_key(self) -> SrcEndPointHash:
         """Invert hash. Return a hash for the source endpoint equivilent."""
-        return self.key_base() + "s"
+        return self.key_base() | SRC_EP
 
     def as_ref(self) -> dst_end_point_ref:
         """Return a reference to this end point."""
         return dst_end_point_ref(self.row, self.idx)
 
+    def clone(self) -> dst_end_point:
+        """Return a copy of the end point with copies of its references."""
+        return dst_end_point(self.row, self.idx, self.typ, self.cls, [src_end_point_ref(ref.row, ref.idx) for ref in self.refs], self.val)
+
     def copy(self, clean: bool = False) -> dst_end_point:
-        """Return a copy of the end point with no references."""
-        return dst_end_point(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else deepcopy(self)
+        """Return a copy of the end point. If clean is True the copy has no references."""
+        return dst_end_point(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else self.clone()
 
     def clean_copy(self) -> dst_end_point:
         """Return a copy of the end point with no references."""
@@ -214,19 +260,23 @@ class src_end_point(end_point):
 
     def key(self) -> SrcEndPointHash:
         """Create a unique key to use in the internal graph."""
-        return self.key_base() + "s"
+        return self.key_base() | SRC_EP
 
     def invert_key(self) -> DstEndPointHash:
         """Invert hash. Return a hash for the source endpoint equivilent."""
-        return self.key_base() + "d"
+        return self.key_base()
 
     def as_ref(self) -> src_end_point_ref:
         """Return a reference to this end point."""
         return src_end_point_ref(self.row, self.idx)
 
+    def clone(self) -> src_end_point:
+        """Return a copy of the end point with copies of its references."""
+        return src_end_point(self.row, self.idx, self.typ, self.cls, [dst_end_point_ref(ref.row, ref.idx) for ref in self.refs], self.val)
+
     def copy(self, clean: bool = False) -> src_end_point:
-        """Return a copy of the end point with no references."""
-        return src_end_point(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else deepcopy(self)
+        """Return a copy of the end point. If clean is True the copy has no references."""
+        return src_end_point(self.row, self.idx, self.typ, self.cls, val=self.val) if clean else self.clone()
 
     def clean_copy(self) -> src_end_point:
         """Return a copy of the end point with no references."""
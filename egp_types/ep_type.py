@@ -15,7 +15,7 @@ from hashlib import blake2b
 from json import load
 from logging import Logger, NullHandler, getLogger, DEBUG
 from os.path import dirname, join
-from typing import Any, Iterable, Literal
+from typing import Any, Iterable, Literal, Sequence
 
 from .egp_typing import (
     EndPointTypeLookup,
@@ -64,6 +64,9 @@ MIN_EP_TYPE_VALUE: int = min(_EP_TYPE_VALUES)
 MAX_EP_TYPE_VALUE: int = max(_EP_TYPE_VALUES)
 assert len(set(_EP_TYPE_VALUES)) == len(_EP_TYPE_VALUES), "Duplicate end point types detected!"
 assert max(_EP_TYPE_VALUES) - min(_EP_TYPE_VALUES) == len(_EP_TYPE_VALUES) - 1, "End point types must be contiguous!"
+# Sets of end point types are represented as bit masks with bit (type - MIN_EP_TYPE_VALUE) set for each type.
+EP_TYPE_MASK_BITS: int = MAX_EP_TYPE_VALUE - MIN_EP_TYPE_VALUE + 1
+assert EP_TYPE_MASK_BITS <= 64, "End point type masks must fit in 64 bits!"
 
 _logger.info(f"{len(SPECIAL_EP_TYPE_VALUES)} special endpoint types identified.")
 _logger.info(f"{len(PHYSICAL_EP_TYPE_VALUES)} physical endpoint types identified.")
@@ -405,9 +408,9 @@ def unordered_interface_hash(input_eps: Iterable[int], output_eps: Iterable[int]
     """
     ihash: blake2b = blake2b(digest_size=8)
     for inpt in sorted(input_eps):
-        ihash.update(inpt.to_bytes(2, "big"))
+        ihash.update(inpt.to_bytes(2, "big", signed=True))
     for outpt in sorted(output_eps):
-        ihash.update(outpt.to_bytes(2, "big"))
+        ihash.update(outpt.to_bytes(2, "big", signed=True))
     ihash_val: int = int.from_bytes(ihash.digest(), "big")
     return (0x7FFFFFFFFFFFFFFF & ihash_val) - (ihash_val & (1 << 63))
 
@@ -436,15 +439,43 @@ def ordered_interface_hash(
     """
     ihash: blake2b = blake2b(digest_size=8)
     for inpt in input_types:
-        ihash.update(inpt.to_bytes(2, "big"))
+        ihash.update(inpt.to_bytes(2, "big", signed=True))
     for outpt in sorted(output_types):
-        ihash.update(outpt.to_bytes(2, "big"))
+        ihash.update(outpt.to_bytes(2, "big", signed=True))
     ihash.update(inputs)
     ihash.update(outputs)
     ihash_val: int = int.from_bytes(ihash.digest(), "big")
     return (0x7FFFFFFFFFFFFFFF & ihash_val) - (ihash_val & (1 << 63))
 
 
+def interface_hashes(input_eps: Sequence[int], output_eps: Sequence[int]) -> tuple[int, int]:
+    """Return the ordered & unordered interface hashes of a GC interface.
+
+    Args
+    ----
+    input_eps: Sequence of input EP types in value format.
+    output_eps: Sequence of output EP types in value format.
+
+    Returns
+    -------
+    (ordered_interface_hash, unordered_interface_hash)
+    """
+    input_types: list[int] = sorted(set(input_eps))
+    output_types: list[int] = sorted(set(output_eps))
+    inputs: bytes = bytes(input_types.index(x) for x in input_eps)
+    outputs: bytes = bytes(output_types.index(x) for x in output_eps)
+    return ordered_interface_hash(input_types, output_types, inputs, outputs), unordered_interface_hash(input_eps, output_eps)
+
+
+def type_mask(eps: Iterable[int]) -> int:
+    """Return the bit mask of the set of EP types in eps. Fits in a uint64."""
+    mask: int = 0
+    for ept in eps:
+        assert MIN_EP_TYPE_VALUE <= ept <= MAX_EP_TYPE_VALUE, f"EP type {ept} cannot be in a type mask."
+        mask |= 1 << (ept - MIN_EP_TYPE_VALUE)
+    return mask
+
+
 def validate_value(value_str: str, ep_type_int: int) -> bool:
     """Validate the executable string is a valid ep_type value.
 
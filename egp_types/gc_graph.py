@@ -7,8 +7,9 @@ Description: Genetic code graphs define how genetic codes are connected together
 defines the rules of the connectivity (the "physics") i.e. what is possible to observe or occur.
 """
 
+from __future__ import annotations
+
 from collections import Counter
-from copy import deepcopy
 from itertools import count
 from logging import DEBUG, Logger, NullHandler, getLogger
 from random import choice, randint, sample
@@ -33,7 +34,15 @@ from .egp_typing import (
     Row,
     SourceRow,
 )
-from .end_point import dst_end_point, dst_end_point_ref, end_point_ref, src_end_point, src_end_point_ref, x_end_point
+from .end_point import (
+    dst_end_point,
+    dst_end_point_ref,
+    end_point_ref,
+    key_to_str,
+    src_end_point,
+    src_end_point_ref,
+    x_end_point,
+)
 from .ep_type import REAL_EP_TYPE_VALUES, asint, asstr, compatible, validate, validate_value
 from .internal_graph import internal_graph, internal_graph_from_JSONGraph
 
@@ -170,6 +179,14 @@ class gc_graph:
         """Return a string representation of the graph."""
         return self.igraph.__repr__()
 
+    def clone(self) -> gc_graph:
+        """Return a copy of the graph. The internal graph is cloned & the row counts & status copied."""
+        retval: gc_graph = self.__class__.__new__(self.__class__)
+        retval.igraph = self.igraph.clone()
+        retval.status = self.status.copy()
+        retval.rows = (self.rows[DST_EP].copy(), self.rows[SRC_EP].copy())
+        return retval
+
     def _add_ep(self, ep: x_end_point) -> None:
         """Add an endpoint to the internal graph format structure.
 
@@ -391,7 +408,8 @@ class gc_graph:
             for ep in eps:
                 if r_map[ep.idx] != ep.idx:
                     if _LOG_DEBUG:
-                        _logger.debug(f"Mapping {ep.key()} to {end_point_ref(ep.row, r_map[ep.idx]).force_key(ep.cls)}")
+                        new_key: str = key_to_str(end_point_ref(ep.row, r_map[ep.idx]).force_key(ep.cls))
+                        _logger.debug(f"Mapping {key_to_str(ep.key())} to {new_key}")
                         _logger.debug(f"References to re-index: {ep.refs}")
                     for ref in ep.refs:
                         for refd in self.igraph[ref.force_key(not ep.cls)].refs:
@@ -414,7 +432,7 @@ class gc_graph:
         Remove any destination endpoints that do not have compatible source endpoints.
         This is not a useful function in normal operation.
         """
-        for row in deepcopy(self.rows[DST_EP]):  # self.rows may be modified during iteration
+        for row in tuple(self.rows[DST_EP]):  # self.rows may be modified during iteration
             src_types: set[int] = {ep.typ for ep in self.igraph.src_rows_filter(VALID_ROW_SOURCES[self.has_row("F")][row])}
             dst_types: set[int] = {ep.typ for ep in self.igraph.dst_row_filter(row)}
             unconnectable_types: set[int] = dst_types - src_types
@@ -531,15 +549,15 @@ class gc_graph:
             for ref in ep.refs:
                 ref_hash: EndPointHash = ref.force_key(not ep.cls)
                 if ref_hash not in self.igraph:
-                    self.status.append(text_token({"E01019": {"ep_hash": ep.key(), "ref_hash": ref_hash}}))
+                    self.status.append(text_token({"E01019": {"ep_hash": key_to_str(ep.key()), "ref_hash": key_to_str(ref_hash)}}))
                 elif ep.row != "U" and end_point_ref(ep.row, ep.idx) not in self.igraph[ref_hash].refs:
-                    self.status.append(text_token({"E01020": {"ep_hash": ep.key(), "ref_hash": ref_hash}}))
+                    self.status.append(text_token({"E01020": {"ep_hash": key_to_str(ep.key()), "ref_hash": key_to_str(ref_hash)}}))
 
         # 2.
         unref_srcs: set[src_end_point_ref] = {src_end_point_ref(ep.row, ep.idx) for ep in self.igraph.src_unref_filter()}
         u_refs: set[src_end_point_ref] = {ep.refs[0] for ep in self.igraph.dst_row_filter("U") if ep.refs}
         for unref_src in unref_srcs - u_refs:
-            self.status.append(text_token({"E01021": {"ep_hash": unref_src.key()}}))
+            self.status.append(text_token({"E01021": {"ep_hash": key_to_str(unref_src.key())}}))
 
         # NOTE: This is not a test of validatity but a test of stability
         # 3a.
@@ -549,11 +567,11 @@ class gc_graph:
         # 3b.
         for ep in self.igraph.dst_filter():
             if len(ep.refs) > 1:
-                self.status.append(text_token({"E01018": {"dupe": ep.key(), "refs": ep.refs}}))
+                self.status.append(text_token({"E01018": {"dupe": key_to_str(ep.key()), "refs": ep.refs}}))
 
         # 4
         for ep in filter(lambda x: not validate(x.typ), self.igraph.values()):
-            self.status.append(text_token({"E01002": {"ep_hash": ep.key(), "type_errors": "Does not exist."}}))
+            self.status.append(text_token({"E01002": {"ep_hash": key_to_str(ep.key()), "type_errors": "Does not exist."}}))
 
         # 5
         for row in ROWS:
@@ -581,7 +599,7 @@ class gc_graph:
                 text_token(
                     {
                         "E01005": {
-                            "ref": ep.key(),
+                            "ref": key_to_str(ep.key()),
                             "value": ep.val,
                             "type": asstr(ep.typ),
                         }
@@ -619,12 +637,12 @@ class gc_graph:
         # 10
         for ep in self.igraph.row_filter("I"):
             if ep.cls != SRC_EP:
-                self.status.append(text_token({"E01007": {"ref": ep.key()}}))
+                self.status.append(text_token({"E01007": {"ref": key_to_str(ep.key())}}))
 
         # 11
         for ep in self.igraph.rows_filter(("O", "P")):
             if ep.cls != DST_EP:
-                self.status.append(text_token({"E01008": {"ref": ep.key()}}))
+                self.status.append(text_token({"E01008": {"ref": key_to_str(ep.key())}}))
 
         # 12
         for dst_ep in self.igraph.dst_filter():
@@ -635,9 +653,9 @@ class gc_graph:
                         text_token(
                             {
                                 "E01009": {
-                                    "ref1": src_ep.key(),
+                                    "ref1": key_to_str(src_ep.key()),
                                     "type1": asstr(src_ep.typ),
-                                    "ref2": dst_ep.key(),
+                                    "ref2": key_to_str(dst_ep.key()),
                                     "type2": asstr(dst_ep.typ),
                                 }
                             }
@@ -647,13 +665,13 @@ class gc_graph:
         for ep in self.igraph.dst_filter():
             for ref in ep.refs:
                 if ref.row not in VALID_ROW_SOURCES[self.has_row("F")].get(ep.row, tuple()):
-                    self.status.append(text_token({"E01010": {"ref1": ep.key(), "ref2": ref.key()}}))
+                    self.status.append(text_token({"E01010": {"ref1": key_to_str(ep.key()), "ref2": key_to_str(ref.key())}}))
 
         # 13b
         for ep in self.igraph.src_filter():
             for ref in ep.refs:
                 if ref.row not in VALID_ROW_DESTINATIONS[self.has_row("F")][ep.row]:
-                    self.status.append(text_token({"E01017": {"ref1": ep.key(), "ref2": ref.key()}}))
+                    self.status.append(text_token({"E01017": {"ref1": key_to_str(ep.key()), "ref2": key_to_str(ref.key())}}))
 
         if self.has_row("F"):
             # 14a
@@ -663,7 +681,7 @@ class gc_graph:
                 self.status.append(text_token({"E01013": {"len_p": len_p, "len_o": len_o}}))
             for o_ep, p_ep in zip(self.igraph.dst_row_filter("O"), self.igraph.dst_row_filter("P")):
                 if o_ep.typ != p_ep.typ:
-                    self.status.append(text_token({"E01023": {"p_hash": p_ep.key(), "o_hash": o_ep.key()}}))
+                    self.status.append(text_token({"E01023": {"p_hash": key_to_str(p_ep.key()), "o_hash": key_to_str(o_ep.key())}}))
 
             # 14b
             if not [ep.typ == asint("bool") for ep in self.igraph.row_filter("I")]:
@@ -882,7 +900,7 @@ def random_gc_graph(validator: base_validator, verify: bool = False, seed: int |
     if "F" in rc_graph:
         # O references A and P reference B - to validate they must have the same types. Easiest to duplicate.
         if "A" in rc_graph:
-            rc_graph["B"] = deepcopy(rc_graph["A"])
+            rc_graph["B"] = [ref.copy() for ref in rc_graph["A"]]
             # Duplicate A & B sources in U to keep symmetry.
             if "U" in rc_graph:
                 rc_graph["U"].extend([["B", ref[1], ref[2]] for ref in rc_graph["U"] if ref[0] == "A"])  # type: ignore
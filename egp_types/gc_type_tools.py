@@ -5,9 +5,9 @@ NOTE: Cannot depend on any *GC types. This is a circular dependency.
 from hashlib import sha256
 from logging import DEBUG, Logger, NullHandler, getLogger
 from pprint import pformat
-from typing import TYPE_CHECKING, Any, Literal, LiteralString
+from typing import TYPE_CHECKING, Any, Literal, LiteralString, Sequence
 
-from numpy import asarray, uint8, int32, int64, float32
+from numpy import asarray, uint8, int32, int64, float32, zeros
 from numpy.typing import NDArray
 
 from .ep_type import asint
@@ -167,6 +167,17 @@ def signature(  # pylint: disable=dangerous-default-value
     return asarray(bytearray(hash_obj.digest()), dtype=uint8)
 
 
+def signatures(args: Sequence[tuple[Any, ...]]) -> NDArray[uint8]:
+    """Return the (N, 32) signatures of N genetic codes. Each element of args is a tuple of the parameters
+    to signature(). NOTE: The hashed data is small (~100 bytes) so hashlib does not release the GIL and
+    there is nothing to gain from hashing in threads.
+    """
+    retval: NDArray[uint8] = zeros((len(args), 32), dtype=uint8)
+    for idx, arg in enumerate(args):
+        retval[idx] = signature(*arg)
+    return retval
+
+
 def app_sig_to_array(sig: bytes | memoryview | None) -> NDArray[uint8]:
     """Convert the application signature to a numpy array."""
     return asarray(sig, dtype=uint8) if sig is not None else NULL_SIGNATURE_ARRAY
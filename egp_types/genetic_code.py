@@ -70,11 +70,12 @@ from __future__ import annotations
 
 from logging import DEBUG, Logger, NullHandler, getLogger
 from pprint import pformat
-from random import randbytes
-from typing import Any
+from random import Random, randbytes
+from typing import Any, Sequence
 from uuid import UUID
 from itertools import count
 from numpy import array, uint8
+from numpy.random import Generator, default_rng
 
 from ._genetic_code import (
     DEFAULT_DYNAMIC_MEMBER_VALUES,
@@ -85,6 +86,7 @@ from ._genetic_code import (
     STORE_GC_OBJ_MEMBERS,
     _genetic_code,
 )
+from .egp_typing import ALL_ROWS_STR
 from .graph import EMPTY_GRAPH, graph
 from .interface import EMPTY_IO, interface
 
@@ -107,6 +109,8 @@ gc_class_number = count()
 class genetic_code(_genetic_code):
     """A genetic code is a codon with a source interface and a destination interface."""
 
+    __slots__: list[str] = []
+
     def __init__(self, gc_dict: dict[str, Any] = {}, **kwargs) -> None:  # pylint: disable=dangerous-default-value
         # All data is in the class store to keep it compact.
         # The store is a singleton and is shared by all instances of the class.
@@ -135,14 +139,16 @@ class genetic_code(_genetic_code):
             if isinstance(gc_dict["graph"], graph):
                 self["graph"] = gc_dict["graph"]
             else:
-                io: tuple[interface, interface] = gc_dict.get("io", EMPTY_IO)
-                self["graph"] = graph(gc_dict.get("graph", {}), gca=self["gca"], gcb=self["gcb"], io=io)
+                # The I & O interfaces are defined by the JSON graph unless explicitly given.
+                io: dict[str, tuple[interface, interface]] = {"io": gc_dict["io"]} if "io" in gc_dict else {}
+                self["graph"] = graph(gc_dict.get("graph", {}), gca=self["gca"], gcb=self["gcb"], **io)
             for member in STORE_STATIC_NON_OBJECT_MEMBERS:
                 self[member] = gc_dict.get(member, DEFAULT_STATIC_MEMBER_VALUES[member])
             if self["gca"] is PURGED_GENETIC_CODE or self["gcb"] is PURGED_GENETIC_CODE or codon:
                 # If either one of GCA or GCB is purged then the derived values have to be in gc_dict or default
                 # Derived members may ONLY be updated en-masse by self.store_leaf()
                 self.store_leaf(**gc_dict)
+        cls.genetic_code_cache.inserted(self.idx)
 
         if _LOG_DEBUG:
             _logger.debug(f"genetic_code {self.idx} created:\n{self}")
@@ -177,4 +183,95 @@ class genetic_code(_genetic_code):
 
 def genetic_code_factory() -> type[_genetic_code]:
     """Return the next genetic_code class."""
-    return type(f"genetic_code_{next(gc_class_number)}", (genetic_code,), {})
+    return type(f"genetic_code_{next(gc_class_number)}", (genetic_code,), {"__slots__": []})
+
+
+def random_genetic_codes(  # pylint: disable=too-many-locals
+    gc_type: type[_genetic_code],
+    num: int,
+    depth: int = 5,
+    rng: Generator | None = None,
+    reuse: float = 0.0,
+    rows_strs: Sequence[str] = (ALL_ROWS_STR,),
+    **kwargs,
+) -> list[int]:
+    """Create num random genetic codes in the genetic code cache of gc_type and return their indices.
+    Each genetic code has up to depth levels of sub-genetic codes. The structural random choices are drawn
+    from rng up front and graphs are generated with a random.Random instance seeded from rng so seeding rng
+    makes the forest reproducible without touching the random module global state. The forest is planned
+    iteratively depth first.
+    With probability reuse a sub-genetic code with the required interface is reused rather than created
+    forming a DAG. Reuse candidates are the genetic codes already in the cache and the completely planned
+    sub-genetic codes of the forest (which cannot create a cycle). Genetic codes are then inserted into the
+    cache dependencies first. kwargs are passed to the graph constructor e.g. ep_types, max_eps.
+    """
+    gcc = gc_type.genetic_code_cache
+    _rng: Generator = default_rng() if rng is None else rng
+    max_nodes: int = num * (2 ** (depth + 1) - 1)
+    graph_rng: Random = Random(int(_rng.integers(0, 2**63)))
+    rows_choice = _rng.integers(0, len(rows_strs), size=max_nodes)
+    reuse_it = _rng.random(max_nodes) < reuse
+    picks = _rng.random(max_nodes)
+    signatures = _rng.integers(0, 256, size=(max_nodes, 32), dtype=uint8)
+    draw = count()
+
+    # Reusable genetic codes by IO interface. Negative values are ~(cache index) of genetic codes in the cache.
+    candidates: dict[tuple[bytes, bytes], list[int]] = {}
+    if reuse > 0.0:
+        # The graph column is read directly so the cached genetic codes are not touched (the LRU order is unchanged).
+        for gc in gcc.values():
+            io_data: tuple[interface, interface] = gcc.graph[gc.idx].get_io()
+            candidates.setdefault((io_data[0].tobytes(), io_data[1].tobytes()), []).append(~gc.idx)
+
+    # Each node is [graph, gca node, gcb node]. Nodes are listed in the order they are completely planned.
+    nodes: list[list[Any]] = []
+    order: list[int] = []
+    roots: list[int] = []
+    # The stack has slots to fill, (parent node, 0 = GCA or 1 = GCB, IO interface, depth), & completed nodes.
+    stack: list[tuple[int | None, int, tuple[interface, interface], int] | int] = [(None, 0, EMPTY_IO, depth)] * num
+    while stack:
+        item = stack.pop()
+        if isinstance(item, int):
+            order.append(item)
+            if reuse > 0.0:
+                io_data = nodes[item][0].get_io()
+                candidates.setdefault((io_data[0].tobytes(), io_data[1].tobytes()), []).append(item)
+            continue
+        parent, gcx, io, level_depth = item
+        choice: int = next(draw)
+        key: tuple[bytes, bytes] = (io[0].tobytes(), io[1].tobytes())
+        if parent is not None and reuse_it[choice] and key in candidates:
+            nodes[parent][1 + gcx] = candidates[key][int(picks[choice] * len(candidates[key]))]
+            continue
+        node: int = len(nodes)
+        rows_str: str = rows_strs[rows_choice[choice]] if level_depth else "IAO"
+        nodes.append([graph({}, rndm=True, rng=graph_rng, rows=rows_str, io=io, **kwargs), None, None])
+        if parent is None:
+            roots.append(node)
+        else:
+            nodes[parent][1 + gcx] = node
+        stack.append(node)
+        if level_depth:
+            stack.append((node, 1, nodes[node][0].get_interface("B"), level_depth - 1))
+            stack.append((node, 0, nodes[node][0].get_interface("A"), level_depth - 1))
+
+    if len(nodes) > gcc.size():
+        raise ValueError(f"{len(nodes)} genetic codes are required but the genetic code cache can only hold {gcc.size()}.")
+
+    # Insert dependencies first. Reused & inserted genetic codes are pinned until all are inserted so none are purged.
+    reused_indices: list[int] = [~gcx for node in nodes for gcx in node[1:] if gcx is not None and gcx < 0]
+    gcc.pin(reused_indices)
+    indices: list[int] = [-1] * len(nodes)
+    for node in order:
+        _graph, gca, gcb = nodes[node]
+        if gca is None:
+            gc_dict: dict[str, Any] = DEFAULT_DYNAMIC_MEMBER_VALUES.copy()
+            gc_dict.update({"graph": _graph, "creator": CODON_CREATOR_UUID, "signature": signatures[node]})
+        else:
+            gcxs = tuple(gcc[~gcx] if gcx < 0 else gcc[indices[gcx]] for gcx in (gca, gcb))
+            gc_dict = {"graph": _graph, "gca": gcxs[0], "gcb": gcxs[1]}
+        indices[node] = gc_type(gc_dict).idx
+        gcc.pin(indices[node])
+    gcc.unpin(indices + reused_indices)
+    _logger.info(f"Created {len(nodes)} random genetic codes ({len(reused_indices)} reused from the cache) for {num} roots.")
+    return [indices[root] for root in roots]
@@ -48,13 +48,42 @@ is read only avoiding 4x as many CoW's giving a total factor of ~16x for that da
 Bit of an anti-pattern for python but in this case the savings are worth it.
 """
 
+from collections import OrderedDict, deque
 from gc import collect
 from itertools import count
 from logging import DEBUG, Logger, NullHandler, getLogger
-from typing import Any, Callable, Generator, Iterable, Iterator
+from typing import Any, Callable, Generator, Iterable, Iterator, Sequence
 
 from egp_utils.store import DDSL, dynamic_store, static_store
-from numpy import argsort, argwhere, array_equal, bitwise_and, bool_, full, iinfo, int32, int64, intp, logical_and, ndarray, uint8, zeros
+from numpy import (
+    arange,
+    argsort,
+    array,
+    argwhere,
+    array_equal,
+    asarray,
+    bincount,
+    bitwise_and,
+    bool_,
+    count_nonzero,
+    flatnonzero,
+    fromiter,
+    full,
+    integer,
+    iinfo,
+    int32,
+    int64,
+    intp,
+    logical_and,
+    ndarray,
+    searchsorted,
+    sort,
+    uint8,
+    uint16,
+    uint64,
+    unique,
+    zeros,
+)
 from numpy.typing import NDArray
 from pypgtable.pypgtable_typing import SchemaColumn
 
@@ -64,11 +93,13 @@ from ._genetic_code import (
     EMPTY_GENETIC_CODE,
     PURGED_GENETIC_CODE,
     STORE_ALL_MEMBERS,
+    STORE_GC_OBJ_MEMBERS,
     STORE_PROXY_SIGNATURE_MEMBERS,
     _genetic_code,
 )
 from .connections import connections
-from .gc_type_tools import NULL_SIGNATURE_ARRAY
+from .ep_type import interface_hashes, type_mask, unordered_interface_hash
+from .gc_type_tools import NULL_SIGNATURE_ARRAY, signatures as gc_signatures
 from .graph import EMPTY_GRAPH, graph
 from .interface import EMPTY_INTERFACE, EMPTY_INTERFACE_C, interface
 from .rows import rows
@@ -103,6 +134,11 @@ class ConfigDefinition(SchemaColumn):
 # Constants
 GCC_DEFAULT_SIZE: int = 2**4
 INT64_MAX: int = iinfo(int64).max
+PIN_COUNT_MAX: int = iinfo(uint16).max
+EMPTY_HANDLE: int = -1
+PURGED_HANDLE: int = -2
+PROXY_CACHE_DEFAULT_SIZE: int = 2**10
+PURGE_DEFAULT_FRACTION: float = 0.25
 EGC_PTR = intp(id(EMPTY_GENETIC_CODE))
 PGC_PTR = intp(id(PURGED_GENETIC_CODE))
 
@@ -188,6 +224,196 @@ def _dummy_update(ggcs: Iterable[dict[str, Any]]) -> None:
     ggcs = tuple(ggcs)
 
 
+class purge_controller:
+    """Adapt the fraction of the genetic code cache purged when it overflows.
+
+    Between purges the controller measures:
+        1. The eviction miss rate: The fraction of genetic codes added to the cache that were evicted by
+           the previous purge. A high miss rate means purges are throwing away the working set.
+        2. The purge interval: The number of genetic code accesses since the previous purge as a multiple
+           of the cache size. A short interval means purges are too frequent.
+    When the cache overflows the fraction is reduced if the miss rate is too high else increased if the
+    interval is too short. The fraction is always bounded by min_fraction and max_fraction.
+    """
+
+    def __init__(
+        self,
+        fraction: float = PURGE_DEFAULT_FRACTION,
+        min_fraction: float = 0.05,
+        max_fraction: float = 0.5,
+        miss_threshold: float = 0.1,
+        interval_threshold: float = 1.0,
+        step: float = 1.5,
+    ) -> None:
+        """Initialize the controller."""
+        assert 0.0 < min_fraction <= fraction <= max_fraction <= 1.0, "Fraction bounds are inconsistent."
+        assert step > 1.0, "Step must be greater than 1.0."
+        self.fraction: float = fraction
+        self.min_fraction: float = min_fraction
+        self.max_fraction: float = max_fraction
+        self.miss_threshold: float = miss_threshold
+        self.interval_threshold: float = interval_threshold
+        self.step: float = step
+        # First 8 bytes of the signatures evicted by the last purge as sorted int64's
+        self._ghosts: NDArray[int64] = zeros(0, dtype=int64)
+        self._inserts: int = 0
+        self._misses: int = 0
+        self._hits: int = 0
+        self._last_access: int = 0
+        self.decisions: deque[dict[str, Any]] = deque(maxlen=16)
+
+    def clear(self) -> None:
+        """Forget the measurements since the last purge."""
+        self._ghosts = zeros(0, dtype=int64)
+        self._inserts = 0
+        self._misses = 0
+        self._hits = 0
+
+    def evicted(self, signatures: NDArray[uint8]) -> None:
+        """Record the (N, 32) signatures of the genetic codes evicted by a purge."""
+        self._ghosts = sort(signatures[:, :8].copy().view("<i8").ravel())
+
+    def ghosts(self) -> int:
+        """Return the number of genetic codes evicted by the last purge that are remembered."""
+        return len(self._ghosts)
+
+    def hit(self) -> None:
+        """Record a genetic code that was requested to be added but was already in the cache."""
+        self._hits += 1
+
+    def inserted(self, signature: Any = None) -> None:
+        """Record a genetic code with signature (any bytes-like object) added to the cache.
+        If there are no ghosts (see ghosts()) the insert cannot be a miss and the signature may be None."""
+        self._inserts += 1
+        if signature is None:
+            return
+        key: int = int.from_bytes(bytes(signature)[:8], "little", signed=True)
+        pos: int = int(searchsorted(self._ghosts, key))
+        if pos < len(self._ghosts) and self._ghosts[pos] == key:
+            self._misses += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the controller statistics."""
+        return {
+            "fraction": self.fraction,
+            "hits": self._hits,
+            "inserts": self._inserts,
+            "misses": self._misses,
+            "decisions": list(self.decisions),
+        }
+
+    def update(self, access: int, size: int) -> float:
+        """Decide the fraction of the cache to purge. access is the current access sequence number."""
+        miss_rate: float = self._misses / self._inserts if self._inserts else 0.0
+        interval: float = (access - self._last_access) / size
+        if miss_rate > self.miss_threshold:
+            self.fraction = max(self.min_fraction, self.fraction / self.step)
+            action: str = "decrease"
+        elif interval < self.interval_threshold:
+            self.fraction = min(self.max_fraction, self.fraction * self.step)
+            action = "increase"
+        else:
+            action = "hold"
+        decision: dict[str, Any] = {"action": action, "fraction": self.fraction, "miss_rate": miss_rate, "interval": interval}
+        _logger.info(f"Adaptive purge: {decision}")
+        self.decisions.append(decision)
+        self._last_access = access
+        self.clear()
+        return self.fraction
+
+
+class gc_proxies:
+    """The genetic codes of a store in handle mode.
+
+    Genetic codes are identified by their index (handle) in the store. A genetic code object is a
+    lightweight proxy for its index and is only created when it is needed. The most recently used
+    proxies are cached. Empty slots read as the empty genetic code.
+    """
+
+    def __init__(self, genetic_code_type: type[_genetic_code], size: int, maxsize: int = PROXY_CACHE_DEFAULT_SIZE) -> None:
+        """Initialize the proxies."""
+        self.genetic_code_type: type[_genetic_code] = genetic_code_type
+        self.maxsize: int = maxsize
+        self.valid: NDArray[bool_] = zeros(size, dtype=bool_)
+        self._cache: OrderedDict[int, _genetic_code] = OrderedDict()
+
+    def __getitem__(self, key: Any) -> Any:
+        """Return the genetic code at an index or an array of the valid genetic codes selected by key."""
+        if isinstance(key, (int, integer)):
+            return self.proxy(int(key)) if self.valid[key] else EMPTY_GENETIC_CODE
+        indices: NDArray[intp] = arange(len(self.valid))[key]
+        return fromiter((self.proxy(idx) for idx in indices[self.valid[indices]]), dtype=_genetic_code, count=-1)
+
+    def __iter__(self) -> Iterator[_genetic_code]:
+        """Iterate over every slot."""
+        for idx, valid in enumerate(self.valid):
+            yield self.proxy(idx) if valid else EMPTY_GENETIC_CODE
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return len(self.valid)
+
+    def __setitem__(self, idx: int, obj: _genetic_code) -> None:
+        """Set the genetic code at an index. Setting the empty genetic code frees the index."""
+        idx = int(idx)
+        self._cache.pop(idx, None)
+        self.valid[idx] = obj is not EMPTY_GENETIC_CODE
+        if self.valid[idx]:
+            self._cached(idx, obj)
+
+    def _cached(self, idx: int, obj: _genetic_code) -> _genetic_code:
+        """Add obj to the proxy cache evicting the least recently used proxy if it is full."""
+        self._cache[idx] = obj
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return obj
+
+    def proxy(self, idx: int) -> _genetic_code:
+        """Return the proxy for the genetic code at idx."""
+        obj: _genetic_code | None = self._cache.get(idx)
+        if obj is None:
+            obj = self.genetic_code_type.__new__(self.genetic_code_type)
+            obj.idx = idx
+            return self._cached(idx, obj)
+        self._cache.move_to_end(idx)
+        return obj
+
+    def stats(self) -> dict[str, Any]:
+        """Return the proxy statistics."""
+        return {"proxies": len(self._cache), "maxsize": self.maxsize}
+
+
+class gc_handle_column:
+    """A genetic code member column stored as int32 genetic code handles (indices).
+    EMPTY_HANDLE & PURGED_HANDLE represent the empty & purged genetic codes.
+    """
+
+    def __init__(self, proxies: gc_proxies, size: int) -> None:
+        """Initialize the column."""
+        self.proxies: gc_proxies = proxies
+        self.handles: NDArray[int32] = full(size, int32(EMPTY_HANDLE), dtype=int32)
+
+    def __getitem__(self, idx: int) -> _genetic_code:
+        """Return the genetic code referenced at idx."""
+        handle: int = int(self.handles[idx])
+        if handle == EMPTY_HANDLE:
+            return EMPTY_GENETIC_CODE
+        if handle == PURGED_HANDLE:
+            return PURGED_GENETIC_CODE
+        return self.proxies.proxy(handle)
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return len(self.handles)
+
+    def __setitem__(self, idx: int, value: _genetic_code) -> None:
+        """Reference the genetic code value at idx."""
+        if value is PURGED_GENETIC_CODE:
+            self.handles[idx] = PURGED_HANDLE
+        else:
+            self.handles[idx] = value.idx if value.valid() else EMPTY_HANDLE
+
+
 class genetic_code_cache(static_store):
     """A memory efficient store genetic codes."""
 
@@ -205,16 +431,26 @@ class genetic_code_cache(static_store):
         genetic_code_type: type[_genetic_code],
         size: int = GCC_DEFAULT_SIZE,
         push_to_gp: Callable[[Iterable[dict[str, Any]]], None] = _dummy_update,
+        orphan_limit: int = 0,
+        adaptive_purge: purge_controller | None = None,
+        handles: bool = False,
+        proxy_cache_size: int = PROXY_CACHE_DEFAULT_SIZE,
     ) -> None:
-        """Initialize the storage."""
+        """Initialize the storage.
+        orphan_limit is the maximum number of orphaned genetic codes reclaimed by each purge (0 disables reclamation).
+        adaptive_purge tunes the fraction of the store purged when it overflows. If None 25% is purged.
+        handles selects handle mode: Genetic codes are referenced by index and genetic code objects are
+        lightweight proxies created on demand with up to proxy_cache_size of them cached.
+        """
         super().__init__(size)
         self.genetic_code_type = genetic_code_type
         _logger.debug(f"GCC genetic code type: {self.genetic_code_type}")
         self.genetic_code_type.set_gpc(self)
+        self.handles: bool = handles
+        self.proxy_cache_size: int = proxy_cache_size
 
         # Static store members
-        for member in DEFAULT_STATIC_MEMBER_VALUES:
-            setattr(self, member, full(self._size, *static_val_type(member)))
+        self._static_members()
         # 84 bytes per entry (usually 2**20 so 88080384) 13 members at 112 bytes each = 1456 bytes + 56 bytes for the base class
         # Utility members below = 17 bytes = 17825792 bytes
         # Total = 101 MB + graphs
@@ -226,17 +462,22 @@ class genetic_code_cache(static_store):
         # Utility static store members
         # Access sequence of genetic codes. Used to determine which ones were least recently used.
         self.access_sequence: NDArray[int64] = full(self._size, INT64_MAX, dtype=int64)
-        # The genetic codes themselves
-        self.genetic_code: NDArray[Any] = full(self._size, EMPTY_GENETIC_CODE, dtype=_genetic_code)
         # Status byte for each genetic code.
         # 0 = dirty bit. If set then the genetic code has been modified and needs to be written to the GP.
-        # 1:7 = reserved (read and written as 0)
+        # 1 = interface bit. If set then the genetic code IO interface hashes are in the interface index
+        #     and the IO type masks are valid.
+        # 2:7 = reserved (read and written as 0)
         self.status_byte: NDArray[uint8] = zeros(self._size, dtype=uint8)
+        # Pin reference count for each genetic code. Pinned genetic codes are never purged.
+        self.pin_count: NDArray[uint16] = zeros(self._size, dtype=uint16)
+        # Ordered & unordered interface hashes of the genetic code IO & the index of them
+        self._interface_index_members()
 
         # Common dynamic store indices. -1 means not in the common dynamic store.
         self.common_ds_idx: NDArray[int32] = full(self._size, int32(-1), dtype=int32)
         # Not static store members: Must begin with '_'
-        self._common_ds = dynamic_store(GCC_ds_common, max((size.bit_length() - 7, DDSL)))
+        self._ds_lsb: int = max((size.bit_length() - 7, DDSL))
+        self._common_ds = dynamic_store(GCC_ds_common, self._ds_lsb)
         # Set up dynamic store member index wrappers
         # Need a new class for each member to avoid conflict on class members
         self.common_ds_index_wrapper: type[ds_index_wrapper] = _ds_index_wrapper_factory()
@@ -251,6 +492,13 @@ class genetic_code_cache(static_store):
         # Method to push genetic codes to the gene pool when the GCC is full
         self._push_to_gp: Callable[[Iterable[dict[str, Any]]], None] = push_to_gp
 
+        # Orphan reclamation
+        self.orphan_limit: int = orphan_limit
+        self._orphans_reclaimed: int = 0
+
+        # Purge fraction control
+        self._adaptive_purge: purge_controller | None = adaptive_purge
+
     def __delitem__(self, idx: int) -> None:
         """Free the specified index. Note this does not try and remove all references as purge() does.
         It also does not push to the GP. It is intended to be used when the genetic code is no longer needed.
@@ -258,9 +506,11 @@ class genetic_code_cache(static_store):
         for member, value in DEFAULT_STATIC_MEMBER_VALUES.items():
             getattr(self, member)[idx] = value
 
+        self._unindex_interface(idx)
         self.access_sequence[idx] = INT64_MAX
         self.genetic_code[idx] = EMPTY_GENETIC_CODE
         self.status_byte[idx] = 0
+        self.pin_count[idx] = 0
         super().__delitem__(idx)
         if self.common_ds_idx[idx] != -1:
             del self._common_ds[self.common_ds_idx[idx]]
@@ -284,6 +534,89 @@ class genetic_code_cache(static_store):
     def __setitem__(self, _: str, __: Any) -> None:
         raise RuntimeError("The genetic code store does not support setting members directly. Use add().")
 
+    def _reclaim_orphans(self, purged: set[intp], orphans: set[intp]) -> set[intp]:
+        """Return the indices of orphaned genetic codes that can be deleted along with the purged genetic codes.
+        An orphan is reclaimed if no remaining genetic code needs it, it is clean and it is not pinned.
+        Reclaiming an orphan may orphan its own dependencies so reclamation cascades until there are no
+        more orphans or orphan_limit genetic codes have been reclaimed. Oldest orphans are reclaimed first.
+        """
+        reclaimed: set[intp] = set()
+        while orphans and len(reclaimed) < self.orphan_limit:
+            removed: set[intp] = purged | reclaimed
+            dependents: NDArray[intp] = self.dependents(removed)
+            candidates: list[intp] = sorted(
+                (idx for idx in orphans if idx >= 0 and idx not in removed and not dependents[idx]),
+                key=lambda x: self.access_sequence[x],
+            )
+            batch: set[intp] = set(
+                [idx for idx in candidates if not self.pin_count[idx] and not self.status_byte[idx] & 1][
+                    : self.orphan_limit - len(reclaimed)
+                ]
+            )
+            if not batch:
+                break
+            _logger.debug(f"Reclaiming {len(batch)} orphaned genetic codes.")
+            orphans = set(getattr(self, member)[idx].idx for idx in batch for member in STORE_GC_OBJ_MEMBERS)
+            for gc in self.values():
+                if gc.idx not in removed and gc.idx not in batch:
+                    orphans.update(gc.purge(batch))
+            reclaimed |= batch
+        self._orphans_reclaimed += len(reclaimed)
+        _logger.info(f"Reclaimed {len(reclaimed)} orphaned genetic codes.")
+        return reclaimed
+
+    def _interface_index_members(self) -> None:
+        """Create the interface hash members and an empty interface index."""
+        self.ordered_io_hash: NDArray[int64] = zeros(self._size, dtype=int64)
+        self.unordered_io_hash: NDArray[int64] = zeros(self._size, dtype=int64)
+        # Bit masks of the sets of input & output EP types (see ep_type.type_mask()). Valid if status byte bit 1 is set.
+        self.input_type_mask: NDArray[uint64] = zeros(self._size, dtype=uint64)
+        self.output_type_mask: NDArray[uint64] = zeros(self._size, dtype=uint64)
+        # Not static store members: Interface hash to the set of indices of genetic codes with that hash.
+        self._ordered_io_index: dict[int, set[int]] = {}
+        self._unordered_io_index: dict[int, set[int]] = {}
+
+    def _member_indices(self, member: str, mask: NDArray[bool_]) -> NDArray[intp]:
+        """Return the indices of the genetic codes referenced by member for the entries selected by mask.
+        Empty & purged genetic codes have negative indices.
+        """
+        column: Any = getattr(self, member)
+        if self.handles:
+            return column.handles[mask].astype(intp)
+        return fromiter((gc.idx for gc in column[mask]), dtype=intp)
+
+    def _static_members(self) -> None:
+        """Create the static store members and the genetic code objects (or proxies)."""
+        if self.handles:
+            self.genetic_code: Any = gc_proxies(self.genetic_code_type, self._size, self.proxy_cache_size)
+        else:
+            self.genetic_code = full(self._size, EMPTY_GENETIC_CODE, dtype=_genetic_code)
+        for member in DEFAULT_STATIC_MEMBER_VALUES:
+            if self.handles and member in STORE_GC_OBJ_MEMBERS:
+                setattr(self, member, gc_handle_column(self.genetic_code, self._size))
+            else:
+                setattr(self, member, full(self._size, *static_val_type(member)))
+
+    def _unindex_interface(self, idx: int) -> None:
+        """Remove the genetic code at idx from the interface index if it is in it."""
+        if self.status_byte[idx] & 2:
+            for index, ihash in ((self._ordered_io_index, self.ordered_io_hash), (self._unordered_io_index, self.unordered_io_hash)):
+                indices: set[int] = index[int(ihash[idx])]
+                indices.discard(idx)
+                if not indices:
+                    del index[int(ihash[idx])]
+            self.input_type_mask[idx] = 0
+            self.output_type_mask[idx] = 0
+            self.status_byte[idx] &= 0xFD
+
+    def _valid_mask(self) -> NDArray[bool_]:
+        """Return a mask of the indices that hold a genetic code (not empty or purged)."""
+        if self.handles:
+            return self.genetic_code.valid.copy()
+        # This method is about 300x faster than list comprehension with if comparison
+        ptrs = ndarray(self._size, dtype=intp, buffer=self.genetic_code.data)
+        return logical_and(ptrs != EGC_PTR, ptrs != PGC_PTR)
+
     def add(self, ggc: dict[str, Any]) -> int:
         """Add a dict type genetic code to the store. NOTE: no duplicate signature checking is done.
         See update()."""
@@ -296,6 +629,84 @@ class genetic_code_cache(static_store):
         self.genetic_code[idx] = obj
         return idx
 
+    def batch_signatures(self, indices: Sequence[int] | NDArray[intp] | None = None) -> NDArray[uint8]:
+        """Return the (N, 32) signatures of the genetic codes at indices (default all genetic codes in the store).
+        Signatures already known (leaf genetic codes have them stored) are not recalculated. The others are
+        calculated once each in dependency order one level at a time.
+        NOTE: Unlike signature() this does not update the access sequence.
+        """
+        _indices: NDArray[intp] = flatnonzero(self._valid_mask()) if indices is None else asarray(indices, dtype=intp).ravel()
+        known: dict[int, NDArray[uint8]] = {}
+        levels: dict[int, int] = {}
+
+        # Find the level of each genetic code that needs its signature calculated: Dependencies must be done first.
+        stack: list[int] = [int(idx) for idx in _indices]
+        while stack:
+            idx: int = stack[-1]
+            if idx in known or idx in levels:
+                stack.pop()
+            elif self.common_ds_idx[idx] != -1:
+                known[idx] = self._common_ds_members["signature"][idx]
+                stack.pop()
+            else:
+                children: list[int] = [gcx.idx for gcx in (self.gca[idx], self.gcb[idx]) if gcx.valid()]  # type: ignore
+                pending: list[int] = [child for child in children if child not in known and child not in levels]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    stack.pop()
+                    levels[idx] = max((levels.get(child, 0) for child in children), default=0) + 1
+
+        by_level: dict[int, list[int]] = {}
+        for idx, level in levels.items():
+            by_level.setdefault(level, []).append(idx)
+        for level in sorted(by_level):
+            args: list[tuple[Any, ...]] = []
+            for idx in by_level[level]:
+                _graph: graph = self.graph[idx]  # type: ignore
+                io_data: tuple[interface, interface] = _graph.get_io()
+                gca_sig, gcb_sig = (known.get(gcx.idx, NULL_SIGNATURE_ARRAY) for gcx in (self.gca[idx], self.gcb[idx]))  # type: ignore
+                args.append((gca_sig.data, gcb_sig.data, io_data[0].data, io_data[1].data, _graph.connections.data))
+            for idx, sig in zip(by_level[level], gc_signatures(args)):
+                known[idx] = sig
+        _logger.debug(f"Batch calculated {len(levels)} signatures in {len(by_level)} levels.")
+        return array([known[int(idx)] for idx in _indices], dtype=uint8).reshape(len(_indices), 32)
+
+    def compact_dynamic_store(self) -> int:
+        """Relocate the live dynamic store entries to a dense prefix of a new dynamic store.
+        The common dynamic store indices are rewritten and the blocks of the old dynamic store are
+        released. Relative order of entries is preserved. Returns the number of entries relocated.
+        """
+        leaves: NDArray[intp] = flatnonzero(self.common_ds_idx != -1)
+        leaves = leaves[argsort(self.common_ds_idx[leaves], kind="stable")]
+        old_ds: dynamic_store = self._common_ds
+        new_ds: dynamic_store = dynamic_store(GCC_ds_common, self._ds_lsb)
+        for idx in leaves:
+            ds_idx: int = new_ds.next_index()
+            for member in new_ds.members:
+                new_ds[member][ds_idx] = old_ds[member][self.common_ds_idx[idx]]
+            self.common_ds_idx[idx] = ds_idx
+        self._common_ds = new_ds
+        self.common_ds_index_wrapper.dstore = new_ds
+        del old_ds
+        _logger.info(f"Compacted {len(leaves)} dynamic store entries.")
+        _logger.debug(f"{collect()} unreachable objects not collected after compaction.")
+        return len(leaves)
+
+    def dependents(self, exclude: set[intp] | None = None) -> NDArray[intp]:
+        """Return the number of non-leaf genetic codes in the store that need each genetic code.
+        A leaf genetic code has its derived values stored and so does not need its GCA or GCB.
+        Genetic codes with indices in exclude are not counted as dependents.
+        """
+        needers: NDArray[bool_] = logical_and(self._valid_mask(), self.common_ds_idx == -1)
+        if exclude:
+            needers[fromiter(exclude, dtype=intp, count=len(exclude))] = False
+        counts: NDArray[intp] = zeros(self._size, dtype=intp)
+        for member in ("gca", "gcb"):
+            indices: NDArray[intp] = self._member_indices(member, needers)
+            counts += bincount(indices[indices >= 0], minlength=self._size)
+        return counts
+
     def dicts(self) -> Iterator[dict[str, Any]]:
         """Return the genetic codes as dictionaries."""
         for gc in self.values():
@@ -321,6 +732,50 @@ class genetic_code_cache(static_store):
         assert len(found_set) == len(sigs), f"Signatures not found: {[sig.tobytes().hex() for idx, sig in sigs if idx not in found_set]}"
         return retval
 
+    def find_interface(self, inputs: Sequence[int], outputs: Sequence[int], ordered: bool = True) -> NDArray[intp]:
+        """Return the sorted indices of the genetic codes with the IO interface of inputs & outputs EP types.
+        If ordered is True the order of the endpoints must match exactly else any order of the same types matches.
+        NOTE: Interface hashes may collide. Candidates should be checked if an exact match is required.
+        """
+        if ordered:
+            indices: set[int] = self._ordered_io_index.get(interface_hashes(inputs, outputs)[0], set())
+        else:
+            indices = self._unordered_io_index.get(unordered_interface_hash(inputs, outputs), set())
+        return sort(fromiter(indices, dtype=intp, count=len(indices)))
+
+    def find_type_sets(self, inputs: Iterable[int] | None = None, outputs: Iterable[int] | None = None) -> NDArray[intp]:
+        """Return the sorted indices of the genetic codes whose set of input types is a subset of inputs
+        and whose set of output types is a superset of outputs. None matches any set.
+        """
+        match: NDArray[bool_] = (self.status_byte & 2).astype(bool_)
+        if inputs is not None:
+            match &= (self.input_type_mask & uint64(~type_mask(inputs) & 0xFFFFFFFFFFFFFFFF)) == 0
+        if outputs is not None:
+            omask: uint64 = uint64(type_mask(outputs))
+            match &= (self.output_type_mask & omask) == omask
+        return flatnonzero(match)
+
+    def index_interface(self, idx: int, grph: graph) -> None:
+        """(Re)index the IO interface of the genetic code at idx with graph grph.
+        DO NOT USE outside of the genetic_code classes."""
+        self._unindex_interface(idx)
+        inputs, outputs = grph.get_io()
+        ordered, unordered = interface_hashes(inputs.tolist(), outputs.tolist())
+        self.ordered_io_hash[idx] = ordered
+        self.unordered_io_hash[idx] = unordered
+        self._ordered_io_index.setdefault(ordered, set()).add(idx)
+        self._unordered_io_index.setdefault(unordered, set()).add(idx)
+        self.input_type_mask[idx] = type_mask(inputs.tolist())
+        self.output_type_mask[idx] = type_mask(outputs.tolist())
+        self.status_byte[idx] |= 2
+
+    def inserted(self, idx: int) -> None:
+        """Record the genetic code at idx has been added to the store for the adaptive purge controller.
+        DO NOT USE outside of the genetic_code classes."""
+        if self._adaptive_purge is not None:
+            # The signature is only needed (and calculated) if the genetic code could have been evicted by the last purge.
+            self._adaptive_purge.inserted(self.batch_signatures([idx])[0] if self._adaptive_purge.ghosts() else None)
+
     def leaves(self) -> Iterator[intp]:
         """Return each index of the leaf genetic codes."""
         valid: NDArray[intp] = argwhere(self.common_ds_idx != -1).flatten()
@@ -338,7 +793,10 @@ class genetic_code_cache(static_store):
         try:
             idx: int = super().next_index()
         except OverflowError:
-            self.purge()
+            if self._adaptive_purge is None:
+                self.purge()
+            else:
+                self.purge(self._adaptive_purge.update(next(self.genetic_code_type.access_number), self._size))
             idx = super().next_index()
         return idx
 
@@ -352,6 +810,9 @@ class genetic_code_cache(static_store):
             6. Duplicate graphs can be deleted.
         Try to minimize memory overhead by doing one at a time.
         NOTE: Optimizing the GCC does not delete any genetic codes.
+        NOTE: Optimizing the GCC freezes the graph of every genetic code in it as interfaces, rows & connections
+        are shared between graphs. Modifying the rows or connections of an optimized graph in place raises a
+        ValueError: Create a new graph (e.g. from graph.json_graph()) to make a modified genetic code.
         """
         # Make a dictionary of signatures to indices in the GCC
         sig_to_idx: dict[memoryview, int] = {gc["signature"].tobytes(): idx for idx, gc in enumerate(self.genetic_code) if gc.valid()}
@@ -368,7 +829,7 @@ class genetic_code_cache(static_store):
             indices = tuple(sig_to_idx.get(self.genetic_code[leaf][field].tobytes(), -1) for field in STORE_PROXY_SIGNATURE_MEMBERS)
             for field, idx in (x for x in zip(STORE_PROXY_SIGNATURE_MEMBERS, indices) if x[1] >= 0):
                 _logger.debug(f"Leaf {leaf} has a dependent in the GCC at index {idx} for field {field}")
-                self[leaf][field] = self.genetic_code[idx]
+                self[leaf][field.removesuffix("_signature")] = self.genetic_code[idx]
             if all(idx >= 0 for idx in indices):
                 del self._common_ds[self.common_ds_idx[leaf]]
                 self.common_ds_idx[leaf] = -1
@@ -378,6 +839,9 @@ class genetic_code_cache(static_store):
         # #3
         # Remove duplicate interfaces
         # NOTE: The hash of an interface is not the same as the instance of an interface.
+        # Graphs are frozen once their interfaces are deduplicated as interfaces are now shared. Frozen graphs
+        # cache their hashes making steps #4 to #6 (and subsequent optimizations) cheap. Frozen rows cannot
+        # be modified but their interfaces are still candidates to be referenced.
         _count: int = 0
         iface_to_iface: dict[interface, interface] = {}
         for gc in self.values():
@@ -386,9 +850,10 @@ class genetic_code_cache(static_store):
                 if iface is not EMPTY_INTERFACE_C and iface is not EMPTY_INTERFACE:
                     if iface not in iface_to_iface:
                         iface_to_iface[iface] = iface
-                    else:
+                    elif not _rows.frozen():
                         _rows[row] = iface_to_iface[iface]
                         _count += 1
+            gc["graph"].freeze()
         _logger.info(f"Removed {_count} duplicate interfaces.")
 
         # #4
@@ -436,24 +901,45 @@ class genetic_code_cache(static_store):
         _logger.info(f"Removed {_count} duplicate graphs.")
         collect()
 
-    def purge(self, fraction: float = 0.25) -> None:
+    def pin(self, indices: int | Sequence[int] | NDArray[intp]) -> None:
+        """Pin the genetic codes at indices so they are never purged.
+        Pins are reference counted: an index pinned N times must be unpinned N times.
+        Duplicate indices are counted once for each occurrence.
+        """
+        _indices, counts = unique(asarray(indices, dtype=intp).ravel(), return_counts=True)
+        if (self.pin_count[_indices].astype(int64) + counts > PIN_COUNT_MAX).any():
+            raise OverflowError(f"Pin count cannot exceed {PIN_COUNT_MAX}.")
+        self.pin_count[_indices] += counts.astype(uint16)
+
+    def purge(self, fraction: float = PURGE_DEFAULT_FRACTION) -> None:
         """Push dirty GC's to the GP and purge the store of unused data if less
-        than fraction empty space is available."""
+        than fraction empty space is available. Pinned genetic codes are not purged."""
         # Simply marking the data as unused is insufficient because the purged
         # data may be referenced by other objects. The purge function ensures that
         # all references to the purged data in the store are removed.
-        num_to_purge: int = int(self._size * fraction)
+        # At least one genetic code is purged to guarantee there is space for the next one.
+        num_to_purge: int = max(int(self._size * fraction), 1)
         _logger.info(f"Purging {int(100 * fraction)}% = ({num_to_purge} of {self._size}) of the store")
-        purge_candidates = set(argsort(self.access_sequence)[:num_to_purge])
-        ptrs = ndarray(self._size, dtype=intp, buffer=self.genetic_code.data)
-        purge_indices: set[intp] = purge_candidates.intersection(argwhere(logical_and(ptrs != EGC_PTR, ptrs != PGC_PTR)).flatten())
+        lru_order: NDArray[intp] = argsort(self.access_sequence)
+        purge_candidates = set(lru_order[self.pin_count[lru_order] == 0][:num_to_purge])
+        purge_indices: set[intp] = purge_candidates.intersection(argwhere(self._valid_mask()).flatten())
         if _LOG_DEEP_DEBUG:
             _logger.info(f"Purging indices: {purge_indices}")
             _logger.debug(f"Access sequence numbers {self.access_sequence}")
         # Convert GC's with purged dependents into leaf nodes
         gc: _genetic_code
-        for gc in self.genetic_code:
-            gc.purge(purge_indices)
+        orphans: set[intp] = set()
+        for gc in self.values():
+            if gc.idx not in purge_indices:
+                orphans.update(gc.purge(purge_indices))
+        if self.orphan_limit:
+            # The dependencies of the purged GC's have lost a dependent too.
+            orphans.update(getattr(self, member)[idx].idx for idx in purge_indices for member in STORE_GC_OBJ_MEMBERS)
+            purge_indices |= self._reclaim_orphans(purge_indices, orphans)
+
+        # Remember what was evicted to measure the miss rate. Batch signatures do not disturb the LRU order.
+        if self._adaptive_purge is not None and purge_indices:
+            self._adaptive_purge.evicted(self.batch_signatures(list(purge_indices)))
 
         # Push dirty genetic codes to the GP and make them clean again
         dirty_gcs: NDArray = self.genetic_code[bitwise_and(self.status_byte, 1).astype(bool_)]
@@ -472,17 +958,20 @@ class genetic_code_cache(static_store):
         are deleted which pushes the genetic codes to the genomic library as required.
         """
         self.purge(fraction=1.0)
+        if self._adaptive_purge is not None:
+            self._adaptive_purge.clear()
         super().reset(size)
         # Static store members
-        for member in DEFAULT_STATIC_MEMBER_VALUES:
-            setattr(self, member, full(self._size, *static_val_type(member)))
+        self._static_members()
 
         # Utility static store members
         # Access sequence of genetic codes. Used to determine which ones were least recently used.
         self.access_sequence: NDArray[int64] = full(self._size, INT64_MAX, dtype=int64)
         # Common dynamic store indices. -1 means not in the common dynamic store.
         self.common_ds_idx: NDArray[int32] = full(self._size, int32(-1), dtype=int32)
-        self.genetic_code: NDArray[Any] = full(self._size, EMPTY_GENETIC_CODE, dtype=_genetic_code)
+        self.status_byte: NDArray[uint8] = zeros(self._size, dtype=uint8)
+        self.pin_count: NDArray[uint16] = zeros(self._size, dtype=uint16)
+        self._interface_index_members()
 
         # Re-initialize the common dynamic store wrapper
         for index_wrapper in self._common_ds_members.values():
@@ -500,20 +989,53 @@ class genetic_code_cache(static_store):
         for gc in self.values():
             yield gc["signature"]
 
+    def stats(self) -> dict[str, Any]:
+        """Return a dictionary of statistics about the store."""
+        # Fragmentation of the common dynamic store is the fraction of unused entries below the highest used entry.
+        num_ds_entries: int = int(count_nonzero(self.common_ds_idx != -1))
+        ds_span: int = int(self.common_ds_idx.max()) + 1 if num_ds_entries else 0
+        return {
+            "size": self._size,
+            "used": len(self),
+            "pinned": int(count_nonzero(self.pin_count)),
+            "pin_references": int(self.pin_count.sum()),
+            "orphans_reclaimed": self._orphans_reclaimed,
+            "ds_entries": num_ds_entries,
+            "ds_span": ds_span,
+            "ds_fragmentation": 1.0 - num_ds_entries / ds_span if ds_span else 0.0,
+            "handles": self.handles,
+            "proxies": self.genetic_code.stats() if self.handles else None,
+            "purge": {"fraction": PURGE_DEFAULT_FRACTION} if self._adaptive_purge is None else self._adaptive_purge.stats(),
+        }
+
+    def unpin(self, indices: int | Sequence[int] | NDArray[intp]) -> None:
+        """Release one pin reference for each occurrence of an index in indices."""
+        _indices, counts = unique(asarray(indices, dtype=intp).ravel(), return_counts=True)
+        if (self.pin_count[_indices] < counts).any():
+            raise ValueError(f"Cannot unpin indices that are not pinned: {_indices[self.pin_count[_indices] < counts]}")
+        self.pin_count[_indices] -= counts.astype(uint16)
+
     def update(self, ggcs: Iterable[dict[str, Any]]) -> list[int]:
         """Add an iterable dict type genetic code to the store checking for signatures that
         are already in the store. NOTE: The ggcs iterable is not checked for duplicates."""
         signatures = set(s.tobytes() for s in self.signatures())
         size_before: int = len(self)
         _ggcs: Generator[dict[str, Any], None, None] = (o for o in ggcs if "signature" in o)
-        retval: list[int] = [self.genetic_code_type(o).idx for o in _ggcs if o["signature"].tobytes() not in signatures]
+        if self._adaptive_purge is None:
+            retval: list[int] = [self.genetic_code_type(o).idx for o in _ggcs if o["signature"].tobytes() not in signatures]
+        else:
+            # Inserts are recorded by the genetic code when it is created.
+            retval = []
+            for ggc in _ggcs:
+                if ggc["signature"].tobytes() in signatures:
+                    self._adaptive_purge.hit()
+                else:
+                    retval.append(self.genetic_code_type(ggc).idx)
         size_after: int = len(self)
         _logger.info(f"Added {size_after - size_before} genetic codes to the GCC")
         return retval
 
     def values(self) -> Iterator[_genetic_code]:
         """Return the genetic codes."""
-        # This method is about 300x faster than list comprehension with if comparison
-        ptrs = ndarray(self._size, dtype=intp, buffer=self.genetic_code.data)
-        valid: NDArray = self.genetic_code[logical_and(ptrs != EGC_PTR, ptrs != PGC_PTR)]
+        valid: NDArray = self.genetic_code[self._valid_mask()]
         yield from valid
@@ -3,20 +3,42 @@
 # Graph
 
 The graph class is a collection of rows and connections between the rows.
+
+# Packed Binary Format
+
+graph.to_bytes() encodes a graph in a compact little endian binary format for storage in the gene pool
+and transfer between processes. graph.from_buffer() decodes it with the interfaces and connections
+as (read only) numpy views of the buffer i.e. without copying. The layout is:
+
+    Header (22 bytes): uint16 version, uint16 valid rows bitmask (bit n is row index n),
+        uint16 number of connections N, 8x uint16 lengths of the I, C, A, B source & A, B, O, U destination interfaces
+    Types: int16 endpoint types of the I, C, A, B source & A, B, O, U destination interfaces (in that order)
+    Connections: 4xN uint8 connections array (C order)
+    Constants: For each row C endpoint a uint16 length followed by the utf-8 encoded value
+
+Rows F & P are not stored: Row F is always the same interface and row P is row O when row F is valid.
 """
 
 from __future__ import annotations
 
+from hashlib import blake2b
 from logging import DEBUG, Logger, NullHandler, getLogger
-from random import seed
-from typing import cast
+from random import Random, seed
+from struct import Struct
+from typing import Self, cast
+
+from numpy import array, bool_, concatenate, cumsum, frombuffer, intp, ndarray, uint8
+from numpy.typing import NDArray
 
-from .connections import connections, EMPTY_CONNECTIONS
+from .common import GLOBAL_RANDOM
+from .connections import ConnectionPlan, connections, EMPTY_CONNECTIONS
 from .egp_typing import ALL_ROWS_STR, ROWS, ROWS_INDEXED, DestinationRow, DstRowIndex, EndPointType, JSONGraph, Row, SrcRowIndex
 from .ep_type import EP_TYPE_VALUES_TUPLE
+from .graph_parser import parsed_json_graph, parse_json_graph
+from .immutable import DIGEST_SIZE, digest_hash
 from .mermaid_charts import MERMAID_IGRAPH_CLASS_DEF_STR, MERMAID_IGRAPH_COLORS
 from .rows import rows, EMPTY_ROWS
-from .interface import EMPTY_INTERFACE, interface
+from .interface import EMPTY_INTERFACE, EMPTY_INTERFACE_C, INTERFACE_F, interface, interface_c
 from .internal_graph import internal_graph_from_JSONGraph, internal_graph
 
 
@@ -26,36 +48,65 @@ _logger.addHandler(NullHandler())
 _LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
 
 
+# Packed binary format. See module docstring.
+PACKED_GRAPH_VERSION: int = 1
+_PACKED_HEADER: Struct = Struct("<HHH8H")
+_PACKED_LENGTH: Struct = Struct("<H")
+_PACKED_ROWS: tuple[SrcRowIndex | DstRowIndex, ...] = (
+    SrcRowIndex.I,
+    SrcRowIndex.C,
+    SrcRowIndex.A,
+    SrcRowIndex.B,
+    DstRowIndex.A,
+    DstRowIndex.B,
+    DstRowIndex.O,
+    DstRowIndex.U,
+)
+
+
 class graph:
-    """A graph is a collection of rows and connections between the rows."""
+    """A graph is a collection of rows and connections between the rows.
+    A graph is frozen when its rows and connections are frozen. The hash & digest of a frozen graph
+    are cached until the rows or connections are replaced.
+    """
 
     def __init__(self, json_graph: JSONGraph, **kwargs) -> None:
         """Initialize the graph from a JSON graph and GCA & GCB genetic code instances unless rndm is True.
         If rndm is True then the graph is initialised with random (valid) data. The following keyword
         arguments are supported:
         - rndm: bool = False: If True then the graph is initialised with random (valid) data.
-        - rseed: int = None: The random seed to use if rndm is True.
+        - rseed: int = None: The random seed to use if rndm is True. Seeds the random module global instance.
+        - rng: Random = None: An independent random.Random instance to use if rndm is True (rseed is ignored).
         - rows: str = ALL_ROWS_STR: The rows to use if rndm is True.
         - ep_types: tuple[EndPointType, ...] = EP_TYPE_VALUES_TUPLE: The endpoint types to use if rndm is True.
         - max_eps: int = 8: The maximum number of endpoints to use if rndm is True.
         - verify: bool = True: If True then the graph is verified after initialisation.
+        - plan: ConnectionPlan = None: If rndm is True then the connections satisfy the plan (see connections)
+          and are otherwise random.
         """
+        self._digest: bytes | None = None
         if kwargs.get("rndm", False):
-            if kwargs.get("rseed", None) is not None:
+            rng: Random = kwargs.get("rng", GLOBAL_RANDOM)
+            if kwargs.get("rseed", None) is not None and rng is GLOBAL_RANDOM:
                 seed(kwargs["rseed"])
             rows_str: str = kwargs.get("rows", ALL_ROWS_STR)
             ep_types: tuple[EndPointType, ...] = kwargs.get("ep_types", EP_TYPE_VALUES_TUPLE)
             max_eps: int = kwargs.get("max_eps", 8)
             verify: bool = kwargs.get("verify", False)
             io: tuple[interface, interface] = kwargs.get("io", (EMPTY_INTERFACE, EMPTY_INTERFACE))
-            self.rows: rows = rows({})
-            self.rows.random(rows_str, max_eps, ep_types, io)
-            self.connections: connections = connections({}, rndm=True, rows=self.rows, data={})
+            self.rows = rows({})
+            self.rows.random(rows_str, max_eps, ep_types, io, rng)
+            if "plan" in kwargs:
+                self.connections = connections({}, plan=kwargs["plan"], rows=self.rows, data={}, rng=rng)
+            else:
+                self.connections = connections({}, rndm=True, rows=self.rows, data={}, rng=rng)
             if verify:
                 self.assertions()
         elif json_graph:
-            self.rows: rows = rows(json_graph=json_graph, **kwargs)
-            self.connections: connections = connections(json_graph=json_graph)
+            # The JSON graph is parsed once for both the rows and the connections
+            parsed: parsed_json_graph = parse_json_graph(json_graph)
+            self.rows = rows(json_graph=json_graph, parsed=parsed, **kwargs)
+            self.connections = connections(json_graph=json_graph, parsed=parsed)
         else:
             self.rows = EMPTY_ROWS
             self.connections = EMPTY_CONNECTIONS
@@ -75,8 +126,96 @@ class graph:
         return self.rows == __value.rows and self.connections == __value.connections
 
     def __hash__(self) -> int:
-        """Return the hash of the graph."""
-        return hash((hash(self.rows), hash(self.connections)))
+        """Return the hash of the graph. Cached if the graph is frozen."""
+        return digest_hash(self.digest())
+
+    @property
+    def connections(self) -> connections:
+        """The connections between the rows."""
+        return self._connections
+
+    @connections.setter
+    def connections(self, value: connections) -> None:
+        """Replacing the connections invalidates the cached digest."""
+        self._connections: connections = value
+        self._digest = None
+
+    @property
+    def rows(self) -> rows:
+        """The rows of the graph."""
+        return self._rows
+
+    @rows.setter
+    def rows(self, value: rows) -> None:
+        """Replacing the rows invalidates the cached digest."""
+        self._rows: rows = value
+        self._digest = None
+
+    def digest(self) -> bytes:
+        """Return the stable digest of the graph. Cached if the graph is frozen."""
+        if self._digest is not None:
+            return self._digest
+        _digest: bytes = blake2b(self.rows.digest() + self.connections.digest(), digest_size=DIGEST_SIZE).digest()
+        if self.frozen():
+            self._digest = _digest
+        return _digest
+
+    def freeze(self) -> Self:
+        """Make the rows & connections of the graph immutable."""
+        self.rows.freeze()
+        self.connections.freeze()
+        return self
+
+    def frozen(self) -> bool:
+        """Return True if the rows & connections of the graph are immutable."""
+        return self.rows.frozen() and self.connections.frozen()
+
+    @classmethod
+    def from_buffer(cls, buf: bytes | bytearray | memoryview) -> graph:
+        """Decode a graph from the packed binary format (see to_bytes()). The interfaces & connections
+        are views of buf (no data is copied) and the graph is frozen."""
+        version, valid, num_cons, *lengths = _PACKED_HEADER.unpack_from(buf)
+        if version != PACKED_GRAPH_VERSION:
+            raise ValueError(f"Packed graph version {version} is not supported (expected {PACKED_GRAPH_VERSION}).")
+        _rows: rows = rows({})
+        offset: int = _PACKED_HEADER.size
+        for row, length in zip(_PACKED_ROWS, lengths):
+            if valid & (1 << row):
+                _rows[row] = frombuffer(buf, dtype="<i2", count=length, offset=offset).view(
+                    interface_c if row == SrcRowIndex.C else interface
+                )
+                offset += 2 * length
+        _connections: connections = frombuffer(buf, dtype=uint8, count=4 * num_cons, offset=offset).reshape(4, num_cons).view(connections)
+        offset += 4 * num_cons
+        if valid & (1 << SrcRowIndex.C):
+            values: list[str] = []
+            for _ in range(lengths[1]):
+                (length,) = _PACKED_LENGTH.unpack_from(buf, offset)
+                offset += _PACKED_LENGTH.size
+                values.append(bytes(buf[offset : offset + length]).decode("utf-8"))
+                offset += length
+            _rows[SrcRowIndex.C].values = values
+        if valid & (1 << DstRowIndex.F):
+            _rows[DstRowIndex.F] = INTERFACE_F
+            _rows[DstRowIndex.P] = _rows[DstRowIndex.O]
+        retval: graph = cls({})
+        retval.rows = _rows.freeze()
+        retval.connections = _connections.freeze()
+        return retval
+
+    def to_bytes(self) -> bytes:
+        """Encode the graph in the packed binary format. See the module docstring."""
+        _rows: rows = self.rows
+        valid: int = sum(1 << row for row in range(len(_rows)) if _rows.valid(row))  # type: ignore
+        ifaces: list[interface] = [_rows[row] for row in _PACKED_ROWS]
+        header: bytes = _PACKED_HEADER.pack(PACKED_GRAPH_VERSION, valid, self.connections.shape[1], *(len(iface) for iface in ifaces))
+        types: list[bytes] = [iface.astype("<i2").tobytes() for iface in ifaces]
+        values: list[bytes] = []
+        if _rows[SrcRowIndex.C] is not EMPTY_INTERFACE_C:
+            for value in _rows[SrcRowIndex.C].values:
+                encoded: bytes = value.encode("utf-8")
+                values.append(_PACKED_LENGTH.pack(len(encoded)) + encoded)
+        return b"".join((header, *types, self.connections.astype(uint8).tobytes(), *values))
 
     def json_graph(self) -> JSONGraph:
         """Return the JSON graph representation of the graph."""
@@ -121,6 +260,15 @@ class graph:
         ]
         return header_list + rows_str_list + connections_str_list + [""] + linkstyle_list + [""] + classes_list, []
 
+    def planned(self, plan: ConnectionPlan, rng: Random = GLOBAL_RANDOM) -> graph:
+        """Return a new graph with the same rows (other than row U) and connections that satisfy the plan
+        & are otherwise random. Random choices are made with rng.
+        """
+        grph: graph = graph({})
+        grph.rows = self.rows.copy()
+        grph.connections = connections({}, plan=plan, rows=grph.rows, data={}, rng=rng)
+        return grph
+
     def get_interface(self, iface: str = "IO") -> tuple[interface, interface]:
         """Return the source and destination interfaces."""
         _rows: rows = self.rows
@@ -143,16 +291,27 @@ class graph:
             self.connections.assertions()
 
             # Ensure connection indicies and types are correct
-            for sr, dr, si, di in self.connections.T:
-                assert si < len(self.rows[sr]), f"Connection {ROWS_INDEXED[sr]}{si} source index out of range"
-                assert di < len(self.rows[dr]), f"Connection {ROWS_INDEXED[dr]}{di} destination index out of range"
-                assert (
-                    self.rows[sr][si] == self.rows[dr][di]
-                ), f"Connection {ROWS_INDEXED[sr]}{si}->{ROWS_INDEXED[dr]}{di} types do not match"
+            # The types of all the rows are gathered into one array indexed by row offset + endpoint index.
+            src_rows, dst_rows, src_idxs, dst_idxs = self.connections.view(ndarray).astype(intp)
+            lengths: NDArray[intp] = array([len(row) for row in self.rows], dtype=intp)
+            bad: NDArray[bool_] = src_idxs >= lengths[src_rows]
+            first: intp = bad.argmax()
+            assert not bad.any(), f"Connection {ROWS_INDEXED[src_rows[first]]}{src_idxs[first]} source index out of range"
+            bad = dst_idxs >= lengths[dst_rows]
+            first = bad.argmax()
+            assert not bad.any(), f"Connection {ROWS_INDEXED[dst_rows[first]]}{dst_idxs[first]} destination index out of range"
+            offsets: NDArray[intp] = concatenate(([0], cumsum(lengths)[:-1]))
+            types: NDArray = concatenate([row.view(ndarray) for row in self.rows])
+            bad = types[offsets[src_rows] + src_idxs] != types[offsets[dst_rows] + dst_idxs]
+            first = bad.argmax()
+            assert not bad.any(), (
+                f"Connection {ROWS_INDEXED[src_rows[first]]}{src_idxs[first]}->"
+                f"{ROWS_INDEXED[dst_rows[first]]}{dst_idxs[first]} types do not match"
+            )
         except AssertionError as e:
             _logger.error(f"Graph assertions failed: {e}")
             _logger.error(f"Graph data:\n{repr(self)}")
             raise e
 
 
-EMPTY_GRAPH = graph({})
+EMPTY_GRAPH = graph({}).freeze()
@@ -0,0 +1,74 @@
+"""The graph parser module.
+
+# JSONGraph Parser
+
+Constructing the rows and connections of a graph from a JSONGraph needs the endpoint types of every
+interface and the source of every destination endpoint. Rather than each interface and the connections
+scanning the JSONGraph for what they need the JSONGraph is walked once and everything is extracted.
+"""
+
+from __future__ import annotations
+
+from logging import DEBUG, Logger, NullHandler, getLogger
+from typing import NamedTuple
+
+from numpy import array, uint8
+from numpy.typing import NDArray
+
+from .egp_typing import DESTINATION_ROW_INDEXES, SOURCE_ROW_INDEXES, ConstantExecStr, DestinationRow, EndPointType, JSONGraph, SourceRow
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+class parsed_json_graph(NamedTuple):
+    """The data needed to construct the rows & connections of a graph from a JSONGraph."""
+
+    # Types of the referenced source endpoints by source row then endpoint index
+    src_types: dict[SourceRow, dict[int, EndPointType]]
+    # Types of the destination endpoints by destination row (rows that are not in the JSONGraph are not present)
+    dst_types: dict[DestinationRow, list[EndPointType]]
+    # Row C values & types. None if row C is not in the JSONGraph or is empty.
+    constants: tuple[list[ConstantExecStr], list[EndPointType]] | None
+    # 4xN connections array sorted by destination row. See connections.ConnIdx.
+    connections: NDArray[uint8]
+
+    def src_interface_types(self, row: SourceRow) -> list[EndPointType]:
+        """Return the types of the referenced source endpoints of row in index order."""
+        types: dict[int, EndPointType] = self.src_types[row]
+        return [types[idx] for idx in sorted(types)]
+
+
+def parse_json_graph(json_graph: JSONGraph) -> parsed_json_graph:
+    """Walk json_graph once extracting the interface types and connections."""
+    src_types: dict[SourceRow, dict[int, EndPointType]] = {"I": {}, "C": {}, "A": {}, "B": {}}
+    dst_types: dict[DestinationRow, list[EndPointType]] = {}
+    constants: tuple[list[ConstantExecStr], list[EndPointType]] | None = None
+    # (destination row index, source row indices, source endpoint indices) in JSONGraph order
+    row_cons: list[tuple[int, list[int], list[int]]] = []
+    for row, eps in json_graph.items():
+        if row == "C":
+            if eps:
+                constants = ([ep[0] for ep in eps], [ep[1] for ep in eps])  # type: ignore
+            continue
+        types: list[EndPointType] = []
+        src_rows: list[int] = []
+        src_idxs: list[int] = []
+        for src_row, src_idx, typ in eps:  # type: ignore
+            src_types[src_row][src_idx] = typ
+            types.append(typ)
+            src_rows.append(SOURCE_ROW_INDEXES[src_row])
+            src_idxs.append(src_idx)
+        dst_types[row] = types  # type: ignore
+        row_cons.append((DESTINATION_ROW_INDEXES[row], src_rows, src_idxs))  # type: ignore
+
+    cons: list[list[int]] = [[], [], [], []]
+    for dri, src_rows, src_idxs in sorted(row_cons, key=lambda x: x[0]):
+        cons[0].extend(src_rows)
+        cons[1].extend([dri] * len(src_rows))
+        cons[2].extend(src_idxs)
+        cons[3].extend(range(len(src_rows)))
+    return parsed_json_graph(src_types, dst_types, constants, array(cons, dtype=uint8).reshape(4, -1))
@@ -0,0 +1,71 @@
+"""The immutable module.
+
+# Immutable ndarrays
+
+Interfaces, rows and connections are numpy ndarray derived classes that are hashed to find duplicates
+(e.g. genetic_code_cache.optimize()) and used as dictionary keys. Hashing the array data every time is
+expensive so an immutable_ndarray can be frozen. A frozen array cannot be modified (numpy raises a
+ValueError on assignment) and caches its hash and digest the first time they are calculated.
+
+The digest is a stable (across processes & platforms) blake2b digest of the array value. The hash
+is the first 8 bytes of the digest as a signed 64 bit integer so equal values hash equally whether
+or not they are frozen.
+"""
+
+from __future__ import annotations
+
+from hashlib import blake2b
+from logging import DEBUG, Logger, NullHandler, getLogger
+from typing import Self
+
+from numpy import ndarray
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Size of a digest in bytes
+DIGEST_SIZE: int = 16
+
+
+def digest_hash(digest: bytes) -> int:
+    """Return the 64 bit hash of a digest."""
+    return int.from_bytes(digest[:8], "little", signed=True)
+
+
+class immutable_ndarray(ndarray):
+    """An ndarray that can be frozen. A frozen array caches its hash & digest."""
+
+    def __hash__(self) -> int:  # type: ignore [reportIncompatibleVariableOverride]
+        """Return the 64 bit hash of the array value. Cached if the array is frozen."""
+        if self.flags.writeable:
+            return digest_hash(self._digest())
+        _hash: int | None = getattr(self, "_hash", None)
+        if _hash is None:
+            _hash = self._hash = digest_hash(self.digest())
+        return _hash
+
+    def _digest(self) -> bytes:
+        """Calculate the digest of the array value. Derived classes with additional state must extend this."""
+        return blake2b(self.tobytes(), digest_size=DIGEST_SIZE).digest()
+
+    def digest(self) -> bytes:
+        """Return the stable digest of the array value. Cached if the array is frozen."""
+        if self.flags.writeable:
+            return self._digest()
+        _digest: bytes | None = getattr(self, "_digest_cache", None)
+        if _digest is None:
+            _digest = self._digest_cache = self._digest()
+        return _digest
+
+    def freeze(self) -> Self:
+        """Make the array immutable. Returns self for convenience."""
+        self.setflags(write=False)
+        return self
+
+    def frozen(self) -> bool:
+        """Return True if the array is immutable."""
+        return not self.flags.writeable
@@ -17,16 +17,31 @@ Source interfaces can only have connections to destination interfaces.
 
 A destination interface is defined by the dst_interface class which is derived from the interface class.
 Destination interfaces can only have connections from source interfaces.
+
+# Interface Registry
+
+Thousands of genetic codes share the same small interfaces. The interface registry is a thread safe,
+size bounded (LRU) flyweight store of frozen canonical interfaces keyed by their endpoint type bytes.
+Interfaces constructed through the registry (see canonical_interface()) are the same object if they
+have the same endpoint types so interface memory scales with the number of distinct interfaces rather
+than the number of genetic codes. Evicting an interface from the registry does not affect the users
+of it: A later request for the same endpoint types creates a new canonical interface.
+NOTE: The canonical empty interface is not EMPTY_INTERFACE. EMPTY_INTERFACE means the row does not exist.
 """
 from __future__ import annotations
 
+from collections import OrderedDict
+from hashlib import blake2b
 from logging import Logger, NullHandler, getLogger
+from threading import Lock
 from typing import cast
 
-from numpy import int16, ndarray, array_equal
+from numpy import int16, array, array_equal, frombuffer
+from numpy.typing import NDArray
 
 from .egp_typing import ConstantExecStr, EndPointType, Row, EndPointClassStr
 from .ep_type import ep_type_lookup, validate, asstr
+from .immutable import DIGEST_SIZE, immutable_ndarray
 
 
 # Logging
@@ -34,8 +49,10 @@ _logger: Logger = getLogger(__name__)
 _logger.addHandler(NullHandler())
 
 
-class interface(ndarray):
-    """An interface is a node in the genomic library."""
+class interface(immutable_ndarray):
+    """An interface is a node in the genomic library.
+    A frozen interface (see immutable_ndarray) cannot be modified and caches its hash & digest.
+    """
 
     # NOTE: There is a 112 byte overhead for a numpy array. For 16 bit integers this is about the
     # same as a list with 1 ints (80 + 28 = 108). Therefore it is efficient in almost all scenarios.
@@ -64,8 +81,8 @@ class interface(ndarray):
         return array_equal(self, other)
 
     def __hash__(self) -> int:  # type: ignore [reportIncompatibleVariableOverride]
-        """Create a hash for the interface object."""
-        return hash(self.tobytes())
+        """Create a hash for the interface object. Cached if the interface is frozen."""
+        return super().__hash__()
 
     def mermaid(self, row: Row, cls: EndPointClassStr) -> list[str]:
         """Return the mermaid charts string for the source interface.
@@ -130,7 +147,7 @@ class dst_interface(interface):
 
 
 # Used as a default value: Referencing the same object saves space and time.
-EMPTY_INTERFACE = empty_interface()
+EMPTY_INTERFACE = empty_interface().freeze()
 
 
 class interface_c(src_interface):
@@ -147,6 +164,27 @@ class interface_c(src_interface):
         """Create a constants row from a list of values and a list of endpoint types."""
         return cast(interface_c, super().__new__(cls, types))
 
+    def __eq__(self, other: object) -> bool:
+        """Constants are only equal if their values are equal too."""
+        if not isinstance(other, interface_c):
+            return super().__eq__(other)
+        return array_equal(self, other) and list(self.values) == list(other.values)
+
+    def __ne__(self, other: object) -> bool:
+        """Constants are not equal if their types or values differ."""
+        return not self.__eq__(other)
+
+    def __hash__(self) -> int:  # type: ignore [reportIncompatibleVariableOverride]
+        """Create a hash for the constants row. Cached if the constants row is frozen."""
+        return super().__hash__()
+
+    def _digest(self) -> bytes:
+        """The digest of a constants row includes the values."""
+        _digest = blake2b(self.tobytes(), digest_size=DIGEST_SIZE)
+        for value in self.values:
+            _digest.update(value.encode("utf-8") + b"\x00")
+        return _digest.digest()
+
 
 class interface_f(dst_interface):
     """Row F is a specialization of the dst_interface. Row F can only have a single endpoint of type bool."""
@@ -161,6 +199,72 @@ class interface_f(dst_interface):
 
 
 # Used as a default values: Referencing the same object saves space and time.
-EMPTY_INTERFACE_C = interface_c([], [])
-INTERFACE_F = interface_f()
+EMPTY_INTERFACE_C = interface_c([], []).freeze()
+INTERFACE_F = interface_f().freeze()
 EMPTY_IO: tuple[empty_interface, empty_interface] = (EMPTY_INTERFACE, EMPTY_INTERFACE)
+
+
+# Default maximum number of interfaces in the interface registry
+INTERFACE_REGISTRY_SIZE: int = 2**16
+
+
+class interface_registry:
+    """A thread safe, size bounded (LRU) registry of frozen canonical interfaces."""
+
+    def __init__(self, size: int = INTERFACE_REGISTRY_SIZE) -> None:
+        """Create a registry of up to size interfaces."""
+        assert size > 0, "The interface registry must have at least one entry."
+        self.size: int = size
+        self._interfaces: OrderedDict[bytes, interface] = OrderedDict()
+        self._lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        """Return the number of interfaces in the registry."""
+        return len(self._interfaces)
+
+    def clear(self) -> None:
+        """Empty the registry. Statistics are not reset."""
+        with self._lock:
+            self._interfaces.clear()
+
+    def get(self, val: list[EndPointType] | bytes | NDArray) -> interface:
+        """Return the canonical interface for the endpoint types in val.
+        val is a list or array of endpoint types or the int16 endpoint type bytes.
+        """
+        key: bytes = val if isinstance(val, bytes) else array(val, dtype=int16).tobytes()
+        with self._lock:
+            iface: interface | None = self._interfaces.get(key)
+            if iface is not None:
+                self.hits += 1
+                self._interfaces.move_to_end(key)
+                return iface
+            self.misses += 1
+            iface = interface(frombuffer(key, dtype=int16).tolist()).freeze()
+            self._interfaces[key] = iface
+            if len(self._interfaces) > self.size:
+                self._interfaces.popitem(last=False)
+                self.evictions += 1
+            return iface
+
+    def stats(self) -> dict[str, int]:
+        """Return the registry statistics."""
+        with self._lock:
+            return {
+                "size": len(self._interfaces),
+                "max_size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# The global interface registry
+INTERFACE_REGISTRY: interface_registry = interface_registry()
+
+
+def canonical_interface(val: list[EndPointType] | bytes | NDArray) -> interface:
+    """Return the canonical (frozen) interface for the endpoint types in val from the global registry."""
+    return INTERFACE_REGISTRY.get(val)
@@ -30,7 +30,16 @@ from .egp_typing import (
     PairIdx,
     isDestinationRow,
 )
-from .end_point import dst_end_point, dst_end_point_ref, isDstEndPoint, isSrcEndPoint, src_end_point, src_end_point_ref, x_end_point
+from .end_point import (
+    dst_end_point,
+    dst_end_point_ref,
+    key_cls,
+    key_row,
+    key_to_str,
+    src_end_point,
+    src_end_point_ref,
+    x_end_point,
+)
 from .ep_type import EP_TYPE_VALUES_TUPLE, asint
 from .graph_validators import igraph_validator
 from .mermaid_charts import MERMAID_IGRAPH_CLASS_DEF_STR, MERMAID_IGRAPH_COLORS
@@ -65,7 +74,39 @@ _logger.debug(f"Mermaid chart formatting for internal graph representation:\n{ME
 
 
 class internal_graph(EndPointDict):
-    """Convinient structure for GC graph manipulation."""
+    """Convinient structure for GC graph manipulation.
+
+    Endpoints are also indexed by row, by class and by (row, class) in insertion order so filtering
+    costs O(result) rather than a scan of all the endpoints. The indexes are maintained by the dict
+    mutation methods using the endpoint key (which encodes the row & class).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Create the internal graph & index the end points."""
+        super().__init__(*args, **kwargs)
+        self._row_index: dict[Row, EndPointDict] = {}
+        self._cls_index: tuple[DstEndPointDict, SrcEndPointDict] = ({}, {})
+        self._row_cls_index: dict[tuple[Row, EndPointClass], EndPointDict] = {}
+        for key, ep in self.items():
+            self._index(key, ep)
+
+    def __delitem__(self, key: SrcEndPointHash | DstEndPointHash) -> None:
+        """Remove the end point from the graph & the indexes."""
+        super().__delitem__(key)
+        row: Row = key_row(key)
+        cls: EndPointClass = key_cls(key)
+        del self._row_index[row][key]
+        del self._cls_index[cls][key]  # type: ignore
+        del self._row_cls_index[(row, cls)][key]
+
+    def __ior__(self, other: Any) -> internal_graph:  # type: ignore [override]
+        """Add or replace end points."""
+        self.update(other)
+        return self
+
+    def __reduce__(self) -> tuple[type[internal_graph], tuple[EndPointDict]]:
+        """Pickle & copy as a dict. The indexes are rebuilt."""
+        return type(self), (dict(self),)
 
     def __repr__(self) -> str:
         """Return a mermaid chart flowchart representation of the internal graph.
@@ -101,6 +142,27 @@ class internal_graph(EndPointDict):
         ret_list_str.extend(self.mermaid_link_str())
         return "\n".join(ret_list_str)
 
+    def __setitem__(self, key: SrcEndPointHash | DstEndPointHash, ep: x_end_point) -> None:
+        """Add or replace the end point in the graph & the indexes."""
+        super().__setitem__(key, ep)
+        self._index(key, ep)
+
+    def _index(self, key: SrcEndPointHash | DstEndPointHash, ep: x_end_point) -> None:
+        """Add the endpoint to the row, class & (row, class) indexes."""
+        row: Row = key_row(key)
+        cls: EndPointClass = key_cls(key)
+        self._row_index.setdefault(row, {})[key] = ep
+        self._cls_index[cls][key] = ep  # type: ignore
+        self._row_cls_index.setdefault((row, cls), {})[key] = ep
+
+    def _row_eps(self, row: Row) -> Iterable[x_end_point]:
+        """Return the end points in row."""
+        return self._row_index.get(row, {}).values()
+
+    def _row_cls_eps(self, row: Row, cls: EndPointClass) -> Iterable[x_end_point]:
+        """Return the end points of class cls in row."""
+        return self._row_cls_index.get((row, cls), {}).values()
+
     def add(self, ep: x_end_point) -> None:
         """Add an end point to the internal graph."""
         self[ep.key()] = ep
@@ -110,15 +172,31 @@ class internal_graph(EndPointDict):
         idx = count(self.next_idx(dst_row, DST_EP))
         return {n.key(): n for n in (dst_end_point(dst_row, next(idx), ep.typ) for ep in self.src_row_filter(src_row))}
 
+    def clear(self) -> None:
+        """Remove all the end points."""
+        super().clear()
+        self._row_index.clear()
+        for index in self._cls_index:
+            index.clear()
+        self._row_cls_index.clear()
+
     def cls_filter(self, cls: EndPointClass) -> Generator[x_end_point, None, None]:
         """Return all the end points in with cls cls."""
-        return (ep for ep in self.values() if ep.cls == cls)
+        return (ep for ep in self._cls_index[cls].values())
 
     def complete_dst_references(self, row: DestinationRow) -> None:
         """An incomplete reference is when only one end of the connection references the other."""
         for dst_ep in self.dst_row_filter(row):
             cast(src_end_point, self[dst_ep.refs[0].key()]).refs.append(dst_ep.as_ref())
 
+    def clone(self) -> internal_graph:
+        """Return a copy of the graph with copies of the end points & their references.
+
+        Much faster than copy.deepcopy(): each end point is cloned directly into a new key: end point
+        mapping without any recursion or memo dict & the indexes are built from it.
+        """
+        return internal_graph({key: ep.clone() for key, ep in self.items()})
+
     def complete_src_references(self, row: SourceRow) -> None:
         """An incomplete reference is when only one end of the connection references the other."""
         for src_ep in self.src_row_filter(row):
@@ -127,19 +205,19 @@ class internal_graph(EndPointDict):
 
     def copy_row(self, row: Row, clean: bool = False) -> EndPointDict:
         """Return a copy of the specified row endpoints. Remove references if clean is True."""
-        return {key: ep.copy(clean) for key, ep in self.items() if ep.row == row}
+        return {key: ep.copy(clean) for key, ep in self._row_index.get(row, {}).items()}
 
     def copy_rows(self, rows: Iterable[Row], clean: bool = False) -> EndPointDict:
         """Return a copy of the specified rows endpoints. Remove references if clean is True."""
-        return {key: ep.copy(clean) for key, ep in self.items() if ep.row in rows}
+        return {ep.key(): ep.copy(clean) for ep in self.rows_filter(rows)}
 
     def copy_rows_dst_eps(self, rows: Iterable[Row], clean: bool = False) -> DstEndPointDict:
         """Return a copy of the specified rows destination endpoints. Remove references if clean is True."""
-        return {key: ep.copy(clean) for key, ep in self.items() if isDstEndPoint(ep) and ep.row in rows}
+        return {ep.key(): ep.copy(clean) for ep in self.dst_rows_filter(rows)}
 
     def copy_rows_src_eps(self, rows: Iterable[Row], clean: bool = False) -> SrcEndPointDict:
         """Return a copy of the specified rows source endpoints. Remove references if clean is True."""
-        return {key: ep.copy(clean) for key, ep in self.items() if isSrcEndPoint(ep) and ep.row in rows}
+        return {ep.key(): ep.copy(clean) for ep in self.src_rows_filter(rows)}
 
     def direct_connect(self, src_row: SourceRow, dst_row: DestinationRow) -> DstEndPointDict:
         """Create a destination row with the exact endpoints needed by src_row."""
@@ -147,23 +225,23 @@ class internal_graph(EndPointDict):
 
     def dst_filter(self) -> Generator[dst_end_point, None, None]:
         """Return all the destination end points."""
-        return (ep for ep in self.values() if isDstEndPoint(ep))
+        return (ep for ep in self._cls_index[DST_EP].values())
 
     def dst_ref_filter(self) -> Generator[dst_end_point, None, None]:
         """Return all the destination end points that are referenced."""
-        return (ep for ep in self.values() if ep.row != "U" and ep.refs and isDstEndPoint(ep))
+        return (ep for ep in self._cls_index[DST_EP].values() if ep.row != "U" and ep.refs)
 
     def dst_row_filter(self, row: Row) -> Generator[dst_end_point, None, None]:
         """Return all the destination end points in a row."""
-        return (ep for ep in self.values() if isDstEndPoint(ep) and ep.row == row)
+        return (ep for ep in cast(Iterable[dst_end_point], self._row_cls_eps(row, DST_EP)))
 
     def dst_rows_filter(self, rows: Iterable[DestinationRow]) -> Generator[dst_end_point, None, None]:
         """Return all the destination end points in the specified rows."""
-        return (ep for ep in self.values() if isDstEndPoint(ep) and ep.row in rows)
+        return (ep for row in dict.fromkeys(rows) for ep in cast(Iterable[dst_end_point], self._row_cls_eps(row, DST_EP)))
 
     def dst_unref_filter(self) -> Generator[dst_end_point, None, None]:
         """Return all the destination end points that are unreferenced."""
-        return (ep for ep in self.values() if not ep.refs and ep.row != "U" and isDstEndPoint(ep))
+        return (ep for ep in self._cls_index[DST_EP].values() if not ep.refs and ep.row != "U")
 
     def extend_src(self, src_row: SourceRow, iig: internal_graph) -> None:
         """Extend the source endpoints in src_row by igc row O"""
@@ -180,13 +258,13 @@ class internal_graph(EndPointDict):
 
     def has_row(self, row: Row) -> bool:
         """Return True if the internal graph has the row."""
-        return any(ep.row == row for ep in self.values())
+        return bool(self._row_index.get(row))
 
     # TODO: Be clear on rules regarding which methods modify the structure & which return a new structure
     # TODO: Be consistent on whether self modifying method maintains internal consistency
     def json_obj(self) -> dict[str, list[str | int | bool | list[list[str | int]] | None]]:
         """Return a json serializable object."""
-        return {ep.key(): ep.json_obj() for ep in self.values()}
+        return {key_to_str(key): ep.json_obj() for key, ep in self.items()}
 
     def json_graph(self) -> JSONGraph:
         """Convert internal graph to JSON graph."""
@@ -215,7 +293,7 @@ class internal_graph(EndPointDict):
         ret_list_str: list[str] = []
         for ep in self.src_filter():
             for ref in ep.refs:
-                ret_list_str.append(f"\t{ep.key()}{uid:04x} --> {ref.key()}{uid:04x}")
+                ret_list_str.append(f"\t{key_to_str(ep.key())}{uid:04x} --> {key_to_str(ref.key())}{uid:04x}")
         return ret_list_str
 
     def mermaid_style_str(self, link_list_str: list[str]) -> list[str]:
@@ -239,27 +317,29 @@ class internal_graph(EndPointDict):
             if self.num_eps(row, SRC_EP):
                 ret_list_str.append(f'\t\tsubgraph {row}s{uid:04x}["{row}s"]')
                 for ep in self.src_row_filter(row):
-                    ret_list_str.append(f'\t\t\t{ep.key()}{uid:04x}["{ep.key()}: {ep.typ}"]')
+                    key = key_to_str(ep.key())
+                    ret_list_str.append(f'\t\t\t{key}{uid:04x}["{key}: {ep.typ}"]')
                 ret_list_str.append("\t\tend")
             if self.num_eps(row, DST_EP):
                 ret_list_str.append(f'\t\tsubgraph {row}d{uid:04x}["{row}d"]')
                 for ep in self.dst_row_filter(row):
-                    ret_list_str.append(f'\t\t\t{ep.key()}{uid:04x}["{ep.key()}: {ep.typ}"]')
+                    key = key_to_str(ep.key())
+                    ret_list_str.append(f'\t\t\t{key}{uid:04x}["{key}: {ep.typ}"]')
                 ret_list_str.append("\t\tend")
             ret_list_str.append("\tend")
         return ret_list_str
 
     def move_row(self, f_row: Row, t_row: Row, clean: bool = False, has_f: bool = False) -> EndPointDict:
         """Return a copy of the specified f_row endpoints mapped to t_row. Remove references if clean is True."""
-        return {n.key(): n for n in (ep.move_copy(t_row, clean, has_f) for ep in self.values() if ep.row == f_row)}
+        return {n.key(): n for n in (ep.move_copy(t_row, clean, has_f) for ep in self._row_eps(f_row))}
 
     def next_idx(self, row: Row, cls: EndPointClass) -> int:
         """Return the next endpoint index for the class in the row."""
-        return len(tuple(self.row_cls_filter(row, cls)))
+        return len(self._row_cls_index.get((row, cls), {}))
 
     def num_eps(self, row: Row, cls: EndPointClass) -> int:
         """Count the endpoint of class cls in a specific row."""
-        return sum(ep.cls == cls and ep.row == row for ep in self.values())
+        return len(self._row_cls_index.get((row, cls), {}))
 
     def pass_thru(self, dst_row_a: DestinationRow, dst_row_b: DestinationRow, mapping: list[EndPointIndex]) -> SrcEndPointDict:
         """Pass through the endpoints from dst_row_a in RGC to dst_row_b in FGC using mapping."""
@@ -270,6 +350,20 @@ class internal_graph(EndPointDict):
         )
         return {ep.key(): ep for ep in i_eps}
 
+    def pop(self, key: SrcEndPointHash | DstEndPointHash, *default: Any) -> Any:  # type: ignore [override]
+        """Remove the end point with key & return it (or default if given & key is not present)."""
+        if key not in self and default:
+            return default[0]
+        ep: x_end_point = self[key]
+        del self[key]
+        return ep
+
+    def popitem(self) -> tuple[SrcEndPointHash | DstEndPointHash, x_end_point]:
+        """Remove & return the last (key, end point) pair added."""
+        key, ep = next(reversed(self.items()))
+        del self[key]
+        return key, ep
+
     def redirect_refs(self, row: Row, cls: EndPointClass, old_ref_row: Row, new_ref_row: Row) -> None:
         """Redirects cls end point references on row from old_ref_row to new_ref_row.
         Does not modifiy old_ref or new_ref endpoints. These endpoints must be change separately to maintain consistency.
@@ -289,9 +383,8 @@ class internal_graph(EndPointDict):
 
     def remove_row(self, row: Row) -> None:
         """Remove all endpoints in row."""
-        for key in tuple(self.keys()):
-            if self[key].row == row:
-                del self[key]
+        for key in tuple(self._row_index.get(row, {})):
+            del self[key]
 
     def reindex(self, clean: bool = True) -> None:
         """Reindex all endpoints deleting all references by default."""
@@ -347,39 +440,45 @@ class internal_graph(EndPointDict):
 
     def row_cls_filter(self, row: Row, cls: EndPointClass) -> Generator[x_end_point, None, None]:
         """Return all the end points in row."""
-        return (ep for ep in self.values() if ep.row == row and ep.cls == cls)
+        return (ep for ep in self._row_cls_eps(row, cls))
 
     def row_filter(self, row: Row) -> Generator[x_end_point, None, None]:
         """Return all the end points in row."""
-        return (ep for ep in self.values() if ep.row == row)
+        return (ep for ep in self._row_eps(row))
 
     def rows_filter(self, rows: Iterable[Row]) -> Generator[x_end_point, None, None]:
         """Return all the end points in row."""
-        return (ep for ep in self.values() if ep.row in rows)
+        return (ep for row in dict.fromkeys(rows) for ep in self._row_eps(row))
 
     def row_types(self, row: Row, cls: EndPointClass) -> set[int]:
         """Return the set of types in row."""
-        return {ep.typ for ep in self.row_filter(row) if ep.cls == cls}
+        return {ep.typ for ep in self._row_cls_eps(row, cls)}
+
+    def setdefault(self, key: SrcEndPointHash | DstEndPointHash, default: x_end_point) -> x_end_point:  # type: ignore [override]
+        """Return the end point with key adding default if it is not present."""
+        if key not in self:
+            self[key] = default
+        return self[key]
 
     def src_filter(self) -> Generator[src_end_point, None, None]:
         """Return all the source end points."""
-        return (ep for ep in self.values() if isSrcEndPoint(ep))
+        return (ep for ep in self._cls_index[SRC_EP].values())
 
     def src_ref_filter(self) -> Generator[src_end_point, None, None]:
         """Return all the source end points that are referenced."""
-        return (ep for ep in self.values() if isSrcEndPoint(ep) and ep.refs)
+        return (ep for ep in self._cls_index[SRC_EP].values() if ep.refs)
 
     def src_row_filter(self, row: Row) -> Generator[src_end_point, None, None]:
         """Return all the source end points in a row."""
-        return (ep for ep in self.values() if isSrcEndPoint(ep) and ep.row == row)
+        return (ep for ep in cast(Iterable[src_end_point], self._row_cls_eps(row, SRC_EP)))
 
     def src_rows_filter(self, rows: Iterable[SourceRow]) -> Generator[src_end_point, None, None]:
         """Return all the source end points in the specified rows."""
-        return (ep for ep in self.values() if isSrcEndPoint(ep) and ep.row in rows)
+        return (ep for row in dict.fromkeys(rows) for ep in cast(Iterable[src_end_point], self._row_cls_eps(row, SRC_EP)))
 
     def src_unref_filter(self) -> Generator[src_end_point, None, None]:
         """Return all the source end points that are unreferenced."""
-        return (ep for ep in self.values() if isSrcEndPoint(ep) and not ep.refs)
+        return (ep for ep in self._cls_index[SRC_EP].values() if not ep.refs)
 
     def strip_unconnected_dst_eps(self, dst_row: DestinationRow) -> list[EndPointIndex]:
         """Remove all unconnected destination endpoints in dst_row & reindex returning the old indices."""
@@ -388,6 +487,11 @@ class internal_graph(EndPointDict):
                 del self[ep.key()]
         return self.reindex_dst_row(dst_row)
 
+    def update(self, *args, **kwargs) -> None:  # type: ignore [override]
+        """Add or replace end points."""
+        for key, ep in dict(*args, **kwargs).items():
+            self[key] = ep
+
     def validate(self) -> bool:
         """Validate the internal graph. This function is not built for speed."""
         validation_structure: dict[str, dict[str, dict[str, list[str | int | bool | list[list[str | int]] | None]]]] = {
@@ -0,0 +1,145 @@
+"""Random population generation.
+
+Creating a large population of random genetic codes is CPU bound pure python. The work is spread over
+a pool of worker processes each with its own genetic code cache. Workers return the genetic codes they
+created in a compact packed form that is merged into the parent genetic code cache deduplicating by signature.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from logging import DEBUG, Logger, NullHandler, getLogger
+from os import cpu_count
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple
+
+from numpy import argsort, array, int32, uint8
+from numpy.random import SeedSequence, default_rng
+from numpy.typing import NDArray
+
+from ._genetic_code import DEFAULT_DYNAMIC_MEMBER_VALUES, _genetic_code
+from .conversions import compress_graph, decompress_graph
+from .genetic_code import CODON_CREATOR_UUID, genetic_code_factory, random_genetic_codes
+from .genetic_code_cache import genetic_code_cache
+from .graph import graph
+
+if TYPE_CHECKING:
+    from numpy.random import Generator
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+class packed_genetic_codes(NamedTuple):
+    """A compact, picklable, cache independent set of genetic codes.
+    Genetic codes are ordered dependencies first and reference each other by position in the pack.
+    """
+
+    signatures: NDArray[uint8]  # (N, 32) signatures
+    links: NDArray[int32]  # (N, 2) positions of GCA & GCB in the pack. -1 if there is no GCA/GCB i.e. a codon.
+    graphs: list[bytes]  # Compressed packed graphs (see conversions.compress_graph())
+    roots: NDArray[int32]  # Positions of the root genetic codes in the pack
+
+
+def pack(gcc: genetic_code_cache, indices: Iterable[int] | None = None) -> packed_genetic_codes:
+    """Pack the genetic codes at indices (default all) and all their dependencies.
+    Purged dependencies cannot be packed: A ValueError is raised if a genetic code to be packed has a
+    purged GCA or GCB (which includes leaf genetic codes that are not codons).
+    """
+    _indices: list[int] = [gc.idx for gc in gcc.values()] if indices is None else [int(idx) for idx in indices]
+    members: set[int] = set()
+    stack: list[int] = list(_indices)
+    while stack:
+        idx: int = stack.pop()
+        if idx not in members:
+            members.add(idx)
+            if gcc.gca[idx] is gcc.PURGED_GENETIC_CODE or gcc.gcb[idx] is gcc.PURGED_GENETIC_CODE:
+                raise ValueError(f"Genetic code {idx} cannot be packed: It has a purged GCA or GCB.")
+            stack.extend(gcx.idx for gcx in (gcc.gca[idx], gcc.gcb[idx]) if gcx.valid())  # type: ignore
+    # Code depth of a dependency is always less than that of its dependents.
+    ordered: NDArray = array(sorted(members), dtype=int32)
+    ordered = ordered[argsort([gcc[idx]["code_depth"] for idx in ordered], kind="stable")]
+    position: dict[int, int] = {int(idx): pos for pos, idx in enumerate(ordered)}
+    links: NDArray[int32] = array(
+        [[position[gcx.idx] if gcx.valid() else -1 for gcx in (gcc.gca[idx], gcc.gcb[idx])] for idx in ordered],  # type: ignore
+        dtype=int32,
+    ).reshape(len(ordered), 2)
+    return packed_genetic_codes(
+        signatures=gcc.batch_signatures(ordered),
+        links=links,
+        graphs=[compress_graph(gcc.graph[idx]) for idx in ordered],  # type: ignore
+        roots=array([position[idx] for idx in _indices], dtype=int32),
+    )
+
+
+def merge(gcc: genetic_code_cache, packs: Iterable[packed_genetic_codes]) -> list[int]:
+    """Merge packed genetic codes into the genetic code cache and return the indices of the roots.
+    Genetic codes with a signature already in the cache are not added: The cached genetic code is used.
+    All the genetic codes used are pinned until the merge is complete so none of them can be purged.
+    """
+    _packs: list[packed_genetic_codes] = list(packs)
+    existing: dict[bytes, int] = {sig.tobytes(): gc.idx for gc, sig in zip(gcc.values(), gcc.batch_signatures())}
+    pinned: list[int] = list(
+        {existing[key] for packed in _packs for key in (sig.tobytes() for sig in packed.signatures) if key in existing}
+    )
+    gcc.pin(pinned)
+    gc_type: type[_genetic_code] = gcc.genetic_code_type
+    retval: list[int] = []
+    added: list[int] = []
+    for packed in _packs:
+        indices: list[int] = []
+        for sig, (gca, gcb), packed_graph in zip(packed.signatures, packed.links, packed.graphs):
+            key: bytes = sig.tobytes()
+            if key not in existing:
+                if gca == -1 and gcb == -1:
+                    gc_dict: dict[str, Any] = DEFAULT_DYNAMIC_MEMBER_VALUES.copy()
+                    gc_dict.update({"creator": CODON_CREATOR_UUID, "signature": sig.copy(), "graph": decompress_graph(packed_graph)})
+                else:
+                    gcxs = tuple(gcc[indices[gcx]] if gcx != -1 else gcc.EMPTY_GENETIC_CODE for gcx in (gca, gcb))
+                    gc_dict = {"graph": decompress_graph(packed_graph), "gca": gcxs[0], "gcb": gcxs[1]}
+                existing[key] = gc_type(gc_dict).idx
+                gcc.pin(existing[key])
+                added.append(existing[key])
+            indices.append(existing[key])
+        retval.extend(indices[root] for root in packed.roots)
+    gcc.unpin(pinned + added)
+    _logger.info(f"Merged {len(added)} new genetic codes into the genetic code cache.")
+    return retval
+
+
+def _random_packed(num: int, depth: int, seed_seq: SeedSequence, reuse: float, kwargs: dict[str, Any]) -> packed_genetic_codes:
+    """Worker process function: Create num random genetic codes in a private cache and pack them."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=max(num * (2 ** (depth + 1) - 1), 2))
+    rng: Generator = default_rng(seed_seq)
+    roots: list[int] = random_genetic_codes(gcc.genetic_code_type, num, depth, rng, reuse, **kwargs)
+    return pack(gcc, roots)
+
+
+def random_population(
+    gcc: genetic_code_cache,
+    num: int,
+    depth: int = 5,
+    workers: int | None = None,
+    seed: int | None = None,
+    reuse: float = 0.0,
+    **kwargs,
+) -> list[int]:
+    """Create num random genetic codes using a pool of worker processes and merge them into gcc.
+    The population is split into one chunk per worker (default is the number of CPUs). Each chunk
+    is seeded from a child of SeedSequence(seed) so the population is reproducible for the same seed
+    and number of workers. See random_genetic_codes() for depth, reuse & kwargs.
+    Returns the indices of the genetic codes in gcc.
+    """
+    _workers: int = max(min(workers if workers is not None else cpu_count() or 1, num), 1)
+    chunks: list[int] = [num // _workers + (chunk < num % _workers) for chunk in range(_workers)]
+    seed_seqs: list[SeedSequence] = SeedSequence(seed).spawn(_workers)
+    _logger.info(f"Creating {num} random genetic codes in {_workers} worker processes.")
+    if _workers == 1:
+        packs: list[packed_genetic_codes] = [_random_packed(chunks[0], depth, seed_seqs[0], reuse, kwargs)]
+    else:
+        with ProcessPoolExecutor(max_workers=_workers) as executor:
+            futures = [executor.submit(_random_packed, chunk, depth, seed_seq, reuse, kwargs) for chunk, seed_seq in zip(chunks, seed_seqs)]
+            packs = [future.result() for future in futures]
+    return merge(gcc, packs)
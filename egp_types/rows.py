@@ -15,15 +15,15 @@ in the rows class. Unused rows are set to the global empty interface instance.
 
 from __future__ import annotations
 
+from hashlib import blake2b
 from logging import DEBUG, Logger, NullHandler, getLogger
-from random import choices, randint, shuffle
-from typing import cast
+from random import Random
+from typing import Self, cast
 
-from numpy import array_equal, ndarray
+from numpy import array_equal
 
-from .common import random_constant_str
+from .common import GLOBAL_RANDOM, random_constant_str
 from .egp_typing import (
-    CPI,
     DESTINATION_ROWS,
     DST_EP_CLS_STR,
     GRAPH_ROW_INDEX_ORDER,
@@ -35,10 +35,13 @@ from .egp_typing import (
     EndPointType,
     JSONGraph,
     Row,
+    SourceRow,
     SrcRowIndex,
 )
 from .ep_type import ep_type_lookup
-from .interface import EMPTY_INTERFACE, EMPTY_INTERFACE_C, INTERFACE_F, interface, interface_c
+from .graph_parser import parsed_json_graph, parse_json_graph
+from .immutable import DIGEST_SIZE, immutable_ndarray
+from .interface import EMPTY_INTERFACE, EMPTY_INTERFACE_C, INTERFACE_F, canonical_interface, interface, interface_c
 from ._genetic_code import _genetic_code, EMPTY_GENETIC_CODE, PURGED_GENETIC_CODE
 
 
@@ -48,33 +51,33 @@ _logger.addHandler(NullHandler())
 _LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
 
 
-class rows(ndarray):
-    """Rows of a genetic code graph."""
+class rows(immutable_ndarray):
+    """Rows of a genetic code graph.
+    Freezing the rows freezes the interfaces too. Frozen rows cache their hash & digest.
+    """
 
     def __init__(self, json_graph: JSONGraph, **kwargs) -> None:
-        """Initialise the rows of a genetic code graph from a JSON graph and GCA & GCB."""
+        """Initialise the rows of a genetic code graph from a JSON graph and GCA & GCB.
+        If the JSON graph has already been parsed (see graph_parser) the result may be passed as 'parsed'.
+        Interfaces are the frozen canonical interfaces from the interface registry.
+        """
         # empty is always defined as the global empty genetic code instance. It is passed in to avoid circular imports.
         super().__init__()
         gca: _genetic_code = kwargs.get("gca", EMPTY_GENETIC_CODE)
         gcb: _genetic_code = kwargs.get("gcb", EMPTY_GENETIC_CODE)
-        self[SrcRowIndex.I] = kwargs["io"][0] if "io" in kwargs else self.i_from_graph(json_graph)
-        self[SrcRowIndex.C] = self.c_from_graph(json_graph)
-        self[DstRowIndex.F] = INTERFACE_F if "F" in json_graph else EMPTY_INTERFACE
-        self[SrcRowIndex.A], self[DstRowIndex.A] = self.ab_from_graph(json_graph, "A", gca)
-        self[SrcRowIndex.B], self[DstRowIndex.B] = self.ab_from_graph(json_graph, "B", gcb)
+        parsed: parsed_json_graph = kwargs["parsed"] if "parsed" in kwargs else parse_json_graph(json_graph)
+        self[SrcRowIndex.I] = kwargs["io"][0] if "io" in kwargs else self.i_from_parsed(parsed)
+        self[SrcRowIndex.C] = interface_c(*parsed.constants) if parsed.constants is not None else EMPTY_INTERFACE_C
+        self[DstRowIndex.F] = INTERFACE_F if "F" in parsed.dst_types else EMPTY_INTERFACE
+        self[SrcRowIndex.A], self[DstRowIndex.A] = self.ab_from_parsed(parsed, "A", gca)
+        self[SrcRowIndex.B], self[DstRowIndex.B] = self.ab_from_parsed(parsed, "B", gcb)
         self[DstRowIndex.O] = (
             kwargs["io"][1]
             if "io" in kwargs
-            else (
-                interface([cast(EndPointType, src_ep[CPI.TYP]) for src_ep in json_graph["O"]])
-                if "O" in json_graph and json_graph["O"]
-                else EMPTY_INTERFACE
-            )
-        )
-        self[DstRowIndex.P] = self[DstRowIndex.O] if "F" in json_graph else EMPTY_INTERFACE
-        self[DstRowIndex.U] = (
-            interface([cast(EndPointType, src_ep[CPI.TYP]) for src_ep in json_graph["U"]]) if "U" in json_graph else EMPTY_INTERFACE
+            else (canonical_interface(parsed.dst_types["O"]) if parsed.dst_types.get("O") else EMPTY_INTERFACE)
         )
+        self[DstRowIndex.P] = self[DstRowIndex.O] if "F" in parsed.dst_types else EMPTY_INTERFACE
+        self[DstRowIndex.U] = canonical_interface(parsed.dst_types["U"]) if "U" in parsed.dst_types else EMPTY_INTERFACE
 
     def __new__(cls, json_graph: JSONGraph, **kwargs) -> rows:
         """Create the rows of a genetic code graph."""
@@ -93,8 +96,12 @@ class rows(ndarray):
         return array_equal(self, other)
 
     def __hash__(self) -> int:  # type: ignore [reportIncompatibleVariableOverride]
-        """Return the hash of the rows."""
-        return hash(self.tobytes())
+        """Return the hash of the rows. Cached if the rows are frozen."""
+        return super().__hash__()
+
+    def _digest(self) -> bytes:
+        """The digest of the rows is the digest of the interface digests."""
+        return blake2b(b"".join(iface.digest() for iface in self), digest_size=DIGEST_SIZE).digest()
 
     def mermaid(self) -> list[str]:
         """Return the mermaid charts string for the rows."""
@@ -121,27 +128,17 @@ class rows(ndarray):
             retval += ["subgraph uidP", "\tdirection TB"] + ["\t" + s for s in self[DstRowIndex.P].mermaid("P", DST_EP_CLS_STR)] + ["end"]
         return retval
 
-    def i_from_graph(self, json_graph: JSONGraph) -> interface:
-        """Return the I interface for a genetic code application graph."""
-        i_srcs: set = {tuple(dst_ep) for dst_eps in json_graph.values() for dst_ep in dst_eps if dst_ep[CPI.ROW] == "I"}
-        sorted_i_srcs: list[list[EndPointType]] = sorted(i_srcs, key=lambda ep: ep[CPI.IDX])
-        if not sorted_i_srcs:
-            return EMPTY_INTERFACE
-        return interface([cast(EndPointType, ep[CPI.TYP]) for ep in sorted_i_srcs])
+    def i_from_parsed(self, parsed: parsed_json_graph) -> interface:
+        """Return the I interface for a parsed genetic code application graph."""
+        types: list[EndPointType] = parsed.src_interface_types("I")
+        return canonical_interface(types) if types else EMPTY_INTERFACE
 
-    def c_from_graph(self, json_graph: JSONGraph) -> interface_c:
-        """Return the C source interface for a genetic code application graph."""
-        return interface_c(*list(zip(*json_graph["C"]))) if "C" in json_graph and json_graph["C"] else EMPTY_INTERFACE_C
-
-    def ab_from_graph(self, json_graph: JSONGraph, row: Row, gcx: _genetic_code) -> tuple[interface, interface]:
-        """Return the A or B source and destination interfaces for a genetic code application graph."""
+    def ab_from_parsed(self, parsed: parsed_json_graph, row: Row, gcx: _genetic_code) -> tuple[interface, interface]:
+        """Return the A or B source and destination interfaces for a parsed genetic code application graph."""
         if gcx is EMPTY_GENETIC_CODE or gcx is PURGED_GENETIC_CODE:
-            srcs: set = {tuple(dst_ep) for dst_eps in json_graph.values() for dst_ep in dst_eps if dst_ep[CPI.ROW] == row}
-            sorted_srcs: list[list[EndPointType]] = sorted(srcs, key=lambda ep: ep[CPI.IDX])
-            src_iface: interface = EMPTY_INTERFACE if not sorted_srcs else interface([ep[CPI.TYP] for ep in sorted_srcs])
-            dst_iface: interface = (
-                EMPTY_INTERFACE if row not in json_graph else interface([cast(EndPointType, ep[CPI.TYP]) for ep in json_graph[row]])
-            )
+            types: list[EndPointType] = parsed.src_interface_types(cast(SourceRow, row))
+            src_iface: interface = canonical_interface(types) if types else EMPTY_INTERFACE
+            dst_iface: interface = canonical_interface(parsed.dst_types[row]) if row in parsed.dst_types else EMPTY_INTERFACE
             return src_iface, dst_iface
         return gcx["graph"].rows[SrcRowIndex.I], gcx["graph"].rows[DstRowIndex.O]
 
@@ -151,11 +148,14 @@ class rows(ndarray):
         max_eps: int,
         ep_types: tuple[EndPointType, ...],
         io: tuple[interface, interface],
+        rng: Random = GLOBAL_RANDOM,
     ) -> None:
         """Randomly generate the rows. Generate rows in the order they provide sources in
         the graph so that the types available for each dependent row are known at generation time.
         If gcx is defined it is used for the I and O interfaces. NOTE: To guarantee a valid graph
         when gcx is defined the O interface should use only types at appear in the I interface.
+        Random choices are made with rng (default the random module global instance).
+        Interfaces are the frozen canonical interfaces from the interface registry.
         """
         has_f: bool = "F" in rows_str
         if io[0] is not EMPTY_INTERFACE:
@@ -165,22 +165,22 @@ class rows(ndarray):
                 has_f = False
         elif "I" in rows_str:
             # If F is to be defined ensure at least one endpoint has type bool.
-            num_eps: int = randint(1, max_eps) if not has_f else randint(1, max_eps - 1)
+            num_eps: int = rng.randint(1, max_eps) if not has_f else rng.randint(1, max_eps - 1)
             bool_type_extension: list[int] = [ep_type_lookup["n2v"]["bool"]] if has_f else []
-            self[SrcRowIndex.I] = interface(choices(ep_types, k=num_eps) + bool_type_extension)
+            self[SrcRowIndex.I] = canonical_interface(rng.choices(ep_types, k=num_eps) + bool_type_extension)
         if "C" in rows_str:
-            types: list[EndPointType] = choices(ep_types, k=max_eps)
-            values: list[str] = [random_constant_str(ept) for ept in types]
+            types: list[EndPointType] = rng.choices(ep_types, k=max_eps)
+            values: list[str] = [random_constant_str(ept, rng) for ept in types]
             self[SrcRowIndex.C] = interface_c(values=values, types=types)
         if has_f:
             self[DstRowIndex.F] = INTERFACE_F
         valid_types: tuple[EndPointType, ...] = tuple(set(self[SrcRowIndex.I]) | set(self[SrcRowIndex.C]))
         # _logger.debug(f"valid_types: {valid_types}")
         if "A" in rows_str:
-            self[SrcRowIndex.A] = interface(choices(ep_types, k=randint(1, max_eps)))
+            self[SrcRowIndex.A] = canonical_interface(rng.choices(ep_types, k=rng.randint(1, max_eps)))
             # Need valid source rows to be present to have a valid destination row.
             if any(row in rows_str for row in VALID_ROW_SOURCES[has_f]["A"]):
-                self[DstRowIndex.A] = interface(choices(valid_types, k=randint(1, max_eps)))
+                self[DstRowIndex.A] = canonical_interface(rng.choices(valid_types, k=rng.randint(1, max_eps)))
             else:
                 self[DstRowIndex.A] = EMPTY_INTERFACE
             # If there is no row F row sources are valid for rows B & O
@@ -189,19 +189,20 @@ class rows(ndarray):
         if "B" in rows_str:
             # Need valid source rows to be present to have a valid destination row.
             if any(row in rows_str for row in VALID_ROW_SOURCES[has_f]["B"]):
-                self[DstRowIndex.B] = interface(choices(valid_types, k=randint(1, max_eps)))
+                self[DstRowIndex.B] = canonical_interface(rng.choices(valid_types, k=rng.randint(1, max_eps)))
             else:
                 self[DstRowIndex.B] = EMPTY_INTERFACE
             if not has_f:
                 # If there is no row F row B sources are valid for O
-                self[SrcRowIndex.B] = interface(choices(ep_types, k=randint(1, max_eps)))
+                self[SrcRowIndex.B] = canonical_interface(rng.choices(ep_types, k=rng.randint(1, max_eps)))
                 valid_types = tuple(set(valid_types) | set(self[SrcRowIndex.B]))
             else:
                 # If there is a row F row B sources are valid for P and must have the same
                 # types available as for O. Easiest way to do this is just be duplicating
                 # the A source interface shuffled.
-                self[SrcRowIndex.B] = self[SrcRowIndex.A].copy()
-                shuffle(self[SrcRowIndex.B])
+                b_types: list[EndPointType] = self[SrcRowIndex.A].tolist()
+                rng.shuffle(b_types)
+                self[SrcRowIndex.B] = canonical_interface(b_types)
         if io[1] is not EMPTY_INTERFACE:
             self[DstRowIndex.O] = io[1]
             missing = list(set(io[1]) - set(valid_types))
@@ -209,24 +210,30 @@ class rows(ndarray):
                 # There are types in the O interface that are not in the I, A, B or C interfaces. Force into row C.
                 if self[SrcRowIndex.C] is EMPTY_INTERFACE_C:
                     # A new C interface
-                    self[SrcRowIndex.C] = interface_c(values=[random_constant_str(ept) for ept in missing], types=missing)
+                    self[SrcRowIndex.C] = interface_c(values=[random_constant_str(ept, rng) for ept in missing], types=missing)
                 else:
                     # Extend the interface that was there before.
-                    vals: list[str] = list(self[SrcRowIndex.C].values) + [random_constant_str(ept) for ept in missing]
+                    vals: list[str] = list(self[SrcRowIndex.C].values) + [random_constant_str(ept, rng) for ept in missing]
                     self[SrcRowIndex.C] = interface_c(values=vals, types=self[SrcRowIndex.C].tolist() + missing)
         elif "O" in rows_str:
-            self[DstRowIndex.O] = interface(choices(valid_types, k=randint(1, max_eps)))
+            self[DstRowIndex.O] = canonical_interface(rng.choices(valid_types, k=rng.randint(1, max_eps)))
         self[DstRowIndex.P] = self[DstRowIndex.O] if has_f else EMPTY_INTERFACE
         self[DstRowIndex.U] = EMPTY_INTERFACE
 
     def setu(self, row_u_types: list[int]) -> None:
         """Set the row U interface. This is a special use case for random graphs."""
-        self[DstRowIndex.U] = interface(row_u_types)
+        self[DstRowIndex.U] = canonical_interface(row_u_types)
 
     def valid(self, idx: SrcRowIndex | DstRowIndex) -> bool:
         """Return True if the row is valid."""
         return self[idx] is not EMPTY_INTERFACE if idx != SrcRowIndex.C else self[idx] is not EMPTY_INTERFACE_C
 
+    def freeze(self) -> Self:
+        """Make the rows and all their interfaces immutable."""
+        for iface in self:
+            iface.freeze()
+        return super().freeze()
+
     def get_interface(self, iface: str = "IO") -> tuple[interface, interface]:
         """Return the source and destination interfaces."""
         if iface == "IO":
@@ -246,4 +253,4 @@ class rows(ndarray):
             assert self[DstRowIndex.P] is self[DstRowIndex.O], "Row P must be the same as row O when F is defined."
 
 
-EMPTY_ROWS = rows({})
+EMPTY_ROWS = rows({}).freeze()
@@ -0,0 +1,175 @@
+"""Unit tests & benchmarks for array_internal_graph.py."""
+from copy import deepcopy
+from json import load
+from logging import DEBUG, Logger, NullHandler, getLogger
+from os.path import dirname, join
+from random import Random
+from time import perf_counter
+from typing import Any
+
+from egp_types.array_internal_graph import array_internal_graph
+from egp_types.egp_typing import DST_EP, ROWS, SRC_EP, JSONGraph
+from egp_types.end_point import dst_end_point, src_end_point, str_to_key, x_end_point
+from egp_types.internal_graph import internal_graph, internal_graph_from_JSONGraph, internal_graph_from_json
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+with open(join(dirname(__file__), "data/random_internal_graph.json"), "r", encoding="utf-8") as f:
+    RANDOM_GRAPHS: list[internal_graph] = [internal_graph_from_json(json_igraph) for json_igraph in load(f)[:200]]
+
+
+def _assert_same(igraph: internal_graph, aigraph: array_internal_graph) -> None:
+    """The array internal graph has the same end points & filter results as the internal graph."""
+    assert aigraph == igraph and list(aigraph.keys()) == list(igraph.keys()) and len(aigraph) == len(igraph)
+    filters: tuple[str, ...] = ("dst_filter", "dst_ref_filter", "dst_unref_filter", "src_filter", "src_ref_filter", "src_unref_filter")
+    for name in filters:
+        assert list(getattr(aigraph, name)()) == list(getattr(igraph, name)()), name
+    for row in ROWS:
+        assert list(aigraph.row_filter(row)) == list(igraph.row_filter(row))
+        assert aigraph.has_row(row) == igraph.has_row(row)
+        for cls in (DST_EP, SRC_EP):
+            assert list(aigraph.row_cls_filter(row, cls)) == list(igraph.row_cls_filter(row, cls))
+            assert aigraph.row_types(row, cls) == igraph.row_types(row, cls)
+            assert aigraph.num_eps(row, cls) == igraph.num_eps(row, cls)
+    assert list(aigraph.src_rows_filter(("I", "A"))) == list(igraph.src_rows_filter(("I", "A")))
+    assert list(aigraph.dst_rows_filter(("O", "B"))) == list(igraph.dst_rows_filter(("O", "B")))
+    assert aigraph.json_obj() == igraph.json_obj()
+
+
+def test_array_internal_graph() -> None:
+    """The array internal graph behaves the same as the internal graph."""
+    for igraph in RANDOM_GRAPHS:
+        igraph = deepcopy(igraph)
+        aigraph: array_internal_graph = array_internal_graph(igraph)
+        _assert_same(igraph, aigraph)
+        assert aigraph.copy_rows(("A", "I")) == igraph.copy_rows(("A", "I"))
+        assert aigraph.move_row("O", "P", True) == igraph.move_row("O", "P", True)
+        assert aigraph.append_connect("I", "A") == igraph.append_connect("I", "A")
+        assert aigraph.as_row("A") == igraph.as_row("A")
+
+        # Modify both in the same way
+        for graph in (igraph, aigraph):
+            graph.add(src_end_point("I", graph.next_idx("I", SRC_EP), 2))
+            graph.add(dst_end_point("O", graph.next_idx("O", DST_EP), 2, refs=[src_end_point(*("I", 0, 2)).as_ref()]))
+            graph.complete_dst_references("O")
+            graph.extend_type_interface("A")
+            del graph[next(graph.src_unref_filter()).key()]
+        _assert_same(igraph, aigraph)
+        redirected: internal_graph = deepcopy(igraph)
+        aredirected: array_internal_graph = array_internal_graph(redirected)
+        for graph in (redirected, aredirected):
+            graph.redirect_refs("O", DST_EP, "I", "C")
+        _assert_same(redirected, aredirected)
+        assert aigraph.reindex_src_row("A") == igraph.reindex_src_row("A")
+        assert aigraph.reindex_dst_row("B", True) == igraph.reindex_dst_row("B", True)
+        _assert_same(igraph, aigraph)
+        assert aigraph.strip_unconnected_dst_eps("O") == igraph.strip_unconnected_dst_eps("O")
+        _assert_same(igraph, aigraph)
+        copied: array_internal_graph = aigraph.copy()
+        snapshot: dict[int, Any] = dict(aigraph.items())
+        igraph.remove_row("I")
+        aigraph.remove_row("I")
+        _assert_same(igraph, aigraph)
+        igraph.reindex()
+        aigraph.reindex()
+        _assert_same(igraph, aigraph)
+        assert copied == snapshot and list(copied.keys()) == list(snapshot.keys())
+        assert copied.pop(-1, None) is None and copied.popitem()[0] == list(snapshot.keys())[-1]
+
+
+def _connected_json_graph(rng: Random) -> JSONGraph:
+    """Return a random JSON graph with rows A, B & O connected to rows I, C, A & B."""
+    json_graph: JSONGraph = {"C": [[str(idx), 2] for idx in range(rng.randint(0, 3))]}
+    srcs: list[tuple[str, int]] = [("I", idx) for idx in range(rng.randint(1, 6))] + [("C", idx) for idx in range(len(json_graph["C"]))]
+    for row in ("A", "B", "O"):
+        json_graph[row] = [[*rng.choice(srcs), 2] for _ in range(rng.randint(1, 6))]  # type: ignore
+        srcs.extend((row, idx) for idx in range(rng.randint(1, 4)))
+    return json_graph
+
+
+def test_array_internal_graph_connected() -> None:
+    """The array internal graph behaves the same as the internal graph when the end points are connected."""
+    rng: Random = Random(1)
+    for _ in range(200):
+        igraph: internal_graph = internal_graph_from_JSONGraph(_connected_json_graph(rng))
+        aigraph: array_internal_graph = array_internal_graph(igraph)
+        _assert_same(igraph, aigraph)
+        assert aigraph.copy_rows(("A", "O")) == igraph.copy_rows(("A", "O"))
+        assert aigraph.move_row("A", "B") == igraph.move_row("A", "B")
+
+        # Redirect references
+        redirected: internal_graph = deepcopy(igraph)
+        aredirected: array_internal_graph = array_internal_graph(redirected)
+        for graph in (redirected, aredirected):
+            graph.redirect_refs("O", DST_EP, "A", "B")
+            graph.redirect_refs("I", SRC_EP, "A", "O")
+        _assert_same(redirected, aredirected)
+
+        # Complete references from the source or the destination end only
+        for cls, rows, method in ((DST_EP, "ICAB", "complete_src_references"), (SRC_EP, "ABO", "complete_dst_references")):
+            stripped: internal_graph = internal_graph({key: ep.copy(ep.cls == cls) for key, ep in igraph.items()})
+            astripped: array_internal_graph = array_internal_graph(stripped)
+            for graph in (stripped, astripped):
+                for row in rows:
+                    getattr(graph, method)(row)
+            _assert_same(stripped, astripped)
+            assert stripped == igraph
+
+        # Remove a connected destination end point & reindex rewriting the references
+        for graph in (igraph, aigraph):
+            dst_ep: x_end_point = graph[str_to_key("O000d")]
+            src_ep: x_end_point = graph[dst_ep.refs[0].key()]
+            src_ep.refs.remove(dst_ep.as_ref())
+            graph[src_ep.key()] = src_ep
+            del graph[dst_ep.key()]
+        assert aigraph.reindex_dst_row("O") == igraph.reindex_dst_row("O")
+        _assert_same(igraph, aigraph)
+        for row in ("A", "B"):
+            assert aigraph.reindex_src_row(row) == igraph.reindex_src_row(row)
+            _assert_same(igraph, aigraph)
+        copied: array_internal_graph = aigraph.copy()
+        snapshot: dict[int, Any] = dict(aigraph.items())
+        igraph.reindex(False)
+        aigraph.reindex(False)
+        _assert_same(igraph, aigraph)
+        assert copied == snapshot and list(copied.keys()) == list(snapshot.keys())
+        cloned: array_internal_graph = copied.clone()
+        cloned.popitem()
+        assert copied == snapshot and cloned != copied
+
+
+def test_array_internal_graph_compaction() -> None:
+    """Dead endpoint & reference slots are compacted away so storage is bounded by the size of the graph."""
+    igraph: internal_graph = internal_graph_from_JSONGraph(
+        {"A": [["I", 0, 2], ["I", 1, 2]], "B": [["A", 0, 2], ["I", 1, 2]], "O": [["B", 0, 2], ["A", 0, 2]]}
+    )
+    aigraph: array_internal_graph = array_internal_graph(igraph)
+    num_refs: int = sum(len(ep.refs) for ep in igraph.values())
+    for _ in range(100):
+        aigraph.reindex(False)
+    assert aigraph == igraph and aigraph._num < 2 * len(aigraph)
+    ep: x_end_point = aigraph[str_to_key("I001s")]
+    for _ in range(1000):
+        aigraph[ep.key()] = ep
+        aigraph.add(src_end_point("C", 0, 2))
+        del aigraph[str_to_key("C000s")]
+    assert aigraph == igraph and len(aigraph._live) <= 4 * len(aigraph) and len(aigraph._ref_live) <= 4 * num_refs
+
+
+def test_array_internal_graph_copy_benchmark() -> None:
+    """Benchmark copying array internal graphs against deep copying internal graphs."""
+    igraphs: list[internal_graph] = RANDOM_GRAPHS
+    aigraphs: list[array_internal_graph] = [array_internal_graph(igraph) for igraph in igraphs]
+    start: float = perf_counter()
+    copies: list[Any] = [deepcopy(igraph) for igraph in igraphs]
+    deepcopy_time: float = perf_counter() - start
+    start = perf_counter()
+    copies = [aigraph.copy() for aigraph in aigraphs]
+    copy_time: float = perf_counter() - start
+    assert all(copy == igraph for copy, igraph in zip(copies, igraphs))
+    _logger.info(f"Copy {len(igraphs)} graphs: deepcopy {deepcopy_time * 1000:.3f} ms, array copy {copy_time * 1000:.3f} ms")
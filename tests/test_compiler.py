@@ -0,0 +1,167 @@
+"""Unit tests for compiler.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+from time import perf_counter
+from typing import Any
+
+import pytest
+
+from numpy.random import default_rng
+from numpy.typing import NDArray
+
+from egp_types._genetic_code import DEFAULT_DYNAMIC_MEMBER_VALUES, _genetic_code
+from egp_types.compiler import CodonLibrary, gc_compiler
+from egp_types.genetic_code import CODON_CREATOR_UUID, genetic_code_factory
+from egp_types.genetic_code_cache import genetic_code_cache
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Codon signatures
+ADD: bytes = bytes([1] * 32)
+MUL: bytes = bytes([2] * 32)
+DIVMOD: bytes = bytes([3] * 32)
+LIBRARY: CodonLibrary = {ADD: "{i0} + {i1}", MUL: "{i0} * {i1}", DIVMOD: "divmod({i0}, {i1})"}
+
+
+def _codon(gcc: genetic_code_cache, signature: bytes, num_outputs: int = 1) -> _genetic_code:
+    """Return a codon with two int inputs and num_outputs int outputs."""
+    gc_dict: dict[str, Any] = DEFAULT_DYNAMIC_MEMBER_VALUES.copy()
+    gc_dict.update(
+        {
+            "creator": CODON_CREATOR_UUID,
+            "signature": memoryview(bytearray(signature)),
+            "graph": {"A": [["I", 0, 2], ["I", 1, 2]], "O": [["A", idx, 2] for idx in range(num_outputs)]},
+        }
+    )
+    return gcc.genetic_code_type(gc_dict)
+
+
+def _gcc() -> genetic_code_cache:
+    """Return a small genetic code cache."""
+    return genetic_code_cache(genetic_code_factory(), size=64)
+
+
+def test_compile_codon() -> None:
+    """A codon compiles to its inline expression."""
+    gcc: genetic_code_cache = _gcc()
+    compiler = gc_compiler(LIBRARY)
+    assert compiler(_codon(gcc, ADD), (3, 4)) == (7,)
+    assert compiler(_codon(gcc, DIVMOD, 2), (7, 2)) == (3, 1)
+
+
+def test_compile_gc() -> None:
+    """A genetic code with constants compiles to a single flat function."""
+    gcc: genetic_code_cache = _gcc()
+    add: _genetic_code = _codon(gcc, ADD)
+    mul: _genetic_code = _codon(gcc, MUL)
+    # (i0 + i1) * 3, i1
+    json_graph: dict[str, Any] = {
+        "A": [["I", 0, 2], ["I", 1, 2]],
+        "B": [["A", 0, 2], ["C", 0, 2]],
+        "O": [["B", 0, 2], ["I", 1, 2]],
+        "C": [["3", 2]],
+    }
+    gc: _genetic_code = gcc.genetic_code_type({"gca": add, "gcb": mul, "graph": json_graph})
+    compiler = gc_compiler(LIBRARY)
+    source: str = compiler.source(gc)
+    _logger.debug(f"Source:\n{source}")
+    assert "(3)" in source
+    assert compiler(gc, (1, 2)) == (9, 2)
+    assert compiler(gc, (2, 2)) == (12, 2)
+    assert compiler.stats()["misses"] == 1 and compiler.stats()["hits"] == 1
+
+    # Nest it: ((i0 + i1) * 3 + i1) * 3
+    outer: _genetic_code = gcc.genetic_code_type(
+        {"gca": gc, "gcb": gc, "graph": {"A": [["I", 0, 2], ["I", 1, 2]], "B": [["A", 0, 2], ["A", 1, 2]], "O": [["B", 0, 2]]}}
+    )
+    assert compiler(outer, (1, 2)) == (33,)
+
+
+def test_compile_f() -> None:
+    """Row F chooses between the GCA & GCB paths."""
+    gcc: genetic_code_cache = _gcc()
+    json_graph: dict[str, Any] = {
+        "F": [["I", 0, 1]],
+        "A": [["I", 1, 2], ["I", 2, 2]],
+        "B": [["I", 1, 2], ["I", 2, 2]],
+        "O": [["A", 0, 2]],
+        "P": [["B", 0, 2]],
+    }
+    gc: _genetic_code = gcc.genetic_code_type({"gca": _codon(gcc, ADD), "gcb": _codon(gcc, MUL), "graph": json_graph})
+    compiler = gc_compiler(LIBRARY)
+    assert compiler(gc, (True, 3, 4)) == (7,)
+    assert compiler(gc, (False, 3, 4)) == (12,)
+
+
+def test_compile_errors() -> None:
+    """Codons must be in the library."""
+    gcc: genetic_code_cache = _gcc()
+    with pytest.raises(ValueError):
+        gc_compiler({}).function(_codon(gcc, ADD))
+
+
+def test_compiler_cache() -> None:
+    """The compiler cache is LRU bounded."""
+    gcc: genetic_code_cache = _gcc()
+    compiler = gc_compiler(LIBRARY, size=2)
+    add, mul, divmod_ = _codon(gcc, ADD), _codon(gcc, MUL), _codon(gcc, DIVMOD, 2)
+    compiler.function(add)
+    compiler.function(mul)
+    compiler.function(add)
+    compiler.function(divmod_)
+    assert len(compiler) == 2
+    compiler.function(add)
+    assert compiler.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 3}
+    compiler.function(mul)
+    assert compiler.stats()["misses"] == 4
+
+
+def test_batch() -> None:
+    """Batched execution gives the same results as per sample execution with & without vectorized codons."""
+    gcc: genetic_code_cache = _gcc()
+    add: _genetic_code = _codon(gcc, ADD)
+    json_graph: dict[str, Any] = {
+        "F": [["I", 0, 1]],
+        "A": [["I", 1, 2], ["I", 2, 2]],
+        "B": [["C", 0, 2], ["I", 2, 2]],
+        "O": [["A", 0, 2], ["C", 0, 2]],
+        "P": [["B", 0, 2], ["I", 1, 2]],
+        "C": [["3", 2]],
+    }
+    gc: _genetic_code = gcc.genetic_code_type({"gca": add, "gcb": _codon(gcc, MUL), "graph": json_graph})
+    rng = default_rng(1)
+    columns: list[NDArray] = [rng.integers(0, 2, 1000).astype(bool), rng.integers(-100, 100, 1000), rng.integers(-100, 100, 1000)]
+    samples: list[tuple] = list(zip(*(column.tolist() for column in columns)))
+    for vectorized in (set(), {ADD, MUL}):
+        compiler = gc_compiler(LIBRARY, vectorized=vectorized)
+        results: tuple[NDArray, ...] = compiler.batch(gc, columns)
+        assert len(results) == 2 and all(len(result) == 1000 for result in results)
+        assert list(zip(*(result.tolist() for result in results))) == [compiler(gc, sample) for sample in samples]
+
+
+def test_batch_benchmark() -> None:
+    """Benchmark batched execution against per sample execution of a deep genetic code."""
+    gcc: genetic_code_cache = _gcc()
+    gc: _genetic_code = _codon(gcc, ADD)
+    for _ in range(8):
+        json_graph: dict[str, Any] = {"A": [["I", 0, 2], ["I", 1, 2]], "B": [["A", 0, 2], ["I", 1, 2]], "O": [["B", 0, 2], ["A", 0, 2]]}
+        gc = gcc.genetic_code_type({"gca": gc, "gcb": gc, "graph": json_graph})
+    rng = default_rng(1)
+    columns: list[NDArray] = [rng.random(10000), rng.random(10000)]
+    samples: list[tuple] = list(zip(*(column.tolist() for column in columns)))
+    compiler = gc_compiler(LIBRARY, vectorized={ADD})
+    func = compiler.function(gc)
+    start: float = perf_counter()
+    for sample in samples:
+        func(sample)
+    per_sample_time: float = perf_counter() - start
+    compiler.batch(gc, columns)
+    start = perf_counter()
+    results: tuple[NDArray, ...] = compiler.batch(gc, columns)
+    batch_time: float = perf_counter() - start
+    _logger.info(f"{len(samples)} samples per sample: {per_sample_time * 1000:.3f} ms, batched: {batch_time * 1000:.3f} ms")
+    assert results[0].tolist() == [func(sample)[0] for sample in samples]
@@ -0,0 +1,158 @@
+"""Unit tests & benchmarks for connections.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+from random import Random, choice, seed
+from time import perf_counter
+from typing import Callable
+
+import pytest
+
+from numpy import array_equal, ndarray
+
+from egp_types.connections import ConnIdx, connections
+from egp_types.egp_typing import ROWS_INDEXED, VALID_GRAPH_ROW_COMBINATIONS, DstRowIndex, SrcRowIndex
+from egp_types.graph import graph
+from egp_types.interface import EMPTY_INTERFACE, interface, interface_c
+from egp_types.rows import rows
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Constants
+VALID_COMBOS = tuple(VALID_GRAPH_ROW_COMBINATIONS)
+
+
+# Random seed
+seed(2)
+
+
+def _random_graphs(num: int) -> list[graph]:
+    """Return num random graphs."""
+    return [graph({}, rows=choice(VALID_COMBOS), rndm=True) for _ in range(num)]
+
+
+def _masked(cons: connections, row: ConnIdx, idx: int) -> ndarray:
+    """The masked copy method the offsets replace."""
+    return cons[:, cons[row] == idx]
+
+
+def _timeit(func: Callable[[], object], number: int = 10) -> float:
+    """Return the best time of number calls to func."""
+    times: list[float] = []
+    for _ in range(number):
+        start: float = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def test_row_connections() -> None:
+    """Row connections from the offsets are the same as masking all the connections."""
+    for grph in _random_graphs(100):
+        cons: connections = grph.connections
+        for frozen in (False, True):
+            if frozen:
+                cons.freeze()
+            for dri in DstRowIndex:
+                assert array_equal(cons.get_dst_connections(dri), _masked(cons, ConnIdx.DST_ROW, dri))
+            for sri in SrcRowIndex:
+                assert array_equal(cons.get_src_connections(sri), _masked(cons, ConnIdx.SRC_ROW, sri))
+        cons.assertions()
+    assert connections({}).get_dst_connections(DstRowIndex.O).shape == (4, 0)
+
+
+def test_row_connections_benchmark() -> None:
+    """Benchmark json_graph(), __repr__ and row connection (mutation candidate) lookups."""
+    graphs: list[graph] = _random_graphs(200)
+    for grph in graphs[100:]:
+        grph.freeze()
+
+    def lookups() -> None:
+        for grph in graphs:
+            for dri in DstRowIndex:
+                grph.connections.get_dst_connections(dri)
+            for sri in SrcRowIndex:
+                grph.connections.get_src_connections(sri)
+
+    def masked_lookups() -> None:
+        for grph in graphs:
+            for dri in DstRowIndex:
+                _masked(grph.connections, ConnIdx.DST_ROW, dri)
+            for sri in SrcRowIndex:
+                _masked(grph.connections, ConnIdx.SRC_ROW, sri)
+
+    results: dict[str, float] = {
+        "json_graph()": _timeit(lambda: [grph.json_graph() for grph in graphs]),
+        "__repr__": _timeit(lambda: [repr(grph.connections) for grph in graphs]),
+        "lookups": _timeit(lookups),
+        "masked lookups": _timeit(masked_lookups),
+    }
+    for name, duration in results.items():
+        _logger.info(f"{name} for {len(graphs)} graphs: {duration * 1000:.3f} ms")
+
+
+def test_random_connections() -> None:
+    """Each valid source row is equally likely then each endpoint of the right type in it. Seeded draws repeat."""
+    _rows: rows = rows({})
+    _rows[SrcRowIndex.I] = interface([2])
+    _rows[SrcRowIndex.C] = interface_c(values=["1", "2", "3"], types=[2, 2, 2])
+    _rows[DstRowIndex.A] = interface([2])
+    counts: list[int] = [0, 0, 0, 0]
+    rng = Random(1)
+    for _ in range(2000):
+        _rows[DstRowIndex.U] = EMPTY_INTERFACE
+        cons: ndarray = connections._random(_rows, rng)  # pylint: disable=protected-access
+        assert cons.shape == (4, 4)
+        counts[cons[ConnIdx.SRC_ROW, 0]] += 1
+    assert 900 < counts[SrcRowIndex.I] < 1100
+    # Row U is the unconnected source endpoints
+    assert len(_rows[DstRowIndex.U]) == 3
+    _rows[DstRowIndex.U] = EMPTY_INTERFACE
+    first: ndarray = connections._random(_rows, Random(2))  # pylint: disable=protected-access
+    _rows[DstRowIndex.U] = EMPTY_INTERFACE
+    assert array_equal(first, connections._random(_rows, Random(2)))  # pylint: disable=protected-access
+
+
+def test_random_graph_benchmark() -> None:
+    """Benchmark random graph creation."""
+    combos: list = [choice(VALID_COMBOS) for _ in range(1000)]
+    start: float = perf_counter()
+    for combo in combos:
+        graph({}, rows=combo, rndm=True)
+    _logger.info(f"Random graph creation for {len(combos)} graphs: {(perf_counter() - start) * 1000:.3f} ms")
+
+
+def test_planned_connections() -> None:
+    """Planned connections satisfy the plan and are otherwise type compatible."""
+    for _ in range(100):
+        grph: graph = graph({}, rows=choice(VALID_COMBOS), rndm=True)
+        # Plan the first destination endpoint to its existing source endpoint & the last to its existing source row.
+        first, last = grph.connections[:, 0], grph.connections[:, -1]
+        first_dst: str = f"{ROWS_INDEXED[first[ConnIdx.DST_ROW]]}{first[ConnIdx.DST_IDX]}"
+        last_dst: str = f"{ROWS_INDEXED[last[ConnIdx.DST_ROW]]}{last[ConnIdx.DST_IDX]}"
+        if DstRowIndex.U in (first[ConnIdx.DST_ROW], last[ConnIdx.DST_ROW]):
+            continue
+        plan: list[tuple[str, str]] = [
+            (first_dst, f"{ROWS_INDEXED[first[ConnIdx.SRC_ROW]]}{first[ConnIdx.SRC_IDX]}"),
+            (last_dst, ROWS_INDEXED[last[ConnIdx.SRC_ROW]]),
+        ]
+        planned: graph = grph.planned(plan, Random(1))
+        planned.assertions()
+        assert array_equal(planned.connections[:, 0], first)
+        dst_cons: ndarray = planned.connections.get_dst_connections(last[ConnIdx.DST_ROW])
+        assert dst_cons[ConnIdx.SRC_ROW, last[ConnIdx.DST_IDX]] == last[ConnIdx.SRC_ROW]
+        assert planned.rows[SrcRowIndex.I] is grph.rows[SrcRowIndex.I]
+    grph = graph({}, rows="IACO", rndm=True)
+    with pytest.raises(ValueError):
+        grph.planned([("O0", "Z")])
+    with pytest.raises(ValueError):
+        grph.planned([("O99", "I")])
+    with pytest.raises(ValueError):
+        grph.planned([("O0", "I99")])
+    # The random path through graph()
+    grph = graph({}, rows="IACO", rndm=True, plan=[("O0", "I")], rng=Random(3))
+    grph.assertions()
+    assert grph.connections.get_dst_connections(DstRowIndex.O)[ConnIdx.SRC_ROW, 0] == SrcRowIndex.I
@@ -0,0 +1,38 @@
+"""Unit tests for conversions.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+from time import perf_counter
+
+import pytest
+
+from egp_types.conversions import compress_graph, compress_json, decompress_graph, decompress_json
+from egp_types.graph import graph
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+def test_compress_graph() -> None:
+    """Compressed packed graphs decompress to equal graphs and are smaller than compressed JSON graphs."""
+    graphs: list[graph] = [graph({}, rndm=True, rseed=seed) for seed in range(100)]
+    packed: list = [compress_graph(grph) for grph in graphs]
+    assert [decompress_graph(buf) for buf in packed] == graphs
+    json: list = [compress_json(grph.json_graph()) for grph in graphs]
+    assert sum(len(buf) for buf in packed) < sum(len(buf) for buf in json)
+    assert compress_graph(None) is None and decompress_graph(None) is None
+    assert compress_graph(packed[0]) is packed[0]
+    with pytest.raises(TypeError):
+        compress_graph({})  # type: ignore
+
+    # Decoding time comparison
+    start: float = perf_counter()
+    for buf in json:
+        graph(decompress_json(buf))  # type: ignore
+    json_time: float = perf_counter() - start
+    start = perf_counter()
+    for buf in packed:
+        decompress_graph(buf)
+    packed_time: float = perf_counter() - start
+    _logger.info(f"Decompressing {len(graphs)} graphs: JSON {json_time:.4f}s, packed {packed_time:.4f}s.")
@@ -0,0 +1,20 @@
+"""Unit tests for eGC.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+
+from egp_types.eGC import batch_signatures, eGC
+from egp_types.graph import graph
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+def test_batch_signatures() -> None:
+    """Batch signatures are the same as those calculated one at a time."""
+    egcs: list[eGC] = [eGC(json_graph=graph({}, rndm=True, rseed=seed, rows="IABO").json_graph()) for seed in range(8)]
+    egcs.append(eGC(gca=bytes(range(32)), json_graph=egcs[0].graph, meta_data={"function": {"python3": {"0": {"inline": "i0"}}}}))
+    assert batch_signatures(egcs) == [egc.signature() for egc in egcs]
+    assert len(set(batch_signatures(egcs))) == len(egcs)
+    assert not batch_signatures([])
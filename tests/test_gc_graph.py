@@ -345,3 +345,15 @@ def test_nary_compound_modifications(test) -> None:
         codes.discard("E01016")
         codes.discard("E01001")
         assert not codes
+
+
+def test_gc_graph_clone() -> None:
+    """A cloned gc_graph is equal to the original & modifying it does not change the original."""
+    for graph in random_graphs[:100]:
+        json_graph: JSONGraph = graph.igraph.json_graph()
+        clone: gc_graph = graph.clone()
+        assert clone.igraph == graph.igraph and clone.rows == graph.rows and clone.status == graph.status
+        assert clone.rows[DST_EP] is not graph.rows[DST_EP] and clone.rows[SRC_EP] is not graph.rows[SRC_EP]
+        clone.add_input()
+        clone.normalize()
+        assert graph.igraph.json_graph() == json_graph
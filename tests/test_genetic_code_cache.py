@@ -1,8 +1,18 @@
 """Unit tests for genetic_code.py."""
+from gc import collect, get_objects
 from logging import DEBUG, Logger, NullHandler, getLogger
-from random import randint
-from egp_types.genetic_code_cache import genetic_code_cache, GCC_DEFAULT_SIZE, INT64_MAX
-from egp_types.genetic_code import genetic_code_factory
+from random import getstate, randint
+
+import pytest
+
+from numpy import int32, uint8
+from numpy.random import default_rng
+
+from egp_types._genetic_code import DEFAULT_DYNAMIC_MEMBER_VALUES
+from egp_types.ep_type import EP_TYPE_MASK_BITS, MAX_EP_TYPE_VALUE, MIN_EP_TYPE_VALUE, type_mask
+from egp_types.genetic_code_cache import genetic_code_cache, purge_controller, GCC_DEFAULT_SIZE, INT64_MAX, PIN_COUNT_MAX
+from egp_types.genetic_code import CODON_CREATOR_UUID, genetic_code_factory, random_genetic_codes
+from egp_types.graph import graph
 
 
 # Logging
@@ -83,5 +93,314 @@ def test_random_genetic_code() -> None:
     assert gcc[0].signature().sum() != 0
 
 
+def test_pin_purge() -> None:
+    """Pinned genetic codes are never purged even when they are the least recently used."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory())
+    for _ in range(GCC_DEFAULT_SIZE):
+        gcc.genetic_code_type({}, rndm=True, depth=0, rseed=1)
+    pinned: list[int] = [0, 1, 2, 2]
+    gcc.pin(pinned)
+    assert gcc.stats()["pinned"] == 3
+    assert gcc.stats()["pin_references"] == 4
+
+    # Trigger a purge: The oldest genetic codes are pinned so must survive.
+    gcc.genetic_code_type({}, rndm=True, depth=0, rseed=1)
+    empty_indices: set[int] = set(gcc.empty_indices())
+    assert not empty_indices.intersection(pinned)
+    assert len(empty_indices) == GCC_DEFAULT_SIZE // 4 - 1
+
+    # Unpinning releases a single reference per occurrence
+    gcc.unpin([0, 1, 2])
+    assert gcc.pin_count[2] == 1
+    assert gcc.stats()["pinned"] == 1
+    with pytest.raises(ValueError):
+        gcc.unpin([0])
+
+    # Duplicate indices in a single call cannot overflow the pin count
+    gcc.pin_count[3] = PIN_COUNT_MAX - 1
+    with pytest.raises(OverflowError):
+        gcc.pin([3, 3])
+    assert gcc.pin_count[3] == PIN_COUNT_MAX - 1
+
+
+def test_orphan_reclamation() -> None:
+    """Purging the root of a tree orphans its sub-tree which is reclaimed up to the orphan limit.
+    A pinned sub-GC is not reclaimed and continues to need its own dependencies.
+    """
+    for limit, pin, expected in ((0, False, 1), (4, False, 5), (32, False, 15), (32, True, 8)):
+        gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=32, orphan_limit=limit)
+        gcc.genetic_code_type({}, rndm=True, depth=3, rseed=1)
+        assert len(gcc) == 15
+        if pin:
+            gcc.pin(gcc[0]["gca"].idx)
+
+        # Make the root the least recently used genetic code and purge only it.
+        for gc in tuple(gcc.values())[1:]:
+            gc.touch()
+        gcc.purge(fraction=1 / 32)
+        assert len(gcc) == 15 - expected
+        assert gcc.stats()["orphans_reclaimed"] == expected - 1
+        for gc in gcc.values():
+            gc.assertions()
+
+
+def test_purge_leaf() -> None:
+    """Purging a dependency of a genetic code makes it a leaf with the same derived values."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=32)
+    gcc.genetic_code_type({}, rndm=True, depth=2, rseed=1)
+    signature: bytes = gcc[0]["signature"].tobytes()
+    num_codes: int = gcc[0]["num_codes"]
+    gca_idx: int = gcc[0]["gca"].idx
+    for gc in gcc.values():
+        if gc.idx != gca_idx:
+            gc.touch()
+    gcc.purge(fraction=1 / 32)
+    assert gcc[0]["gca"] is gcc.PURGED_GENETIC_CODE
+    assert gcc.common_ds_idx[0] != -1
+    assert gcc[0]["signature"].tobytes() == signature
+    assert gcc[0]["num_codes"] == num_codes
+
+
+def test_purge_controller() -> None:
+    """Re-inserting evicted genetic codes reduces the purge fraction. Frequent purges increase it."""
+    controller = purge_controller(fraction=0.25, min_fraction=0.1, max_fraction=0.5)
+    signatures = default_rng(1).integers(0, 256, (8, 32), dtype=uint8)
+    controller.evicted(signatures[:4])
+    for signature in signatures[2:]:
+        controller.inserted(signature)
+    assert controller.stats()["misses"] == 2
+    assert controller.update(access=1000, size=16) < 0.25
+    assert controller.decisions[-1]["action"] == "decrease"
+    for access in range(1001, 1010):
+        controller.update(access=access, size=16)
+    assert controller.fraction == 0.5
+    assert controller.decisions[-1]["action"] == "increase"
+
+
+def test_adaptive_purge() -> None:
+    """The cache uses the adaptive fraction when it overflows and keeps it within bounds."""
+    gcc: genetic_code_cache = genetic_code_cache(
+        genetic_code_factory(), adaptive_purge=purge_controller(max_fraction=0.5, interval_threshold=4.0)
+    )
+    # Unseeded so the genetic codes are all different: No misses.
+    for _ in range(GCC_DEFAULT_SIZE * 4):
+        gcc.genetic_code_type({}, rndm=True, depth=0)
+    stats = gcc.stats()["purge"]
+    assert stats["decisions"]
+    assert stats["fraction"] == 0.5
+    assert any(decision["action"] == "increase" for decision in stats["decisions"])
+
+
+def test_adaptive_purge_minimum() -> None:
+    """A purge fraction too small to purge a whole genetic code still makes space for one."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), adaptive_purge=purge_controller(fraction=0.05, min_fraction=0.05))
+    for _ in range(GCC_DEFAULT_SIZE + 1):
+        gcc.genetic_code_type({}, rndm=True, depth=0, rseed=1)
+    assert len(gcc) == GCC_DEFAULT_SIZE
+
+
+def test_adaptive_purge_misses() -> None:
+    """Genetic codes created directly that were evicted by the last purge are counted as misses."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), adaptive_purge=purge_controller())
+    gc_dicts: list[dict] = []
+    for _ in range(GCC_DEFAULT_SIZE):
+        gc = gcc.genetic_code_type({}, rndm=True, depth=0)
+        gc_dict: dict = DEFAULT_DYNAMIC_MEMBER_VALUES.copy()
+        gc_dict.update({"creator": CODON_CREATOR_UUID, "signature": gc["signature"].copy(), "graph": gc["graph"]})
+        gc_dicts.append(gc_dict)
+    gcc.genetic_code_type({}, rndm=True, depth=0)
+    assert gcc.stats()["purge"]["misses"] == 0
+    gcc.genetic_code_type(gc_dicts[0])
+    assert gcc.stats()["purge"]["misses"] == 1
+    gcc.genetic_code_type(gc_dicts[-1])
+    assert gcc.stats()["purge"]["misses"] == 1
+
+
+def test_handle_mode() -> None:
+    """A store in handle mode holds the same genetic codes as one in object mode with far fewer objects."""
+    gccs: list[genetic_code_cache] = [
+        genetic_code_cache(genetic_code_factory(), size=64, handles=h, proxy_cache_size=8) for h in (False, True)
+    ]
+    for gcc in gccs:
+        gcc.genetic_code_type({}, rndm=True, depth=4, rseed=1)
+        gcc.assertions()
+    assert len(gccs[0]) == len(gccs[1]) == 31
+    collect()
+    num_objects: list[int] = [sum(isinstance(obj, gcc.genetic_code_type) for obj in get_objects()) for gcc in gccs]
+    assert num_objects[0] == 31
+    assert num_objects[1] <= 8
+    assert gccs[1].stats()["proxies"]["proxies"] <= 8
+    assert isinstance(gccs[1].gca.handles[0], int32)
+    for gc_o, gc_h in zip(gccs[0].values(), gccs[1].values()):
+        assert gc_o.idx == gc_h.idx
+        assert gc_o["signature"].tobytes() == gc_h["signature"].tobytes()
+        assert gc_o["gca"].idx == gc_h["gca"].idx
+    assert gccs[1][0] == gccs[1][0]
+    assert gccs[1][0]["gca"] == gccs[1].genetic_code[gccs[1].gca.handles[0]]
+
+    # Purging & orphan reclamation work with handles
+    gcc = gccs[1]
+    gcc.orphan_limit = 64
+    for gc in tuple(gcc.values())[1:]:
+        gc.touch()
+    gcc.purge(fraction=1 / 64)
+    assert len(gcc) == 0
+    assert not gcc.genetic_code.valid.any()
+
+
+def test_object_mode_identity() -> None:
+    """In object mode a reference to a deleted genetic code is not equal to the genetic code that reuses its index."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory())
+    for _ in range(GCC_DEFAULT_SIZE):
+        gcc.genetic_code_type({}, rndm=True, depth=0)
+    stale = gcc[0]
+    assert stale == gcc[0]
+    gcc.genetic_code_type({}, rndm=True, depth=0)
+    assert gcc[0].idx == stale.idx
+    assert stale != gcc[0]
+    assert len({stale, gcc[0]}) == 2
+
+
+def test_compact_dynamic_store() -> None:
+    """Compacting the dynamic store makes the leaf entries dense and preserves their values."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=64)
+    for _ in range(64):
+        gcc.genetic_code_type({}, rndm=True, depth=0, rseed=1)
+    for idx in range(0, 64, 4):
+        for offset in range(3):
+            del gcc[idx + offset]
+    assert gcc.stats()["ds_fragmentation"] > 0.7
+    signatures: dict[int, bytes] = {gc.idx: gc["signature"].tobytes() for gc in gcc.values()}
+    assert gcc.compact_dynamic_store() == 16
+    assert gcc.stats()["ds_fragmentation"] == 0.0
+    assert sorted(gcc.common_ds_idx[gcc.common_ds_idx != -1]) == list(range(16))
+    assert signatures == {gc.idx: gc["signature"].tobytes() for gc in gcc.values()}
+    gcc.genetic_code_type({}, rndm=True, depth=0, rseed=1)
+    assert gcc.stats()["ds_entries"] == 17
+
+
+def test_batch_signatures() -> None:
+    """Batch signatures are the same as those calculated one at a time."""
+    for handles in (False, True):
+        gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=128, handles=handles)
+        gcc.genetic_code_type({}, rndm=True, depth=5, rseed=1)
+        indices = [0, 5, 17, 0]
+        batch = gcc.batch_signatures(indices)
+        assert batch.shape == (4, 32)
+        for idx, sig in zip(indices, batch):
+            assert gcc[idx]["signature"].tobytes() == sig.tobytes()
+        everything = gcc.batch_signatures()
+        assert [s.tobytes() for s in gcc.signatures()] == [s.tobytes() for s in everything]
+
+
+def test_random_genetic_codes() -> None:
+    """The random genetic code forest generator is reproducible and can reuse sub-genetic codes."""
+    results: list[list[bytes]] = []
+    for _ in range(2):
+        gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=256)
+        state = getstate()
+        roots: list[int] = random_genetic_codes(gcc.genetic_code_type, 4, depth=3, rng=default_rng(42))
+        assert getstate() == state
+        assert len(roots) == 4
+        assert len(gcc) == 4 * 15
+        assert all(gcc[root]["code_depth"] == 3 for root in roots)
+        assert not gcc.pin_count.any()
+        gcc.assertions()
+        results.append([sig.tobytes() for sig in gcc.batch_signatures(roots)])
+    assert results[0] == results[1]
+
+    # Small interfaces make reuse likely.
+    gcc = genetic_code_cache(genetic_code_factory(), size=256)
+    roots = random_genetic_codes(
+        gcc.genetic_code_type, 8, depth=3, rng=default_rng(1), reuse=1.0, rows_strs=("IABO",), ep_types=(2,), max_eps=2
+    )
+    assert len(gcc) < 8 * 15
+    for root in roots:
+        gcc[root].assertions()
+        assert gcc[root]["num_codes"] >= gcc[root]["code_depth"]
+    with pytest.raises(ValueError):
+        random_genetic_codes(gcc.genetic_code_type, 32, depth=4)
+
+
+def test_optimize() -> None:
+    """Optimizing the cache freezes the graphs and shares equal interfaces."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=256)
+    random_genetic_codes(gcc.genetic_code_type, 4, depth=3, rng=default_rng(3), rows_strs=("IABO",), ep_types=(2,), max_eps=2)
+    digests: list[bytes] = [gc["graph"].digest() for gc in gcc.values()]
+    gcc.optimize()
+    assert all(gc["graph"].frozen() for gc in gcc.values())
+    assert [gc["graph"].digest() for gc in gcc.values()] == digests
+    ifaces: dict[int, int] = {}
+    for gc in gcc.values():
+        for iface in filter(len, gc["graph"].rows):
+            assert ifaces.setdefault(hash(iface), id(iface)) == id(iface)
+    # Optimized graphs cannot be modified in place.
+    _graph: graph = next(iter(gcc.values()))["graph"]
+    with pytest.raises(ValueError):
+        _graph.connections[0, 0] = 0
+    with pytest.raises(ValueError):
+        _graph.rows[0] = _graph.rows[1]
+    gcc.optimize()
+    gcc.assertions()
+
+
+def test_interface_index() -> None:
+    """Genetic codes are found by exact or order agnostic IO interface and removed from the index when deleted."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=64)
+    json_graphs: tuple[dict, ...] = (
+        {"A": [["I", 0, 2], ["I", 1, 3]], "O": [["A", 0, 2]]},
+        {"A": [["I", 0, 2], ["I", 1, 3]], "O": [["A", 0, 2]]},
+        {"A": [["I", 1, 2], ["I", 0, 3]], "O": [["A", 0, 2]]},
+        {"A": [["I", 0, 2], ["I", 1, 3]], "O": [["A", 0, 3]]},
+    )
+    indices: list[int] = []
+    for json_graph in json_graphs:
+        gc_dict = DEFAULT_DYNAMIC_MEMBER_VALUES.copy()
+        gc_dict.update({"creator": CODON_CREATOR_UUID, "signature": default_rng().integers(0, 256, 32, dtype=uint8), "graph": json_graph})
+        indices.append(gcc.genetic_code_type(gc_dict).idx)
+    assert gcc.find_interface([2, 3], [2]).tolist() == indices[:2]
+    assert gcc.find_interface([3, 2], [2]).tolist() == indices[2:3]
+    assert gcc.find_interface([3, 2], [2], ordered=False).tolist() == indices[:3]
+    assert gcc.find_interface([2, 3], [3]).tolist() == indices[3:]
+    assert not len(gcc.find_interface([2], [3], ordered=False))
+
+    del gcc[indices[0]]
+    assert gcc.find_interface([2, 3], [2], ordered=False).tolist() == indices[1:3]
+    gcc.reset()
+    assert not len(gcc.find_interface([2, 3], [2], ordered=False))
+
+
+def test_interface_index_purge() -> None:
+    """The interface index holds exactly the genetic codes in the store after purges."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory())
+    for _ in range(GCC_DEFAULT_SIZE * 3):
+        gcc.genetic_code_type({}, rndm=True, depth=0)
+    indexed: set[int] = set()
+    for gc in gcc.values():
+        inputs, outputs = gc["graph"].get_io()
+        assert gc.idx in gcc.find_interface(inputs.tolist(), outputs.tolist()).tolist()
+        assert gc.idx in gcc.find_interface(inputs.tolist()[::-1], outputs.tolist(), ordered=False).tolist()
+        indexed.add(gc.idx)
+    assert set().union(*gcc._ordered_io_index.values()) == indexed  # pylint: disable=protected-access
+    assert set().union(*gcc._unordered_io_index.values()) == indexed  # pylint: disable=protected-access
+
+
+def test_type_sets() -> None:
+    """Genetic codes are found by input type subset & output type superset."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=64)
+    for _ in range(48):
+        gcc.genetic_code_type({}, rndm=True, depth=0)
+    del gcc[7]
+    for inputs, outputs in (([2, 3], [2]), ([1, 2, 3, 4], []), (None, [3, 4]), ([0, 1, 2, 3, 4, 5], None), ([], None)):
+        expected: list[int] = []
+        for gc in gcc.values():
+            gc_inputs, gc_outputs = gc["graph"].get_io()
+            if (inputs is None or set(gc_inputs.tolist()) <= set(inputs)) and (outputs is None or set(gc_outputs.tolist()) >= set(outputs)):
+                expected.append(gc.idx)
+        assert gcc.find_type_sets(inputs, outputs).tolist() == sorted(expected)
+    assert 7 not in gcc.find_type_sets().tolist() and len(gcc.find_type_sets()) == len(gcc)
+    assert type_mask([MIN_EP_TYPE_VALUE, MAX_EP_TYPE_VALUE, MIN_EP_TYPE_VALUE]) == 1 | 1 << (EP_TYPE_MASK_BITS - 1)
+
+
 if __name__ == "__main__":
     test_random_genetic_code()
@@ -2,12 +2,15 @@
 from logging import DEBUG, Logger, NullHandler, getLogger
 from random import choice, seed
 from pprint import pformat
+from time import perf_counter
 
 import pytest
 
-from egp_types.egp_typing import VALID_GRAPH_ROW_COMBINATIONS, JSONGraph
+from egp_types.connections import ConnIdx
+from egp_types.egp_typing import ROWS_INDEXED, VALID_GRAPH_ROW_COMBINATIONS, DstRowIndex, JSONGraph, SrcRowIndex
 from egp_types.genetic_code import graph
 from egp_types.graph_validators import graph_validator
+from egp_types.interface import interface
 from egp_types.internal_graph import internal_graph_from_JSONGraph, internal_graph
 
 
@@ -44,6 +47,90 @@ def test_graph_mermaid() -> None:
     _logger.debug(f"Graph Mermaid Chart:\n{grph}")
 
 
+def test_shared_interfaces() -> None:
+    """Graphs with the same interfaces share the canonical interface instances (constants are not shared)."""
+    first: graph = graph(TEST_GRAPH)
+    second: graph = graph(TEST_GRAPH)
+    assert all(a is b for idx, (a, b) in enumerate(zip(first.rows, second.rows)) if idx != SrcRowIndex.C)
+
+
+def test_frozen_graph() -> None:
+    """A frozen graph caches its digest until its rows or connections are replaced."""
+    grph: graph = graph(TEST_GRAPH)
+    other: graph = graph(TEST_GRAPH)
+    assert not grph.frozen()
+    assert hash(grph) == hash(other) and grph.digest() == other.digest()
+    assert grph.freeze().frozen()
+    assert grph.rows[0].frozen()
+    with pytest.raises(ValueError):
+        grph.connections[0, 0] = 1
+    assert hash(grph) == hash(other) and grph.digest() == other.digest()
+    assert grph in {other: None}
+    grph.connections = other.connections
+    assert not grph.frozen()
+    assert grph.digest() == other.digest()
+
+
+def test_packed_graph() -> None:
+    """A graph decoded from the packed binary format is equal to the original and references the buffer."""
+    grph: graph = graph(TEST_GRAPH)
+    buf: bytes = grph.to_bytes()
+    decoded: graph = graph.from_buffer(buf)
+    assert decoded == grph
+    assert decoded.json_graph() == grph.json_graph()
+    assert decoded.frozen()
+    assert not decoded.connections.flags.owndata
+    assert decoded.rows[7] is decoded.rows[8]
+    for combo in VALID_COMBOS:
+        random_graph: graph = graph({}, rows=combo, rndm=True)
+        decoded = graph.from_buffer(bytearray(random_graph.to_bytes()))
+        decoded.assertions()
+        assert decoded == random_graph and hash(decoded) == hash(random_graph)
+    with pytest.raises(ValueError):
+        graph.from_buffer(b"\x00\x00" + buf[2:])
+
+
+def test_graph_assertions() -> None:
+    """Graph assertions identify the first invalid connection."""
+    grph: graph = graph(TEST_GRAPH)
+    grph.connections[ConnIdx.SRC_IDX, 0] = 100
+    with pytest.raises(AssertionError, match="Connection I100 source index out of range"):
+        grph.assertions()
+    grph.connections[ConnIdx.SRC_IDX, 0] = 1
+    with pytest.raises(AssertionError, match="Connection I1->F0 types do not match"):
+        grph.assertions()
+    grph.connections[ConnIdx.SRC_IDX, 0] = 0
+    grph.assertions()
+    grph.rows[DstRowIndex.U] = interface([2, 2])
+    with pytest.raises(AssertionError, match="Connection U2 destination index out of range"):
+        grph.assertions()
+    grph = graph(TEST_GRAPH)
+    grph.connections[ConnIdx.DST_IDX, 2] = 3
+    with pytest.raises(AssertionError, match="Destination row A has non-sequential destination endpoint indices"):
+        grph.assertions()
+
+
+def test_graph_assertions_benchmark() -> None:
+    """Benchmark the vectorized graph assertions against checking one connection at a time."""
+    graphs: list[graph] = [graph({}, rows=choice(VALID_COMBOS), rndm=True) for _ in range(500)]
+
+    def loop_assertions(grph: graph) -> None:
+        for sr, dr, si, di in grph.connections.T:
+            assert si < len(grph.rows[sr]), f"Connection {ROWS_INDEXED[sr]}{si} source index out of range"
+            assert di < len(grph.rows[dr]), f"Connection {ROWS_INDEXED[dr]}{di} destination index out of range"
+            assert grph.rows[sr][si] == grph.rows[dr][di], f"Connection {ROWS_INDEXED[sr]}{si}->{ROWS_INDEXED[dr]}{di} types do not match"
+
+    start: float = perf_counter()
+    for grph in graphs:
+        grph.assertions()
+    vectorized: float = perf_counter() - start
+    start = perf_counter()
+    for grph in graphs:
+        loop_assertions(grph)
+    loop: float = perf_counter() - start
+    _logger.info(f"Assertions for {len(graphs)} graphs: vectorized {vectorized * 1000:.3f} ms, connection loop {loop * 1000:.3f} ms")
+
+
 @pytest.mark.parametrize("_", list(range(10)))
 def test_random_graph_slow(_) -> None:
     """Test the random graph function generates a valid graph that can be converted to JSON
@@ -0,0 +1,74 @@
+"""Unit tests & benchmarks for graph_parser.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+from random import choice, seed
+from time import perf_counter
+
+from numpy import array_equal
+
+from egp_types.connections import ConnIdx, connections
+from egp_types.egp_typing import VALID_GRAPH_ROW_COMBINATIONS, DstRowIndex, JSONGraph
+from egp_types.graph import graph
+from egp_types.graph_parser import parsed_json_graph, parse_json_graph
+from egp_types.rows import rows
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+# Constants
+VALID_COMBOS = tuple(VALID_GRAPH_ROW_COMBINATIONS)
+
+
+# Random seed
+seed(3)
+
+
+TEST_GRAPH: JSONGraph = {
+    "A": [["C", 1, 2], ["I", 1, 2]],
+    "B": [["I", 2, 3]],
+    "F": [["I", 0, 1]],
+    "O": [["A", 0, 2], ["C", 0, 3]],
+    "P": [["B", 0, 2], ["I", 1, 2]],
+    "U": [["B", 1, 3]],
+    "C": [["42", 3], ["64", 2]],
+}
+
+
+def test_parse_json_graph() -> None:
+    """The parsed JSON graph has the referenced sources, destinations, constants & connections."""
+    parsed: parsed_json_graph = parse_json_graph(TEST_GRAPH)
+    assert parsed.src_interface_types("I") == [1, 2, 3]
+    assert parsed.src_interface_types("A") == [2]
+    assert parsed.src_interface_types("B") == [2, 3]
+    assert parsed.dst_types == {"A": [2, 2], "B": [3], "F": [1], "O": [2, 3], "P": [2, 2], "U": [3]}
+    assert parsed.constants == (["42", "64"], [3, 2])
+    assert parsed.connections.shape == (4, 9)
+    assert parsed.connections[ConnIdx.DST_ROW].tolist() == [4, 5, 5, 6, 7, 7, 8, 8, 9]
+    assert parsed.connections[ConnIdx.SRC_ROW].tolist() == [0, 1, 0, 0, 2, 1, 3, 0, 3]
+    assert parsed.connections[ConnIdx.DST_IDX].tolist() == [0, 0, 1, 0, 0, 1, 0, 1, 0]
+    assert parse_json_graph({}).connections.shape == (4, 0)
+
+
+def test_parsed_graph() -> None:
+    """Rows & connections from a parsed JSON graph are the same as parsing the JSON graph themselves."""
+    for _ in range(100):
+        random_graph: graph = graph({}, rows=choice(VALID_COMBOS), rndm=True)
+        json_graph: JSONGraph = random_graph.json_graph()
+        parsed: parsed_json_graph = parse_json_graph(json_graph)
+        assert array_equal(connections(json_graph), connections(json_graph, parsed=parsed))
+        assert rows(json_graph) == rows(json_graph, parsed=parsed)
+        grph: graph = graph(json_graph)
+        assert grph == random_graph
+        assert grph.rows[DstRowIndex.P] is grph.rows[DstRowIndex.O] or not grph.rows.valid(DstRowIndex.F)
+
+
+def test_parse_benchmark() -> None:
+    """Benchmark constructing graphs from JSON graphs."""
+    json_graphs: list[JSONGraph] = [graph({}, rows=choice(VALID_COMBOS), rndm=True).json_graph() for _ in range(200)]
+    start: float = perf_counter()
+    for json_graph in json_graphs:
+        graph(json_graph)
+    _logger.info(f"graph(json_graph) for {len(json_graphs)} graphs: {(perf_counter() - start) * 1000:.3f} ms")
@@ -1,6 +1,19 @@
 """Test the interface module."""
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy import array, int16
 from pytest import raises
-from egp_types.interface import interface, empty_interface, src_interface, dst_interface
+from egp_types.interface import (
+    EMPTY_INTERFACE,
+    INTERFACE_REGISTRY,
+    canonical_interface,
+    interface,
+    interface_c,
+    interface_registry,
+    empty_interface,
+    src_interface,
+    dst_interface,
+)
 
 
 def test_instanciation() -> None:
@@ -35,3 +48,54 @@ def test_interface_assertions() -> None:
     test_interface = interface([2] * 257)
     with raises(ValueError):
         test_interface.assertions()
+
+
+def test_frozen_interface() -> None:
+    """A frozen interface cannot be modified and hashes the same as an equal unfrozen interface."""
+    test_interface = interface([2, 3, 4])
+    assert not test_interface.frozen()
+    digest: bytes = test_interface.digest()
+    assert test_interface.freeze() is test_interface
+    assert test_interface.frozen()
+    with raises(ValueError):
+        test_interface[0] = 5
+    assert hash(test_interface) == hash(interface([2, 3, 4]))
+    assert test_interface.digest() == digest == interface([2, 3, 4]).digest()
+    assert hash(test_interface) != hash(interface([2, 3, 5]))
+    # A copy is not frozen
+    test_copy = test_interface.copy()
+    test_copy[0] = 5
+    assert hash(test_copy) == hash(interface([5, 3, 4]))
+
+
+def test_interface_c_hash() -> None:
+    """Constants with the same types but different values are not equal."""
+    constants = interface_c(["1", "2"], [2, 2]).freeze()
+    assert constants == interface_c(["1", "2"], [2, 2])
+    assert hash(constants) == hash(interface_c(["1", "2"], [2, 2]))
+    assert constants != interface_c(["1", "3"], [2, 2])
+    assert constants.digest() != interface_c(["1", "3"], [2, 2]).digest()
+
+
+def test_interface_registry() -> None:
+    """The registry returns the same frozen interface for the same endpoint types and is LRU bounded."""
+    registry = interface_registry(size=2)
+    iface: interface = registry.get([2, 3])
+    assert iface.frozen()
+    assert registry.get([2, 3]) is iface
+    assert registry.get(array([2, 3], dtype=int16).tobytes()) is iface
+    assert registry.get(array([2, 3])) is iface
+    empty: interface = registry.get([])
+    assert empty is not EMPTY_INTERFACE and not len(empty)
+    registry.get([1])
+    assert len(registry) == 2
+    assert registry.get([2, 3]) is not iface
+    assert registry.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 4, "evictions": 2}
+
+
+def test_interface_registry_threads() -> None:
+    """Concurrent requests for the same endpoint types get the same interface."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ifaces: list[interface] = list(executor.map(lambda _: canonical_interface([5, 4, 3]), range(1000)))
+    assert all(iface is ifaces[0] for iface in ifaces)
+    assert INTERFACE_REGISTRY.get([5, 4, 3]) is ifaces[0]
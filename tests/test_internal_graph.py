@@ -1,21 +1,26 @@
 """Test cases for the internal graph module."""
+from copy import deepcopy
 from json import dump, load
 from logging import DEBUG, INFO, Logger, NullHandler, getLogger
 from os.path import dirname, exists, join
+from pickle import dumps, loads
 from pprint import pformat
-from random import choice, seed
+from random import Random, choice, seed
+from time import perf_counter
 
 import pytest
 from tqdm import trange
 
-from egp_types.egp_typing import DST_EP, SRC_EP, VALID_GRAPH_ROW_COMBINATIONS
-from egp_types.end_point import dst_end_point, src_end_point
+from egp_types.egp_typing import DST_EP, ROWS, SRC_EP, VALID_GRAPH_ROW_COMBINATIONS
+from egp_types.end_point import dst_end_point, key_to_str, src_end_point, str_to_key
+from egp_types.graph import graph
 from egp_types.internal_graph import (
     DstEndPointDict,
     EndPointDict,
     SrcEndPointDict,
     dst_end_point_ref,
     internal_graph,
+    internal_graph_from_JSONGraph,
     internal_graph_from_json,
     random_internal_graph,
     src_end_point_ref,
@@ -270,8 +275,8 @@ def test_internal_graph_move_row() -> None:
     moved_row: EndPointDict = graph.move_row("A", "B")
     assert isinstance(moved_row, dict)
     assert len(moved_row) == 1
-    assert "B000s" in moved_row
-    assert "B000d" not in moved_row
+    assert str_to_key("B000s") in moved_row
+    assert str_to_key("B000d") not in moved_row
 
 
 def test_internal_graph_direct_connect() -> None:
@@ -292,7 +297,7 @@ def test_internal_graph_append_connect() -> None:
     connected_eps: DstEndPointDict = graph.append_connect("A", "B")
     assert isinstance(connected_eps, dict)
     assert len(connected_eps) == 1
-    assert "B001d" in connected_eps
+    assert str_to_key("B001d") in connected_eps
 
 
 def test_internal_graph_redirect_refs() -> None:
@@ -302,7 +307,7 @@ def test_internal_graph_redirect_refs() -> None:
     graph.add(dst_end_point("B", 0, 2, refs=[src_end_point_ref("A", 0)]))
     graph.redirect_refs("A", SRC_EP, "B", "O")
     assert len(graph) == 2
-    assert graph["A000s"].refs[0].row == "O" and graph["A000s"].refs[0].idx == 0
+    assert graph[str_to_key("A000s")].refs[0].row == "O" and graph[str_to_key("A000s")].refs[0].idx == 0
 
 
 def test_internal_graph_as_row() -> None:
@@ -313,8 +318,8 @@ def test_internal_graph_as_row() -> None:
     row: EndPointDict = graph.as_row("A")
     assert isinstance(row, dict)
     assert len(row) == 2
-    assert "A000d" in row
-    assert "A000s" in row
+    assert str_to_key("A000d") in row
+    assert str_to_key("A000s") in row
 
 
 def test_internal_graph_remove_all_refs() -> None:
@@ -376,15 +381,122 @@ def test_random_internal_graph() -> None:
     graph: internal_graph = random_internal_graph("AB", max_row_eps=8, row_stablization=True, verify=True)
     assert isinstance(graph, internal_graph)
     assert len(graph) >= 2 and len(graph) <= 24  # A & B with up to 8 eps each + O with up to 8 eps
-    assert "A000s" in graph
-    assert "A000d" not in graph
-    assert "B000s" in graph
-    assert "B000d" in graph
-    assert "I000s" not in graph
-    assert "O000d" not in graph
-    assert "C000s" not in graph
-    assert "F000d" not in graph
-    assert "P000d" not in graph
+    assert str_to_key("A000s") in graph
+    assert str_to_key("A000d") not in graph
+    assert str_to_key("B000s") in graph
+    assert str_to_key("B000d") in graph
+    assert str_to_key("I000s") not in graph
+    assert str_to_key("O000d") not in graph
+    assert str_to_key("C000s") not in graph
+    assert str_to_key("F000d") not in graph
+    assert str_to_key("P000d") not in graph
+
+
+def test_end_point_keys() -> None:
+    """End point keys round trip to strings & sort in the same order as the strings."""
+    keys: list[int] = [src_end_point(row, idx, 2).key() for row in ("A", "B", "C", "I") for idx in (0, 1, 3, 255, 999)]
+    keys.extend(dst_end_point(row, idx, 2).key() for row in ("A", "B", "F", "O", "P", "U") for idx in (0, 1, 3, 255, 999))
+    assert len(set(keys)) == len(keys)
+    assert all(str_to_key(key_to_str(key)) == key for key in keys)
+    assert [key_to_str(key) for key in sorted(keys)] == sorted(key_to_str(key) for key in keys)
+    assert key_to_str(src_end_point("A", 3, 2).key()) == "A003s"
+    assert dst_end_point_ref("A", 7).key() == dst_end_point("A", 7, 2).key() == src_end_point_ref("A", 7).invert_key()
+
+
+def _assert_indexes(igraph: internal_graph) -> None:
+    """The filters return the same end points in the same order as scanning all the end points."""
+    for cls in (DST_EP, SRC_EP):
+        assert list(igraph.cls_filter(cls)) == [ep for ep in igraph.values() if ep.cls == cls]
+        for row in ROWS:
+            assert list(igraph.row_cls_filter(row, cls)) == [ep for ep in igraph.values() if ep.row == row and ep.cls == cls]
+            assert igraph.num_eps(row, cls) == igraph.next_idx(row, cls) == len(list(igraph.row_cls_filter(row, cls)))
+    for row in ROWS:
+        assert list(igraph.row_filter(row)) == [ep for ep in igraph.values() if ep.row == row]
+        assert igraph.has_row(row) == any(ep.row == row for ep in igraph.values())
+    assert list(igraph.src_unref_filter()) == [ep for ep in igraph.values() if ep.cls == SRC_EP and not ep.refs]
+    assert list(igraph.dst_unref_filter()) == [ep for ep in igraph.values() if ep.cls == DST_EP and not ep.refs and ep.row != "U"]
+
+
+def test_internal_graph_indexes() -> None:
+    """The row & class indexes are maintained by all the ways the internal graph can be modified."""
+    for igraph in RANDOM_GRAPHS[:100]:
+        igraph = deepcopy(igraph)
+        _assert_indexes(igraph)
+        igraph.add(src_end_point("A", igraph.next_idx("A", SRC_EP), 2))
+        igraph.update({ep.key(): ep for ep in (dst_end_point("O", igraph.next_idx("O", DST_EP), 2),)})
+        igraph |= igraph.move_row("I", "B", True)
+        igraph.setdefault(str_to_key("A000s"), src_end_point("A", 0, 3))
+        del igraph[next(iter(igraph))]
+        igraph.pop(next(iter(igraph)))
+        assert igraph.pop(-1, None) is None
+        igraph.popitem()
+        _assert_indexes(igraph)
+        igraph.remove_row("B")
+        igraph.reindex()
+        _assert_indexes(igraph)
+        _assert_indexes(deepcopy(igraph))
+        _assert_indexes(loads(dumps(igraph)))
+        igraph.clear()
+        _assert_indexes(igraph)
+
+
+def test_internal_graph_filter_benchmark() -> None:
+    """Benchmark the row filters on a large internal graph."""
+    igraph: internal_graph = internal_graph()
+    for row in "IABO":
+        for idx in range(256):
+            if row != "O":
+                igraph.add(src_end_point(row, idx, 2))
+            if row != "I":
+                igraph.add(dst_end_point(row, idx, 2))
+    start: float = perf_counter()
+    for _ in range(100):
+        for row in "IABO":
+            igraph.num_eps(row, SRC_EP)
+            tuple(igraph.dst_row_filter(row))
+            igraph.row_types(row, SRC_EP)
+    _logger.info(f"1200 filters of a {len(igraph)} end point graph: {(perf_counter() - start) * 1000:.3f} ms")
+
+
+def _connected_graphs(num: int) -> list[internal_graph]:
+    """Return num random internal graphs with connected end points."""
+    rng: Random = Random(1)
+    return [internal_graph_from_JSONGraph(graph({}, rows=rng.choice(COMBOS), rndm=True, rng=rng).json_graph()) for _ in range(num)]
+
+
+def test_internal_graph_clone() -> None:
+    """A clone is equal to the original graph but shares no end points or references with it."""
+    igraphs: list[internal_graph] = _connected_graphs(200)
+    assert sum(len(ep.refs) for igraph in igraphs for ep in igraph.values()) > 1000
+    for igraph in igraphs:
+        json_igraph: dict[str, list[str | int | bool | list[list[str | int]] | None]] = igraph.json_obj()
+        clone: internal_graph = igraph.clone()
+        assert clone == igraph and list(clone) == list(igraph)
+        _assert_indexes(clone)
+        for key, ep in clone.items():
+            assert ep is not igraph[key] and type(ep) is type(igraph[key]) and ep.refs is not igraph[key].refs
+            assert all(ref is not oref and type(ref) is type(oref) for ref, oref in zip(ep.refs, igraph[key].refs))
+        # Modifying the clone references & end points does not change the original
+        for ep in clone.values():
+            for ref in ep.refs:
+                ref.idx += 1
+            ep.refs.clear()
+            ep.typ = 0
+        clone.remove_row("I")
+        assert igraph.json_obj() == json_igraph
+
+
+def test_internal_graph_clone_benchmark() -> None:
+    """Benchmark clone() against copy.deepcopy()."""
+    igraphs: list[internal_graph] = _connected_graphs(500)
+    start: float = perf_counter()
+    deepcopies: list[internal_graph] = [deepcopy(igraph) for igraph in igraphs]
+    deepcopy_time: float = perf_counter() - start
+    start = perf_counter()
+    clones: list[internal_graph] = [igraph.clone() for igraph in igraphs]
+    clone_time: float = perf_counter() - start
+    _logger.info(f"{len(igraphs)} internal graphs deepcopy: {deepcopy_time * 1000:.3f} ms, clone: {clone_time * 1000:.3f} ms")
+    assert clones == deepcopies
 
 
 @pytest.mark.parametrize("igraph", RANDOM_GRAPHS)
@@ -0,0 +1,70 @@
+"""Unit tests for population.py."""
+from logging import DEBUG, Logger, NullHandler, getLogger
+
+import pytest
+from numpy.random import SeedSequence
+
+from egp_types.genetic_code import genetic_code_factory
+from egp_types.genetic_code_cache import genetic_code_cache
+from egp_types.population import _random_packed, merge, pack, random_population
+
+
+# Logging
+_logger: Logger = getLogger(__name__)
+_logger.addHandler(NullHandler())
+_LOG_DEBUG: bool = _logger.isEnabledFor(DEBUG)
+
+
+def test_merge() -> None:
+    """Merged genetic codes have the packed signatures and are not duplicated."""
+    packed = _random_packed(4, 3, SeedSequence(1), 0.0, {})
+    assert len(packed.signatures) == len(packed.graphs) == len(packed.links) == 4 * 15
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=128)
+    roots: list[int] = merge(gcc, [packed])
+    assert len(gcc) == 4 * 15
+    assert gcc.batch_signatures(roots).tobytes() == packed.signatures[packed.roots].tobytes()
+    assert merge(gcc, [packed]) == roots
+    assert len(gcc) == 4 * 15
+    assert not gcc.pin_count.any()
+
+
+def test_random_population() -> None:
+    """A population created in worker processes is reproducible for the same seed."""
+    signatures: list[bytes] = []
+    for _ in range(2):
+        gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=256)
+        roots: list[int] = random_population(gcc, 8, depth=2, workers=2, seed=42)
+        assert len(roots) == 8
+        assert len(gcc) == 8 * 7
+        gcc.assertions()
+        signatures.append(gcc.batch_signatures(roots).tobytes())
+    assert signatures[0] == signatures[1]
+
+
+def test_merge_pins_existing() -> None:
+    """Genetic codes already in the cache that are used by a merge cannot be purged by it."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=16)
+    first = _random_packed(1, 1, SeedSequence(1), 0.0, {})
+    second = _random_packed(1, 1, SeedSequence(2), 0.0, {})
+    merge(gcc, [first])
+    # Fill the cache so the merged genetic codes are the least recently used.
+    for _ in range(gcc.size() - len(gcc)):
+        gcc.genetic_code_type({}, rndm=True, depth=0)
+    roots: list[int] = merge(gcc, [first, second])
+    assert all(gcc[root].valid() for root in roots)
+    assert gcc.batch_signatures(roots).tobytes() == first.signatures[first.roots].tobytes() + second.signatures[second.roots].tobytes()
+    assert not gcc.pin_count.any()
+
+
+def test_pack_purged() -> None:
+    """Genetic codes with purged dependencies cannot be packed."""
+    gcc: genetic_code_cache = genetic_code_cache(genetic_code_factory(), size=16)
+    roots: list[int] = merge(gcc, [_random_packed(2, 1, SeedSequence(3), 0.0, {})])
+    gcc.pin(roots[0])
+    for gc in gcc.values():
+        if gc.idx != roots[0]:
+            gc.touch()
+    gcc.purge(fraction=1 / 16)
+    assert gcc.gca[roots[0]] is gcc.PURGED_GENETIC_CODE
+    with pytest.raises(ValueError):
+        pack(gcc, [roots[0]])